@@ -0,0 +1,293 @@
+# async_datacampus_agent.py
+import asyncio
+import json
+import random
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.agents.response_cache import ResponseCache
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - dependencia opcional
+    ijson = None
+
+# Códigos que se reintentan: limitación y errores transitorios del servidor
+RETRYABLE_STATUS = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+
+class AgentError(Exception):
+    """Error base del agente con el código HTTP y el detalle del servidor"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, detail: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AgentConnectionError(AgentError):
+    """No se pudo conectar con la API o se agotó el tiempo de espera"""
+
+
+class AgentAuthenticationError(AgentError):
+    """La API respondió 401: falta llamar a /auth/login"""
+
+
+class AgentNotFoundError(AgentError):
+    """El elemento solicitado no existe"""
+
+
+class AgentThrottledError(AgentError):
+    """La API siguió respondiendo 429 tras agotar los reintentos"""
+
+
+class AgentServerError(AgentError):
+    """Error 5xx de la API"""
+
+
+class AgentRequestError(AgentError):
+    """Otros errores 4xx (petición inválida)"""
+
+
+def _error_for(response: httpx.Response, body: bytes) -> AgentError:
+    try:
+        detail = json.loads(body).get("detail")
+    except (ValueError, AttributeError):
+        detail = body.decode("utf-8", errors="replace")[:500]
+
+    status = response.status_code
+    message = f"{response.request.method} {response.request.url.path} -> {status}: {detail}"
+    if status == 401:
+        return AgentAuthenticationError(message, status, detail)
+    if status == 404:
+        return AgentNotFoundError(message, status, detail)
+    if status == 429:
+        return AgentThrottledError(message, status, detail)
+    if status >= 500:
+        return AgentServerError(message, status, detail)
+    return AgentRequestError(message, status, detail)
+
+
+async def _parse_json(response: httpx.Response) -> Any:
+    """Parsear el JSON a medida que llegan los fragmentos, sin acumular el cuerpo.
+
+    Con ijson (backend en C si está disponible) el parseo se solapa con la
+    descarga; sin ijson se lee la respuesta entera y se usa ``json.loads``.
+    """
+    if ijson is None:
+        body = await response.aread()
+        return json.loads(body) if body else None
+
+    values = ijson.sendable_list()
+    parser = ijson.items_coro(values, "", use_float=True)
+    received = False
+    async for chunk in response.aiter_bytes():
+        if chunk:
+            received = True
+            parser.send(chunk)
+    if not received:
+        return None
+    parser.close()
+    return values[0]
+
+
+class AsyncDatacampusAgent:
+    """Cliente asíncrono de la API de OneDrive para agentes.
+
+    Usa un pool de conexiones persistente y un semáforo que limita las
+    peticiones en vuelo, de modo que las llamadas masivas (``gather_contents``,
+    ``listar_arbol``) se ejecutan en paralelo sin saturar el servidor.
+    Los errores se lanzan como excepciones tipadas en lugar de devolver ``None``.
+
+    Uso::
+
+        async with AsyncDatacampusAgent() as agent:
+            await agent.autenticar()
+            contenidos = await agent.gather_contents(ids)
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_concurrency: int = 16,
+        max_connections: int = 32,
+        timeout: float = 120.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        cache_responses: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        # GET condicionales: con 304 se reutiliza el JSON ya parseado
+        self.cache = ResponseCache() if cache_responses else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0,
+            ),
+            headers={"Accept": "application/json"},
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncDatacampusAgent":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    # --- Transporte ------------------------------------------------------------
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            try:
+                return max(float(response.headers["Retry-After"]), 0.0)
+            except (KeyError, ValueError):
+                pass
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    async def _request(self, method: str, path: str, parse: bool = False, **kwargs) -> Tuple[httpx.Response, Any]:
+        """Enviar una petición con reintentos y devolver la respuesta y el cuerpo.
+
+        Con ``parse`` el cuerpo de una respuesta correcta se devuelve ya
+        parseado (``_parse_json``); los errores siempre traen los bytes.
+        """
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                try:
+                    async with self.client.stream(method, path, **kwargs) as response:
+                        if parse and response.status_code < 400 and response.status_code != 304:
+                            body = await _parse_json(response)
+                        else:
+                            body = await response.aread()
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError) as e:
+                    retry_safe = method in IDEMPOTENT_METHODS or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                    if attempt >= self.max_retries or not retry_safe:
+                        raise AgentConnectionError(f"{method} {path}: {e}") from e
+                    delay = self._backoff(attempt)
+                else:
+                    if response.status_code < 400:
+                        return response, body
+                    # Un 429 no llegó a procesarse, así que se puede reintentar cualquier método
+                    retry_safe = response.status_code == 429 or method in IDEMPOTENT_METHODS
+                    if response.status_code not in RETRYABLE_STATUS or not retry_safe or attempt >= self.max_retries:
+                        raise _error_for(response, body)
+                    delay = self._backoff(attempt, response)
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _json(self, method: str, path: str, **kwargs) -> Any:
+        key = None
+        if method == "GET" and self.cache is not None:
+            key = str(self.client.build_request("GET", path, params=kwargs.get("params")).url)
+            kwargs["headers"] = {**kwargs.get("headers", {}), **self.cache.conditional_headers(key)}
+
+        response, data = await self._request(method, path, parse=True, **kwargs)
+        if response.status_code == 304 and key is not None:
+            return self.cache.not_modified(key)
+
+        return self.cache.store(key, response.headers, data) if key is not None else data
+
+    # --- Operaciones de la API -------------------------------------------------
+
+    async def autenticar(self) -> Dict[str, Any]:
+        """Autenticación inicial en la API"""
+        return await self._json("POST", "/auth/login", json={})
+
+    async def verificar_autenticacion(self) -> bool:
+        """Verifica si la autenticación sigue válida"""
+        try:
+            await self._json("GET", "/auth/status")
+            return True
+        except AgentAuthenticationError:
+            return False
+
+    async def listar_contenido(self, folder_id: Optional[str] = None) -> Dict[str, Any]:
+        """Lista contenido de carpeta"""
+        params = {"folder_id": folder_id} if folder_id else {}
+        return await self._json("GET", "/folders", params=params)
+
+    async def obtener_info(self, item_id: str) -> Dict[str, Any]:
+        """Metadatos de un elemento"""
+        return await self._json("GET", f"/items/{item_id}")
+
+    async def obtener_excel_como_json(self, file_id: str) -> Dict[str, Any]:
+        """Obtiene el contenido de un archivo Excel como JSON"""
+        return await self._json("GET", f"/files/{file_id}/content")
+
+    async def crear_reporte(self, folder_id: str, nombre_archivo: str, datos: Dict[str, list]) -> str:
+        """Crea un archivo Excel y devuelve su id"""
+        payload = {"filename": nombre_archivo, "folder_id": folder_id, "data": datos}
+        result = await self._json("POST", "/files/excel", json=payload)
+        return result["file_id"]
+
+    async def eliminar_elemento(self, item_id: str) -> None:
+        """Elimina un archivo o carpeta"""
+        await self._json("DELETE", f"/items/{item_id}")
+
+    async def iter_arbol(self, folder_id: Optional[str] = None, depth: int = 3) -> AsyncIterator[Dict[str, Any]]:
+        """Eventos NDJSON de ``/tree`` a medida que el servidor recorre las carpetas"""
+        params = {"depth": depth, "stream": "true"}
+        if folder_id:
+            params["folder_id"] = folder_id
+
+        async with self._semaphore:
+            try:
+                async with self.client.stream("GET", "/tree", params=params) as response:
+                    if response.status_code >= 400:
+                        raise _error_for(response, await response.aread())
+                    async for line in response.aiter_lines():
+                        if line:
+                            yield json.loads(line)
+            except httpx.TransportError as e:
+                raise AgentConnectionError(f"GET /tree: {e}") from e
+
+    async def listar_arbol(self, folder_id: Optional[str] = None, depth: int = 3) -> Dict[str, Any]:
+        """Árbol completo con conteos y tamaños agregados"""
+        async for event in self.iter_arbol(folder_id, depth):
+            if event.get("event") == "tree":
+                return event
+        raise AgentServerError("La respuesta de /tree terminó sin el árbol final")
+
+    # --- Operaciones masivas -----------------------------------------------------
+
+    async def _gather(self, calls: Dict[str, Any], return_exceptions: bool) -> Dict[str, Any]:
+        results = await asyncio.gather(*calls.values(), return_exceptions=return_exceptions)
+        return dict(zip(calls.keys(), results))
+
+    async def gather_contents(self, file_ids: Iterable[str], return_exceptions: bool = False) -> Dict[str, Any]:
+        """Contenido de varios Excel en paralelo (limitado por ``max_concurrency``)"""
+        ids = list(dict.fromkeys(file_ids))
+        return await self._gather({i: self.obtener_excel_como_json(i) for i in ids}, return_exceptions)
+
+    async def gather_listings(self, folder_ids: Iterable[str], return_exceptions: bool = False) -> Dict[str, Any]:
+        """Listado de varias carpetas en paralelo"""
+        ids = list(dict.fromkeys(folder_ids))
+        return await self._gather({i: self.listar_contenido(i) for i in ids}, return_exceptions)
+
+    async def gather_info(self, item_ids: Iterable[str], return_exceptions: bool = False) -> Dict[str, Any]:
+        """Metadatos de varios elementos en paralelo"""
+        ids = list(dict.fromkeys(item_ids))
+        return await self._gather({i: self.obtener_info(i) for i in ids}, return_exceptions)
+
+    async def eliminar_elementos(self, item_ids: Iterable[str], return_exceptions: bool = True) -> Dict[str, Any]:
+        """Elimina varios elementos en paralelo; por defecto devuelve los errores por id"""
+        ids = list(dict.fromkeys(item_ids))
+        return await self._gather({i: self.eliminar_elemento(i) for i in ids}, return_exceptions)
+
+    async def crear_reportes(self, reportes: List[Dict[str, Any]], return_exceptions: bool = False) -> List[Any]:
+        """Crea varios reportes (``folder_id``, ``nombre_archivo``, ``datos``) en paralelo"""
+        calls = [self.crear_reporte(r["folder_id"], r["nombre_archivo"], r["datos"]) for r in reportes]
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
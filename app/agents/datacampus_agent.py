@@ -2,13 +2,31 @@
 import requests
 from typing import Optional, Dict, Any
 import json
+from urllib.parse import urlencode
+from app.agents.response_cache import ResponseCache
 
 
 class DatacampusAgent:
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", cache_responses: bool = True):
         self.base_url = base_url
         self.token_ok = False
         self.session = requests.Session() 
+        # Respuestas con ETag: los sondeos repetidos se resuelven con 304
+        self.cache = ResponseCache() if cache_responses else None
+
+    def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET condicional: reutiliza la respuesta guardada si la API responde 304"""
+        url = f"{self.base_url}{path}"
+        key = f"{url}?{urlencode(sorted((params or {}).items()))}"
+        headers = self.cache.conditional_headers(key) if self.cache else {}
+
+        response = self.session.get(url, params=params, headers=headers)
+        if response.status_code == 304 and self.cache:
+            return self.cache.not_modified(key)
+        response.raise_for_status()
+
+        data = response.json()
+        return self.cache.store(key, response.headers, data) if self.cache else data
 
     def autenticar(self) -> bool:
         """Realiza autenticación inicial"""
@@ -56,9 +74,7 @@ class DatacampusAgent:
             
         try:
             params = {"folder_id": folder_id} if folder_id else {}
-            response = self.session.get(f"{self.base_url}/folders", params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json("/folders", params)
         except Exception as e:
             print(f"Error al listar contenido: {e}")
             return None
@@ -70,13 +86,23 @@ class DatacampusAgent:
             return None
             
         try:
-            response = self.session.get(f"{self.base_url}/files/{file_id}/content")
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(f"/files/{file_id}/content")
         except Exception as e:
             print(f"Error al obtener contenido del archivo: {e}")
             return None
 
+    def obtener_info(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Obtiene los metadatos de un archivo o carpeta"""
+        if not self.token_ok:
+            print("Autenticacion fallida")
+            return None
+
+        try:
+            return self._get_json(f"/items/{item_id}")
+        except Exception as e:
+            print(f"Error al obtener información: {e}")
+            return None
+
     def crear_reporte(self, folder_id: str, nombre_archivo: str, datos: Dict[str, list]) -> Optional[str]:
         """Crea un archivo Excel en la carpeta especificada con datos dados"""
         if not self.token_ok:
@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+
+@dataclass
+class CachedResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    value: Any
+
+
+class ResponseCache:
+    """Caché LRU de respuestas JSON ya parseadas, indexada por URL.
+
+    Guarda los validadores (ETag/Last-Modified) para repetir la petición
+    como condicional; si la API responde 304 se devuelve el valor guardado
+    sin volver a transferir ni parsear el cuerpo. Los valores se comparten
+    entre llamadas, así que no deben modificarse.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def not_modified(self, key: str) -> Any:
+        """Valor guardado tras un 304"""
+        with self._lock:
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry.value
+
+    def store(self, key: str, headers: Mapping[str, str], value: Any) -> Any:
+        """Guardar la respuesta si trae validadores; devuelve ``value``"""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        with self._lock:
+            self.misses += 1
+            if not etag and not last_modified:
+                self._entries.pop(key, None)
+                return value
+            self._entries[key] = CachedResponse(etag, last_modified, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
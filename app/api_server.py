@@ -1,21 +1,49 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-import pandas as pd
-import io
 import json
+import os
+import uuid
 from datetime import datetime
+from app import config
 from app.auth.auth_manager import AuthManager
-from app.one_drive.OD_manager import *
-
 from app.one_drive.OD_manager import OneDriveManager
+from app.storage.base import StorageBackend
+from app.storage.factory import create_storage_backend, requires_authentication
+from app.one_drive.governor import BULK
+from app.one_drive.tree_crawler import FolderTreeCrawler
+from app.cache.shared_state import get_shared_state, make_cache
+from app.cache.single_flight import AsyncSingleFlight
+from app.one_drive.subscriptions import SubscriptionManager
+from app.search.content_index import get_content_index
+from app.jobs.manager import FINISHED_STATES, JobManager
+from app.monitoring.metrics import REGISTRY
+from app.monitoring.middleware import MetricsMiddleware
+from app.monitoring.timing import ServerTimingMiddleware, span
+from app.web.compression import CompressionMiddleware
+from app.web.conditional import http_date, latest, make_etag, not_modified, quote_etag, validator_headers
+from app.warmup import start_warmup
+from utils.upload_formats import upload_format
+
+# pandas, openpyxl, msal y requests no se importan aquí: se cargan en la primera
+# petición que los usa (o antes, con la precarga de fondo) para que el arranque sea rápido
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_warmup()
+    yield
+    if od_manager is not None:
+        od_manager.close()
 
 app = FastAPI(
     title="OneDrive Manager API",
     description="API para gestionar archivos y carpetas en OneDrive (Datacampus)",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS para desarrollo
@@ -27,8 +55,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip/br/zstd según Accept-Encoding (JSON, CSV y NDJSON grandes)
+app.add_middleware(CompressionMiddleware)
+# Métricas por ruta (latencia, estado, bytes y peticiones activas)
+app.add_middleware(MetricsMiddleware)
+# Server-Timing por fase y perfilado opcional de peticiones lentas
+app.add_middleware(ServerTimingMiddleware)
+
+CSV_CHUNK_SIZE = 64 * 1024
+
 # Instancia global del manager (en producción usar dependency injection)
 od_manager = None
+# Cola de trabajos en segundo plano (se crea al primer uso)
+job_manager = None
+# Suscripción a notificaciones de cambios de Graph (si GRAPH_NOTIFICATION_URL está definida)
+subscriptions = None
+# Peticiones idénticas concurrentes (mismo archivo o carpeta) comparten una sola ejecución
+flights = AsyncSingleFlight()
+# Perfiles de columnas por versión del archivo (la clave lleva el cTag, no hace falta invalidar)
+profile_cache = make_cache("file_profile", 24 * 3600, max_entries=1024, dumps=bytes, loads=bytes)
 
 class ItemResponse(BaseModel):
     id: str
@@ -64,29 +109,69 @@ class AuthResponse(BaseModel):
     message: str
     expires_in: Optional[int] = None
 
+class TransferRequest(BaseModel):
+    parent_id: Optional[str] = None
+    name: Optional[str] = None
+
+class BulkTransferItem(TransferRequest):
+    item_id: str
+
+class BulkTransferRequest(BaseModel):
+    items: List[BulkTransferItem]
+
+class JobRequest(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
 # Dependency para verificar autenticación
 async def get_manager():
     global od_manager
+    if od_manager is None and not requires_authentication():
+        # Los backends locales no necesitan login
+        od_manager = create_storage_backend()
+    if od_manager is None and get_shared_state() is not None:
+        await flights.do("adopt_session", _adopt_session)
     if od_manager is None:
         raise HTTPException(status_code=401, detail="No autenticado. Llama primero a /auth/login")
     return od_manager
 
+async def _adopt_session():
+    """Reutilizar la sesión de MSAL de otro worker del nodo que ya hizo login"""
+    global od_manager
+    token = await run_in_threadpool(lambda: AuthManager().get_token_silent())
+    if token and od_manager is None:
+        od_manager = await run_in_threadpool(create_storage_backend, token)
+        _start_subscriptions(od_manager)
+
+def get_jobs() -> JobManager:
+    global job_manager
+    if job_manager is None:
+        from app.jobs.handlers import register_handlers
+
+        job_manager = register_handlers(JobManager())
+    return job_manager
+
+def _shared(key, fn, *args):
+    """Ejecutar ``fn`` en el threadpool, agrupando las llamadas concurrentes con la misma clave"""
+    return flights.do(key, lambda: run_in_threadpool(fn, *args))
+
 # Endpoints de autenticación
 @app.post("/auth/login", response_model=AuthResponse)
 async def login():
     """Inicializar autenticación con OneDrive"""
     global od_manager
     try:
-        # Obtener token primero antes de crear OneDriveManager
-        print(" Iniciando proceso de autenticación...")
-        auth = AuthManager()
-        token = auth.get_token()
-        
-        print(" Token obtenido, creando OneDriveManager...")
-        od_manager = OneDriveManager(token)  #  Pasar el token al constructor
-        
+        token = None
+        if requires_authentication():
+            # Obtener token primero antes de crear OneDriveManager
+            print(" Iniciando proceso de autenticación...")
+            auth = AuthManager()
+            token = auth.get_token()
+            print(" Token obtenido, creando OneDriveManager...")
+
         print(" Inicializando datacampus...")
-        od_manager.initialize_datacampus()
+        _replace_manager(create_storage_backend(token))
+        _start_subscriptions(od_manager)
 
         print(" Autenticación completada exitosamente")
         return AuthResponse(
@@ -99,11 +184,30 @@ async def login():
         raise HTTPException(status_code=500, detail=f"Error en autenticación: {str(e)}")
 
 
+def _replace_manager(manager: StorageBackend) -> None:
+    """Usar ``manager`` desde ahora y cerrar el anterior (precarga y suscripción al bus)"""
+    global od_manager
+    previous, od_manager = od_manager, manager
+    if previous is not None and previous is not manager:
+        previous.close()
+
+
+def _start_subscriptions(manager: StorageBackend) -> None:
+    """Suscribirse a cambios de Graph para que las cachés se invaliden por push"""
+    global subscriptions
+    if not config.GRAPH_NOTIFICATION_URL or not isinstance(manager, OneDriveManager):
+        return
+    if subscriptions is not None:
+        subscriptions.stop()
+    subscriptions = SubscriptionManager(manager)
+    subscriptions.start()
+
+
 @app.get("/auth/status", response_model=AuthResponse)
 async def auth_status():
     """Verificar estado de autenticación"""
     global od_manager
-    if od_manager is None or od_manager.token is None:
+    if od_manager is None or not od_manager.authenticated:
         raise HTTPException(status_code=401, detail="No autenticado")
     
     return AuthResponse(status="authenticated", message="Usuario autenticado")
@@ -111,12 +215,25 @@ async def auth_status():
 # Endpoints de navegación y listado
 @app.get("/folders", response_model=FolderContentsResponse)
 async def list_folder_contents(
+    request: Request,
+    response: Response,
     folder_id: Optional[str] = None,
-    manager: OneDriveManager = Depends(get_manager)
+    manager: StorageBackend = Depends(get_manager)
 ):
     """Listar contenido de una carpeta"""
     try:
-        items = manager.list_folder_contents(folder_id)
+        folder_id = folder_id or manager.datacampus_root_id
+        items = await _shared(("list", folder_id), manager.list_folder_contents, folder_id)
+        manager.prefetch_children(folder_id, items)
+
+        # El listado cambia si cambia cualquier hijo (su eTag) o el conjunto de hijos
+        etag = make_etag("folders", folder_id,
+                         *sorted(f"{item.id}:{item.etag}" for item in items))
+        last_modified = http_date(latest(item.modified_datetime for item in items))
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        response.headers.update(validator_headers(etag, last_modified))
         
         items_response = []
         for item in items:
@@ -133,7 +250,7 @@ async def list_folder_contents(
         files_count = sum(1 for item in items if item.type == 'file')
         
         return FolderContentsResponse(
-            current_folder_id=folder_id or manager.datacampus_root_id,
+            current_folder_id=folder_id,
             current_path=["datacampus"],  # TODO: implementar tracking de path
             items=items_response,
             total_items=len(items),
@@ -143,23 +260,93 @@ async def list_folder_contents(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al listar carpeta: {str(e)}")
 
+@app.get("/tree")
+async def get_folder_tree(
+    folder_id: Optional[str] = None,
+    depth: int = Query(3, ge=1, le=50),
+    stream: bool = True,
+    max_workers: int = Query(8, ge=1, le=32),
+    manager: StorageBackend = Depends(get_manager)
+):
+    """Recorrer el árbol de carpetas con conteos y tamaños agregados"""
+    try:
+        root_id = folder_id or manager.datacampus_root_id
+        root_name = manager.get_item_info(folder_id)['name'] if folder_id else "datacampus"
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"Carpeta no encontrada: {str(e)}")
+
+    # Un recorrido lista muchas carpetas seguidas: va por el carril bulk para no frenar al resto de la API
+    events = FolderTreeCrawler(manager, max_workers=max_workers, lane_name=BULK).crawl(root_id, root_name, depth)
+
+    if stream:
+        # NDJSON: una línea por carpeta listada y al final el árbol completo
+        return StreamingResponse(
+            (json.dumps(event, ensure_ascii=False) + "\n" for event in events),
+            media_type="application/x-ndjson"
+        )
+
+    try:
+        return await run_in_threadpool(lambda: next(e for e in events if e["event"] == "tree"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al recorrer carpetas: {str(e)}")
+
 @app.get("/items/{item_id}")
 async def get_item_info(
     item_id: str,
-    manager: OneDriveManager = Depends(get_manager)
+    request: Request,
+    manager: StorageBackend = Depends(get_manager)
 ):
     """Obtener información detallada de un elemento"""
     try:
-        item_info = manager.get_item_info(item_id)
-        return item_info
+        item_info = await _shared(("info", item_id), manager.get_item_info, item_id)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Elemento no encontrado: {str(e)}")
 
+    etag = quote_etag(item_info.get('eTag') or make_etag("item", item_id, item_info.get('lastModifiedDateTime', '')))
+    last_modified = http_date(item_info.get('lastModifiedDateTime'))
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    return JSONResponse(item_info, headers=validator_headers(etag, last_modified))
+
+# Debe declararse antes de /search/{item_name}
+@app.get("/search/content")
+async def search_content(
+    q: str = Query(..., min_length=1, description="Texto a buscar en las celdas (frase; sin distinguir tildes ni mayúsculas)"),
+    limit: int = Query(100, ge=1, le=1000),
+    prefix: bool = Query(False, description="La última palabra puede ser el comienzo de otra"),
+    manager: StorageBackend = Depends(get_manager)
+):
+    """Buscar en el contenido de los libros indexados (archivo, hoja, fila y columna de cada celda)"""
+    try:
+        index = get_content_index()
+        hits = await run_in_threadpool(index.search, q, limit, prefix)
+        return {
+            "query": q,
+            "hits": hits,
+            "total": len(hits),
+            "files": len({hit["file_id"] for hit in hits}),
+            "indexed": await run_in_threadpool(index.stats),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en búsqueda: {str(e)}")
+
+@app.post("/search/content/index")
+async def index_content(
+    folder_id: Optional[str] = None,
+    idempotency_key: Optional[str] = Header(None),
+    manager: StorageBackend = Depends(get_manager),
+    jobs: JobManager = Depends(get_jobs)
+):
+    """Poner al día el índice de contenido (solo libros nuevos o con otro cTag) como trabajo"""
+    job, created = jobs.submit("index_content", {"folder_id": folder_id}, manager, idempotency_key)
+    return _job_response(job, created)
+
 @app.get("/search/{item_name}")
 async def search_item(
     item_name: str,
     folder_id: Optional[str] = None,
-    manager: OneDriveManager = Depends(get_manager)
+    manager: StorageBackend = Depends(get_manager)
 ):
     """Buscar un elemento por nombre"""
     try:
@@ -181,10 +368,43 @@ async def search_item(
         raise HTTPException(status_code=500, detail=f"Error en búsqueda: {str(e)}")
 
 # Endpoints CRUD para archivos
+# Validadores del contenido de un archivo: cTag cambia solo cuando cambian los bytes
+async def _content_validators(manager: StorageBackend, file_id: str, variant: str):
+    info = await _shared(("info", file_id), manager.get_item_info, file_id)
+    etag = make_etag(variant, file_id, info.get('cTag') or info.get('eTag', ''))
+    return info, etag, http_date(info.get('lastModifiedDateTime'))
+
+def _compact_variant(variant: str, compact: bool) -> str:
+    # Con COMPACT_DATAFRAMES cambian los tipos publicados (category, int8...): otra variante
+    return f"{variant}:compact" if compact else variant
+
+def _content_json(manager: StorageBackend, file_id: str, orient: str, compact: bool) -> bytes:
+    from utils.df_tools import dataframe_to_json
+
+    df = manager.read_excel_file(file_id, compact)
+    # NaN -> null, fechas ISO y floats sin perder dígitos
+    with span("serialize"):
+        return dataframe_to_json(df, orient)
+
+def _profile_json(manager: StorageBackend, file_id: str, compact: bool) -> bytes:
+    from utils.df_tools import profile_dataframe
+
+    df = manager.read_excel_file(file_id, compact)
+    with span("transform"):
+        profile = profile_dataframe(df)
+    return json.dumps(profile, ensure_ascii=False).encode("utf-8")
+
+def _csv_stream(manager: StorageBackend, file_id: str, sheet: Optional[str], delimiter: str, encoding: str):
+    from utils.xlsx_stream import XlsxCsvStream
+
+    with span("graph_fetch"):
+        source = manager.open_content(file_id)
+    return XlsxCsvStream(source, sheet=sheet, delimiter=delimiter, encoding=encoding, chunk_size=CSV_CHUNK_SIZE)
+
 @app.post("/files/excel")
 async def create_excel_file(
     request: CreateFileRequest,
-    manager: OneDriveManager = Depends(get_manager)
+    manager: StorageBackend = Depends(get_manager)
 ):
     """Crear un archivo Excel"""
     try:
@@ -193,6 +413,8 @@ async def create_excel_file(
         # Convertir datos a DataFrame si se proporcionan
         df = None
         if request.data:
+            import pandas as pd
+
             df = pd.DataFrame(request.data)
         
         result = manager.create_excel_file(folder_id, request.filename, df)
@@ -203,67 +425,106 @@ async def create_excel_file(
 @app.get("/files/{file_id}/download")
 async def download_file(
     file_id: str,
-    manager: OneDriveManager = Depends(get_manager)
+    request: Request,
+    sheet: Optional[str] = Query(None, description="Nombre o índice (0, 1...) de la hoja; por defecto la primera"),
+    delimiter: str = Query(",", description="Separador: un carácter o comma, semicolon, tab, pipe"),
+    encoding: str = Query("utf-8", description="Codificación del CSV (utf-8, utf-8-sig, latin-1...)"),
+    manager: StorageBackend = Depends(get_manager)
 ):
-    """Descargar un archivo"""
+    """Descargar una hoja de un Excel como CSV, en streaming"""
     try:
-        # Para archivos Excel, convertir a CSV para facilitar descarga
-        df = manager.read_excel_file(file_id)
-        
-        # Crear buffer CSV
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_buffer.seek(0)
-        
-        # Obtener info del archivo para el nombre
-        file_info = manager.get_item_info(file_id)
+        variant = f"csv:{sheet or ''}:{delimiter}:{encoding}"
+        file_info, etag, last_modified = await _content_validators(manager, file_id, variant)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        # Las filas se leen, codifican y envían por bloques: la memoria no crece con el archivo
+        try:
+            rows = await run_in_threadpool(_csv_stream, manager, file_id, sheet, delimiter, encoding)
+        except (KeyError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e).strip("'\""))
+
         filename = file_info['name'].replace('.xlsx', '.csv')
-        
         return StreamingResponse(
-            io.BytesIO(csv_buffer.getvalue().encode()),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            rows,
+            media_type=f"text/csv; charset={rows.encoding}",
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                **validator_headers(etag, last_modified)
+            }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al descargar archivo: {str(e)}")
 
 @app.get("/files/{file_id}/content")
 async def get_file_content(
     file_id: str,
-    manager: OneDriveManager = Depends(get_manager)
+    request: Request,
+    orient: str = Query("split", pattern="^(split|records|columns)$", description="Forma de 'data': filas, objetos o columnas"),
+    manager: StorageBackend = Depends(get_manager)
 ):
     """Obtener contenido de un archivo Excel como JSON"""
     try:
-        df = manager.read_excel_file(file_id)
-        
-        # Convertir DataFrame a formato JSON amigable para frontend
-        content = {
-            "columns": df.columns.tolist(),
-            "data": df.values.tolist(),
-            "shape": df.shape,
-            "info": {
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_types": df.dtypes.to_dict()
-            }
-        }
-        return content
+        # Una llamada de metadatos basta para saber si el cliente ya tiene esta versión
+        compact = config.COMPACT_DATAFRAMES
+        variant = _compact_variant(f"json:{orient}", compact)
+        _, etag, last_modified = await _content_validators(manager, file_id, variant)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        # La clave incluye el ETag: nunca se mezclan versiones distintas del archivo
+        body = await _shared(("content_json", file_id, orient, etag), _content_json, manager, file_id, orient, compact)
+        return Response(body, media_type="application/json", headers=validator_headers(etag, last_modified))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al leer archivo: {str(e)}")
 
+@app.get("/files/{file_id}/profile")
+async def get_file_profile(
+    file_id: str,
+    request: Request,
+    manager: StorageBackend = Depends(get_manager)
+):
+    """Esquema, número de filas y estadísticas por columna de un archivo Excel"""
+    try:
+        compact = config.COMPACT_DATAFRAMES
+        variant = _compact_variant("profile", compact)
+        info, etag, last_modified = await _content_validators(manager, file_id, variant)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        # Solo se recalcula cuando cambia el contenido (nuevo cTag)
+        key = f"{variant}:{file_id}:{info.get('cTag') or info.get('eTag', '')}"
+        body = profile_cache.get(key)
+        if body is None:
+            body = await _shared(("profile", key), _profile_json, manager, file_id, compact)
+            profile_cache.set(key, body)
+        return Response(body, media_type="application/json", headers=validator_headers(etag, last_modified))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al perfilar archivo: {str(e)}")
+
 @app.put("/files/{file_id}/content")
 async def update_file_content(
     file_id: str,
     request: UpdateExcelRequest,
-    manager: OneDriveManager = Depends(get_manager)
+    compare: str = Query("hash", pattern="^(off|hash|dataframe)$", description="Cómo detectar que no hay cambios y evitar la subida"),
+    manager: StorageBackend = Depends(get_manager)
 ):
-    """Actualizar contenido de un archivo Excel"""
+    """Actualizar contenido de un archivo Excel (no se sube si no cambió)"""
     try:
         # Convertir datos a DataFrame
+        import pandas as pd
+
         df = pd.DataFrame(request.data)
         
-        result = manager.update_excel_file(file_id, df)
-        return {"message": "Archivo actualizado exitosamente", "file_id": file_id}
+        result = await run_in_threadpool(manager.update_excel_file, file_id, df, compare)
+        if result.get("skipped"):
+            return {"message": "Sin cambios: el archivo ya tenía este contenido", "file_id": file_id, "changed": False}
+        return {"message": "Archivo actualizado exitosamente", "file_id": file_id, "changed": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al actualizar archivo: {str(e)}")
 
@@ -271,22 +532,49 @@ async def update_file_content(
 async def upload_file(
     file: UploadFile = File(...),
     folder_id: Optional[str] = Form(None),
-    manager: OneDriveManager = Depends(get_manager)
+    background: bool = Form(False),
+    passthrough: bool = Form(True),
+    verify: bool = Form(True),
+    idempotency_key: Optional[str] = Header(None),
+    manager: StorageBackend = Depends(get_manager),
+    jobs: JobManager = Depends(get_jobs)
 ):
-    """Subir un archivo (solo Excel por ahora)"""
+    """Subir un archivo .xlsx (tal cual, sin parsearlo) o un .csv/.parquet (convertido a .xlsx)"""
     try:
-        if not file.filename.endswith('.xlsx'):
-            raise HTTPException(status_code=400, detail="Solo se permiten archivos Excel (.xlsx)")
+        try:
+            extension = upload_format(file.filename)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         folder_id = folder_id or manager.datacampus_root_id
+
+        if background:
+            # Se guarda en disco y se procesa como trabajo; la respuesta es inmediata
+            upload_dir = os.path.join(jobs.jobs_dir, "uploads")
+            os.makedirs(upload_dir, exist_ok=True)
+            path = os.path.join(upload_dir, f"{uuid.uuid4().hex}{extension}")
+            with open(path, "wb") as f:
+                while chunk := await file.read(1024 * 1024):
+                    f.write(chunk)
+            params = {"path": path, "filename": file.filename, "folder_id": folder_id,
+                      "passthrough": passthrough, "verify": verify}
+            try:
+                job, created = jobs.submit("upload_excel", params, manager, idempotency_key)
+            except Exception:
+                os.remove(path)
+                raise
+            if not created:
+                # Misma Idempotency-Key que un trabajo existente: esta copia no se usará
+                os.remove(path)
+            return _job_response(job, created=created)
         
-        # Leer contenido del archivo
-        content = await file.read()
-        df = pd.read_excel(io.BytesIO(content))
-        
-        # Crear archivo en OneDrive
-        result = manager.create_excel_file(folder_id, file.filename, df)
-        return {"message": "Archivo subido exitosamente", "file_id": result["id"]}
+        # El archivo recibido (en memoria o en disco si es grande) se envía por fragmentos
+        try:
+            result = await run_in_threadpool(manager.upload_file, folder_id, file.filename, file.file,
+                                             passthrough, verify)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"message": "Archivo subido exitosamente", "file_id": result["id"], "name": result["name"]}
     except HTTPException:
         raise
     except Exception as e:
@@ -296,7 +584,7 @@ async def upload_file(
 @app.post("/folders")
 async def create_folder(
     request: CreateFolderRequest,
-    manager: OneDriveManager = Depends(get_manager)
+    manager: StorageBackend = Depends(get_manager)
 ):
     """Crear una nueva carpeta"""
     try:
@@ -310,7 +598,7 @@ async def create_folder(
 @app.delete("/items/{item_id}")
 async def delete_item(
     item_id: str,
-    manager: OneDriveManager = Depends(get_manager)
+    manager: StorageBackend = Depends(get_manager)
 ):
     """Eliminar un archivo o carpeta"""
     try:
@@ -319,6 +607,154 @@ async def delete_item(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al eliminar elemento: {str(e)}")
 
+# Endpoints de copia y movimiento (en el servidor: el contenido no pasa por la API)
+def _submit_copies(manager: StorageBackend, jobs: JobManager, items: List[BulkTransferItem],
+                   idempotency_key: Optional[str]) -> JSONResponse:
+    params = {"items": [item.model_dump() for item in items]}
+    job, created = jobs.submit("copy_items", params, manager, idempotency_key)
+    return _job_response(job, created)
+
+def _move_items(manager: StorageBackend, items: List[BulkTransferItem]) -> List[Dict[str, Any]]:
+    results = []
+    for item in items:
+        try:
+            moved = manager.move_item(item.item_id, item.parent_id or manager.datacampus_root_id, item.name)
+            results.append({"item_id": item.item_id, "status": "moved", "new_id": moved["id"], "name": moved["name"]})
+        except Exception as e:
+            results.append({"item_id": item.item_id, "status": "failed", "error": str(e)})
+    return results
+
+@app.post("/items/copy")
+async def copy_items(
+    request: BulkTransferRequest,
+    idempotency_key: Optional[str] = Header(None),
+    manager: StorageBackend = Depends(get_manager),
+    jobs: JobManager = Depends(get_jobs)
+):
+    """Copiar varios elementos; devuelve un trabajo que sigue todas las copias"""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No hay elementos que copiar")
+    return _submit_copies(manager, jobs, request.items, idempotency_key)
+
+@app.post("/items/{item_id}/copy")
+async def copy_item(
+    item_id: str,
+    request: TransferRequest,
+    idempotency_key: Optional[str] = Header(None),
+    manager: StorageBackend = Depends(get_manager),
+    jobs: JobManager = Depends(get_jobs)
+):
+    """Copiar un archivo o carpeta; devuelve un trabajo (202) con el progreso de la copia"""
+    item = BulkTransferItem(item_id=item_id, parent_id=request.parent_id, name=request.name)
+    return _submit_copies(manager, jobs, [item], idempotency_key)
+
+@app.patch("/items/move")
+async def move_items(
+    request: BulkTransferRequest,
+    manager: StorageBackend = Depends(get_manager)
+):
+    """Mover varios elementos; el resultado se informa por elemento"""
+    results = await run_in_threadpool(_move_items, manager, request.items)
+    moved = sum(1 for result in results if result["status"] == "moved")
+    return {"items": results, "moved": moved, "failed": len(results) - moved}
+
+@app.patch("/items/{item_id}/move")
+async def move_item(
+    item_id: str,
+    request: TransferRequest,
+    manager: StorageBackend = Depends(get_manager)
+):
+    """Mover (y opcionalmente renombrar) un archivo o carpeta"""
+    try:
+        parent_id = request.parent_id or manager.datacampus_root_id
+        result = await run_in_threadpool(manager.move_item, item_id, parent_id, request.name)
+        return {"message": "Elemento movido exitosamente", "item_id": result["id"], "name": result["name"]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al mover elemento: {str(e)}")
+
+# Endpoints de trabajos en segundo plano
+def _job_response(job, created: bool) -> JSONResponse:
+    return JSONResponse(
+        job.to_dict(),
+        status_code=202 if created else 200,
+        headers={"Location": f"/jobs/{job.id}"}
+    )
+
+def _get_job_or_404(jobs: JobManager, job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
+
+@app.post("/jobs")
+async def submit_job(
+    request: JobRequest,
+    idempotency_key: Optional[str] = Header(None),
+    manager: StorageBackend = Depends(get_manager),
+    jobs: JobManager = Depends(get_jobs)
+):
+    """Encolar un trabajo (create_excel, combine_folder, export_csv, copy_items, index_content)"""
+    if request.kind == "upload_excel":
+        raise HTTPException(status_code=400, detail="Usa /files/upload con background=true")
+    try:
+        job, created = jobs.submit(request.kind, request.params, manager, idempotency_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _job_response(job, created)
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, jobs: JobManager = Depends(get_jobs)):
+    """Listar trabajos, del más reciente al más antiguo"""
+    return {"jobs": [job.to_dict() for job in jobs.list(status)]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, jobs: JobManager = Depends(get_jobs)):
+    """Estado y resultado de un trabajo"""
+    return _get_job_or_404(jobs, job_id).to_dict()
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str, jobs: JobManager = Depends(get_jobs)):
+    """Cancelar un trabajo en cola o en ejecución"""
+    _get_job_or_404(jobs, job_id)
+    return jobs.cancel(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, jobs: JobManager = Depends(get_jobs)):
+    """Progreso del trabajo en NDJSON hasta que termina"""
+    _get_job_or_404(jobs, job_id)
+    queue = jobs.subscribe(job_id)
+
+    async def events():
+        try:
+            snapshot = jobs.get(job_id).to_dict()
+            while True:
+                yield json.dumps(snapshot, ensure_ascii=False, default=str) + "\n"
+                if snapshot["status"] in FINISHED_STATES:
+                    break
+                snapshot = await queue.get()
+        finally:
+            jobs.unsubscribe(job_id, queue)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+# Receptor de notificaciones de cambios de Graph
+@app.post("/notifications")
+async def graph_notifications(request: Request, validationToken: Optional[str] = None):
+    """Webhook de Graph: validación de la URL y avisos de cambios"""
+    # Al crear la suscripción Graph envía un token que hay que devolver tal cual
+    if validationToken is not None:
+        return PlainTextResponse(validationToken)
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Notificación inválida")
+
+    # Graph exige respuesta en menos de 3 s: la consulta de cambios se hace en segundo plano
+    if subscriptions is not None:
+        subscriptions.handle_notifications(payload)
+    return Response(status_code=202)
+
 # Endpoints utilitarios
 @app.get("/")
 async def root():
@@ -328,10 +764,13 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "auth": "/auth/login, /auth/status",
-            "folders": "/folders, /folders (POST)",
+            "folders": "/folders, /folders (POST), /tree",
             "files": "/files/excel (POST), /files/{id}/content, /files/{id}/download",
             "items": "/items/{id}, /items/{id} (DELETE)",
             "search": "/search/{name}",
+            "jobs": "/jobs (POST), /jobs/{id}, /jobs/{id}/events, /jobs/{id} (DELETE)",
+            "monitoring": "/health, /metrics",
+            "notifications": "/notifications (webhook de Graph)",
             "docs": "/docs"
         }
     }
@@ -342,9 +781,14 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "authenticated": od_manager is not None and od_manager.token is not None
+        "authenticated": od_manager is not None and od_manager.authenticated
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Manejo de errores globales
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
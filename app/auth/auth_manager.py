@@ -1,26 +1,19 @@
 # auth_manager.py
 import os
-import json
 import webbrowser
-from msal import PublicClientApplication, SerializableTokenCache
 from typing import Optional
-from dotenv import load_dotenv
 
-load_dotenv()
-
-# Configuraciones desde .env
-TENANT_ID = os.getenv("TENANT_ID")
-CLIENT_ID = os.getenv("CLIENT_ID")
-AUTHORITY = f"https://login.microsoftonline.com/{TENANT_ID}"
-SCOPES = [
-    'https://graph.microsoft.com/Files.ReadWrite.All',
-    'https://graph.microsoft.com/Sites.ReadWrite.All',
-    'https://graph.microsoft.com/User.Read'
-]
+from app.cache.shared_state import SharedState, get_shared_state
+from app.config import AUTHORITY, CLIENT_ID, SCOPES
 
 class AuthManager:
-    def __init__(self, cache_path: str = 'token_cache.bin'):
+    def __init__(self, cache_path: str = 'token_cache.bin', state: Optional[SharedState] = None):
+        # msal (y requests/cryptography) solo se cargan cuando hace falta autenticar
+        from msal import PublicClientApplication, SerializableTokenCache
+
         self.cache_path = cache_path
+        # Con estado compartido la caché de MSAL vive en SQLite y la usan todos los workers
+        self.state = state if state is not None else get_shared_state()
         self.cache = SerializableTokenCache()
         self.token = None
 
@@ -33,24 +26,48 @@ class AuthManager:
         )
 
     def _load_cache(self):
-        if os.path.exists(self.cache_path):
+        if self.state is not None:
+            data = self.state.get("auth", "msal_token_cache")
+            if data:
+                self.cache.deserialize(data.decode("utf-8"))
+        elif os.path.exists(self.cache_path):
             with open(self.cache_path, 'rb') as f:
                 self.cache.deserialize(f.read())
 
     def _save_cache(self):
-        if self.cache.has_state_changed:
-            with open(self.cache_path, 'wb') as f:
-                f.write(self.cache.serialize().encode("utf-8"))
+        if not self.cache.has_state_changed:
+            return
+        data = self.cache.serialize().encode("utf-8")
+        if self.state is not None:
+            self.state.set("auth", "msal_token_cache", data)
+        else:
+            # Temporal + rename: otro proceso nunca lee el archivo a medio escribir
+            temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self.cache_path)
+        self.cache.has_state_changed = False
+
+    def get_token_silent(self) -> Optional[dict]:
+        """Token de la caché (renovado si hace falta) sin interacción; None si no hay sesión"""
+        # Otro worker pudo iniciar sesión o renovar el token desde que se cargó
+        self._load_cache()
+        accounts = self.app.get_accounts()
+        if not accounts:
+            return None
+        result = self.app.acquire_token_silent(SCOPES, account=accounts[0])
+        if result and "access_token" in result:
+            self.token = result
+            self._save_cache()
+            return result
+        return None
 
     def get_token(self, force_auth: bool = False) -> dict:
         if not force_auth:
-            accounts = self.app.get_accounts()
-            if accounts:
-                result = self.app.acquire_token_silent(SCOPES, account=accounts[0])
-                if result and "access_token" in result:
-                    print("Token obtenido silenciosamente.")
-                    self.token = result
-                    return result
+            result = self.get_token_silent()
+            if result:
+                print("Token obtenido silenciosamente.")
+                return result
 
         print(" Iniciando autenticación interactiva...")
         flow = self.app.initiate_device_flow(scopes=SCOPES)
@@ -0,0 +1,62 @@
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable, List, Set
+
+
+@dataclass
+class ChangeSet:
+    """Elementos que cambiaron en el drive.
+
+    ``folder_ids`` son las carpetas cuyo listado cambió (padres de los
+    elementos creados, modificados o borrados). ``reset`` indica que no se
+    sabe qué cambió y hay que vaciar todas las cachés.
+    """
+    item_ids: Set[str] = field(default_factory=set)
+    folder_ids: Set[str] = field(default_factory=set)
+    reset: bool = False
+
+    def __bool__(self) -> bool:
+        return self.reset or bool(self.item_ids or self.folder_ids)
+
+
+class InvalidationBus:
+    """Reparte los cambios detectados (notificaciones de Graph) entre las cachés.
+
+    Los suscriptores se guardan con referencias débiles, así que un
+    ``OneDriveManager`` descartado tras un nuevo login deja de recibir avisos.
+    """
+
+    def __init__(self):
+        self._subscribers: List[weakref.ReferenceType] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[ChangeSet], None]) -> None:
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else weakref.ref(callback)
+        with self._lock:
+            self._subscribers.append(ref)
+
+    def unsubscribe(self, callback: Callable[[ChangeSet], None]) -> None:
+        with self._lock:
+            self._subscribers = [ref for ref in self._subscribers if ref() is not None and ref() != callback]
+
+    def publish(self, changes: ChangeSet) -> int:
+        """Entregar los cambios; devuelve cuántos suscriptores los recibieron"""
+        with self._lock:
+            self._subscribers = [ref for ref in self._subscribers if ref() is not None]
+            callbacks = [ref() for ref in self._subscribers]
+
+        delivered = 0
+        for callback in callbacks:
+            if callback is None:
+                continue
+            try:
+                callback(changes)
+                delivered += 1
+            except Exception as e:
+                print(f" Error al invalidar caché: {e}")
+        return delivered
+
+
+# Bus del proceso: las cachés se suscriben y el receptor de notificaciones publica
+CHANGES = InvalidationBus()
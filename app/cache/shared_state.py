@@ -0,0 +1,246 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional
+
+from app import config
+from app.cache.ttl_cache import TTLCache
+from app.monitoring.metrics import record_cache_lookup
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    expires REAL NOT NULL,
+    stored REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_stored ON entries (namespace, stored);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+# Sin caducidad (token de MSAL, ids de datacampus)
+FOREVER = float("inf")
+
+
+class SharedState:
+    """Estado compartido entre los procesos de un nodo, en un SQLite en modo WAL.
+
+    Con varios workers de uvicorn cada proceso tiene su memoria, pero todos
+    abren el mismo archivo: las lecturas no se bloquean entre sí y las
+    escrituras se serializan en SQLite. Guarda entradas con caducidad por
+    espacio de nombres (cachés, token de MSAL, ids de datacampus) y
+    ``leases`` para que solo un proceso haga una tarea a la vez.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Una conexión por hilo; SQLite espera hasta 30 s si otro proceso está escribiendo
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transacción con el bloqueo de escritura tomado desde el principio"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- Entradas ----------------------------------------------------------
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires > ?",
+            (namespace, key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float = FOREVER) -> None:
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                         (namespace, key, value, len(value), now + ttl, now))
+
+    def setdefault(self, namespace: str, key: str, value: bytes) -> bytes:
+        """Guardar ``value`` si no hay nada y devolver lo que quede guardado"""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires > ?",
+                               (namespace, key, time.time())).fetchone()
+            if row is not None:
+                return row[0]
+            now = time.time()
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                         (namespace, key, value, len(value), FOREVER, now))
+            return value
+
+    def delete(self, namespace: str, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        with self.transaction() as conn:
+            return conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?",
+                                    [(namespace, key) for key in keys]).rowcount
+
+    def clear(self, namespace: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+    def count(self, namespace: str) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM entries WHERE namespace = ? AND expires > ?", (namespace, time.time())).fetchone()[0]
+
+    def size(self, namespace: str) -> int:
+        return self._connect().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def evict(self, namespace: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        """Borrar lo caducado y, si se superan los límites, las entradas más antiguas"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE namespace = ? AND expires <= ?", (namespace, time.time()))
+            if max_entries is not None:
+                conn.execute("""DELETE FROM entries WHERE namespace = ? AND key IN (
+                                    SELECT key FROM entries WHERE namespace = ?
+                                    ORDER BY stored DESC LIMIT -1 OFFSET ?)""",
+                             (namespace, namespace, max_entries))
+            if max_bytes is not None:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?",
+                                     (namespace,)).fetchone()[0]
+                rows = conn.execute("SELECT key, size FROM entries WHERE namespace = ? ORDER BY stored",
+                                    (namespace,)) if total > max_bytes else []
+                doomed = []
+                for key, size in rows:
+                    if total <= max_bytes:
+                        break
+                    doomed.append((namespace, key))
+                    total -= size
+                conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+
+    # --- Leases ------------------------------------------------------------
+
+    def acquire_lease(self, name: str, owner: str, seconds: float) -> bool:
+        """Tomar (o prolongar) la exclusiva de ``name`` durante ``seconds``"""
+        now = time.time()
+        with self.transaction() as conn:
+            row = conn.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (name, owner, now + seconds))
+            return True
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+
+class SharedCache:
+    """Caché con la misma interfaz que ``TTLCache`` pero guardada en ``SharedState``.
+
+    Todos los procesos ven las mismas entradas y las invalidaciones de uno
+    valen para los demás. ``dumps``/``loads`` convierten los valores a bytes
+    (JSON por defecto). Se expulsan las entradas más antiguas cuando se
+    superan ``max_entries`` o ``max_bytes``.
+    """
+
+    def __init__(self, name: str, ttl: float, state: SharedState, max_entries: int = 1024,
+                 max_bytes: Optional[int] = None, dumps: Optional[Callable[[Any], bytes]] = None,
+                 loads: Optional[Callable[[bytes], Any]] = None):
+        self.name = name
+        self.ttl = ttl
+        self.state = state
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.dumps = dumps or (lambda value: json.dumps(value).encode("utf-8"))
+        self.loads = loads or json.loads
+        self._writes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @property
+    def bytes(self) -> int:
+        return self.state.size(self.name)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        data = self.state.get(self.name, str(key))
+        record_cache_lookup(self.name, data is not None)
+        return self.loads(data) if data is not None else None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        data = self.dumps(value)
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        self.state.set(self.name, str(key), data, ttl or self.ttl)
+        # Recorrer la tabla en cada escritura sería caro: se poda cada 32, o siempre si hay límite de bytes
+        self._writes += 1
+        if self.max_bytes is not None or self._writes % 32 == 0:
+            self.state.evict(self.name, self.max_entries, self.max_bytes)
+
+    def pop(self, key: Hashable) -> None:
+        self.state.delete(self.name, [str(key)])
+
+    def invalidate(self, keys: Iterable[Hashable]) -> int:
+        return self.state.delete(self.name, [str(key) for key in keys])
+
+    def clear(self) -> None:
+        self.state.clear(self.name)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.state.get(self.name, str(key)) is not None
+
+    def __len__(self) -> int:
+        return self.state.count(self.name)
+
+
+_state: Optional[SharedState] = None
+_state_lock = threading.Lock()
+
+
+def get_shared_state() -> Optional[SharedState]:
+    """Estado compartido del nodo si ``SHARED_STATE_PATH`` está definido (None si no)"""
+    global _state
+    if not config.SHARED_STATE_PATH:
+        return None
+    with _state_lock:
+        if _state is None or _state.path != config.SHARED_STATE_PATH:
+            _state = SharedState(config.SHARED_STATE_PATH)
+        return _state
+
+
+def make_cache(name: str, ttl: float, max_entries: int = 1024, max_bytes: Optional[int] = None,
+               sizeof: Optional[Callable[[Any], int]] = None, dumps: Optional[Callable[[Any], bytes]] = None,
+               loads: Optional[Callable[[bytes], Any]] = None):
+    """``SharedCache`` si hay estado compartido; si no, ``TTLCache`` en memoria del proceso"""
+    state = get_shared_state()
+    if state is None:
+        return TTLCache(name, ttl, max_entries=max_entries, max_bytes=max_bytes, sizeof=sizeof)
+    return SharedCache(name, ttl, state, max_entries=max_entries, max_bytes=max_bytes, dumps=dumps, loads=loads)
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.monitoring.metrics import SINGLE_FLIGHT_CALLS
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Agrupa llamadas idénticas concurrentes entre hilos.
+
+    El primer hilo que pide una clave ejecuta la función; los que llegan
+    mientras tanto esperan y reciben el mismo resultado (o la misma
+    excepción). No es una caché: al terminar, la siguiente llamada vuelve a
+    ejecutar la función. El resultado se comparte, así que no debe modificarse.
+    """
+
+    def __init__(self, name: str = "storage"):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        SINGLE_FLIGHT_CALLS.inc(group=self.name, operation=str(key[0]) if isinstance(key, tuple) else str(key),
+                                role="leader" if leader else "shared")
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Versión asyncio para los handlers de la API.
+
+    La función se ejecuta en una tarea propia, así que si un cliente se
+    desconecta (su handler se cancela) los demás siguen esperando el mismo
+    resultado. Si se cancelan todos, la tarea termina igualmente y su
+    resultado se descarta.
+    """
+
+    def __init__(self, name: str = "api"):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _, key=key: self._tasks.pop(key, None))
+            # Evita el aviso de "excepción nunca recuperada" si todos se cancelan
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        SINGLE_FLIGHT_CALLS.inc(group=self.name, operation=str(key[0]) if isinstance(key, tuple) else str(key),
+                                role="leader" if leader else "shared")
+        return await asyncio.shield(task)
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+
+from app.monitoring.metrics import record_cache_lookup
+
+
+class TTLCache:
+    """Caché LRU en memoria con caducidad por entrada, segura entre hilos.
+
+    ``ttl`` en segundos; con ``ttl <= 0`` la caché queda desactivada. Si se
+    indica ``max_bytes`` (con ``sizeof`` para medir cada valor) se expulsan
+    las entradas menos usadas hasta respetar el límite. Los aciertos y fallos
+    se publican en ``odapi_cache_requests_total{cache=name}``.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup(self.name, entry is not None)
+        return entry[2] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), size, value)
+            self.bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate(self, keys: Iterable[Hashable]) -> int:
+        """Eliminar varias claves; devuelve cuántas estaban en caché"""
+        removed = 0
+        with self._lock:
+            for key in keys:
+                removed += self._remove(key)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key: Hashable) -> int:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return 0
+        self.bytes -= entry[1]
+        return 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
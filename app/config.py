@@ -0,0 +1,78 @@
+import os
+from dotenv import load_dotenv
+
+# Único punto donde se lee .env: el resto de módulos importa la configuración de aquí
+load_dotenv()
+
+# Aplicación registrada en Azure (flujo de dispositivo con MSAL)
+TENANT_ID = os.getenv("TENANT_ID")
+CLIENT_ID = os.getenv("CLIENT_ID")
+AUTHORITY = f"https://login.microsoftonline.com/{TENANT_ID}"
+SCOPES = [
+    'https://graph.microsoft.com/Files.ReadWrite.All',
+    'https://graph.microsoft.com/Sites.ReadWrite.All',
+    'https://graph.microsoft.com/User.Read'
+]
+
+# URL base de Microsoft Graph (se puede apuntar al emulador local de loadtest/)
+GRAPH_BASE_URL = os.getenv("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0").rstrip("/")
+
+# Backend de almacenamiento: "graph" (OneDrive) o "local" (directorio espejo)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "graph").lower()
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", "datacampus_local")
+
+# Perfilado de peticiones lentas (desactivado si el umbral es 0)
+PROFILE_SLOW_REQUESTS_MS = float(os.getenv("PROFILE_SLOW_REQUESTS_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Compresión de respuestas: tamaño mínimo en bytes (-1 la desactiva)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Trabajos en segundo plano: hilos dedicados y carpeta donde se guarda su estado
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOBS_DIR = os.getenv("JOBS_DIR", "jobs")
+
+# Cachés de metadatos y contenido delante de Graph. Con notificaciones de
+# cambios activas (GRAPH_NOTIFICATION_URL) se puede usar un TTL largo
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+CONTENT_CACHE_MAX_MB = float(os.getenv("CONTENT_CACHE_MAX_MB", "256"))
+
+# Notificaciones de cambios de Graph: URL pública de /notifications (vacía = desactivadas)
+GRAPH_NOTIFICATION_URL = os.getenv("GRAPH_NOTIFICATION_URL", "")
+GRAPH_NOTIFICATION_CLIENT_STATE = os.getenv("GRAPH_NOTIFICATION_CLIENT_STATE", "")
+GRAPH_SUBSCRIPTION_MINUTES = int(os.getenv("GRAPH_SUBSCRIPTION_MINUTES", "1440"))
+
+# Gobernador de tasa hacia Graph (peticiones/s; 0 = sin límite hasta que Graph responda 429)
+GRAPH_RATE_LIMIT = float(os.getenv("GRAPH_RATE_LIMIT", "0"))
+# Tope propio del carril bulk (trabajos, precarga, /tree) para dejar margen a la API; 0 = sin tope
+GRAPH_BULK_RATE_LIMIT = float(os.getenv("GRAPH_BULK_RATE_LIMIT", "10"))
+GRAPH_RATE_BURST = float(os.getenv("GRAPH_RATE_BURST", "10"))
+GRAPH_MIN_RATE = float(os.getenv("GRAPH_MIN_RATE", "1"))
+
+# Precarga en segundo plano tras cada listado (desactivada por defecto):
+# listados de subcarpetas y contenido de Excel pequeños, con presupuesto por listado
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+PREFETCH_MAX_REQUESTS = int(os.getenv("PREFETCH_MAX_REQUESTS", "8"))
+PREFETCH_MAX_MB = float(os.getenv("PREFETCH_MAX_MB", "16"))
+PREFETCH_MAX_FILE_MB = float(os.getenv("PREFETCH_MAX_FILE_MB", "2"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "1"))
+
+# Precarga de pandas/openpyxl/msal en segundo plano al arrancar el servidor, para
+# que /health responda enseguida y la primera petición real no pague las importaciones
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_DELAY_SECONDS = float(os.getenv("WARMUP_DELAY_SECONDS", "0.5"))
+
+# Estado compartido entre workers del mismo nodo (SQLite en modo WAL): token de
+# MSAL, ids de datacampus, cachés y suscripción de cambios. Vacío = cada proceso el suyo
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "")
+
+# Índice local del texto de las celdas (SQLite FTS5) para /search/content. Solo se
+# reindexan los libros cuyo cTag cambió; los más grandes que el límite se omiten
+CONTENT_INDEX_PATH = os.getenv("CONTENT_INDEX_PATH", "state/content_index.db")
+CONTENT_INDEX_MAX_FILE_MB = float(os.getenv("CONTENT_INDEX_MAX_FILE_MB", "50"))
+
+# Compactar los DataFrames leídos de Excel (categorías, tipos numéricos más pequeños,
+# cadenas de Arrow) para reducir la memoria de lecturas y de folder-combine
+COMPACT_DATAFRAMES = os.getenv("COMPACT_DATAFRAMES", "false").lower() in ("1", "true", "yes")
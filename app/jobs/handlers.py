@@ -0,0 +1,125 @@
+import os
+from typing import Any, Dict
+
+import pandas as pd
+
+from app.jobs.manager import JobContext, JobManager
+from app import config
+from app.search.content_index import get_content_index, refresh_index
+from app.storage.base import COMPARE_HASH, compact_frame
+
+# Columna que identifica el archivo de origen al combinar una carpeta
+SOURCE_COLUMN = "archivo_origen"
+
+
+def create_excel(ctx: JobContext) -> Dict[str, Any]:
+    """Crear un Excel a partir de ``data`` (columna -> valores)"""
+    params = ctx.params
+    folder_id = params.get("folder_id") or ctx.manager.datacampus_root_id
+    data = pd.DataFrame(params["data"]) if params.get("data") else None
+
+    ctx.progress(0.1, "Generando archivo")
+    result = ctx.manager.create_excel_file(folder_id, params["filename"], data)
+    return {"file_id": result["id"], "name": result["name"]}
+
+
+def combine_folder(ctx: JobContext) -> Dict[str, Any]:
+    """Unir todos los Excel de una carpeta en uno solo"""
+    params = ctx.params
+    folder_id = params.get("folder_id") or ctx.manager.datacampus_root_id
+    target_folder_id = params.get("target_folder_id") or folder_id
+    output_name = params.get("output_name") or "combinado.xlsx"
+    if not output_name.endswith(".xlsx"):
+        # El mismo nombre que le dará create_excel_file: una segunda pasada no debe combinar la salida anterior
+        output_name += ".xlsx"
+    compact = params.get("compact", config.COMPACT_DATAFRAMES)
+
+    # OneDrive no distingue mayúsculas en los nombres
+    files = [item for item in ctx.manager.list_folder_contents(folder_id)
+             if item.type == "file" and item.name.lower().endswith(".xlsx")
+             and item.name.lower() != output_name.lower()]
+    if not files:
+        raise Exception("La carpeta no contiene archivos Excel")
+
+    frames = []
+    for i, item in enumerate(files):
+        ctx.progress(i / (len(files) + 1), f"Leyendo {item.name}")
+        # Copia superficial: el DataFrame puede estar compartido con otras lecturas en curso
+        df = ctx.manager.read_excel_file(item.id, compact).copy(deep=False)
+        df.insert(0, SOURCE_COLUMN, item.name)
+        frames.append(df)
+
+    ctx.progress(len(files) / (len(files) + 1), "Escribiendo resultado")
+    combined = pd.concat(frames, ignore_index=True)
+    if compact:
+        # Las categorías de cada archivo no coinciden y concat las vuelve texto
+        del frames
+        combined = compact_frame(combined, "combine")
+    # Volver a combinar la misma carpeta suele dar el mismo resultado: no se sube dos veces
+    result = ctx.manager.create_excel_file(target_folder_id, output_name, combined, compare=COMPARE_HASH)
+    return {"file_id": result["id"], "name": result["name"], "rows": len(combined), "files": len(files),
+            "changed": not result.get("skipped")}
+
+
+def export_csv(ctx: JobContext) -> Dict[str, Any]:
+    """Convertir un Excel a CSV y guardarlo en OneDrive"""
+    params = ctx.params
+    info = ctx.manager.get_item_info(params["file_id"])
+    folder_id = params.get("folder_id") or info.get("parentReference", {}).get("id")
+    filename = params.get("filename") or info["name"].rsplit(".", 1)[0] + ".csv"
+
+    ctx.progress(0.1, "Leyendo archivo")
+    df = ctx.manager.read_excel_file(params["file_id"])
+
+    ctx.progress(0.6, "Generando CSV")
+    data = df.to_csv(index=False).encode("utf-8")
+
+    ctx.progress(0.8, "Subiendo CSV")
+    result = ctx.manager.write_if_changed(folder_id, filename, data, content_type="text/csv")
+    return {"file_id": result["id"], "name": result["name"], "rows": len(df), "changed": not result.get("skipped")}
+
+
+def upload_excel(ctx: JobContext) -> Dict[str, Any]:
+    """Subir un archivo (.xlsx, .csv o .parquet) que la API dejó en disco al recibirlo"""
+    params = ctx.params
+    folder_id = params.get("folder_id") or ctx.manager.datacampus_root_id
+    try:
+        ctx.progress(0.1, "Subiendo archivo")
+        with open(params["path"], "rb") as f:
+            result = ctx.manager.upload_file(folder_id, params["filename"], f,
+                                             params.get("passthrough", True), params.get("verify", True))
+        return {"file_id": result["id"], "name": result["name"]}
+    finally:
+        if os.path.exists(params["path"]):
+            os.remove(params["path"])
+
+
+def copy_items(ctx: JobContext) -> Dict[str, Any]:
+    """Copias en el servidor: se lanzan todas y se sigue cada URL de seguimiento"""
+    copies = [(copy["item_id"], copy.get("parent_id") or ctx.manager.datacampus_root_id, copy.get("name"))
+              for copy in ctx.params["items"]]
+
+    ctx.progress(0.0, "Iniciando copias")
+    operations = ctx.manager.copy_items(copies, progress=ctx.progress)
+    items = [{"item_id": op.item_id, "parent_id": op.parent_id, "name": op.name, "status": op.status,
+              "file_id": op.resource_id, "error": op.error} for op in operations]
+
+    copied = sum(1 for op in operations if op.status == "completed")
+    if not copied:
+        raise Exception(f"Error al copiar: {operations[0].error}")
+    return {"items": items, "copied": copied, "failed": len(operations) - copied}
+
+
+def index_content(ctx: JobContext) -> Dict[str, Any]:
+    """Reindexar el texto de los libros nuevos o modificados para /search/content"""
+    return refresh_index(get_content_index(), ctx.manager, ctx.params.get("folder_id"), progress=ctx.progress)
+
+
+def register_handlers(jobs: JobManager) -> JobManager:
+    jobs.register("create_excel", create_excel)
+    jobs.register("combine_folder", combine_folder)
+    jobs.register("export_csv", export_csv)
+    jobs.register("upload_excel", upload_excel)
+    jobs.register("copy_items", copy_items)
+    jobs.register("index_content", index_content)
+    return jobs
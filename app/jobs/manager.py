@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app import config
+from app.monitoring.metrics import JOBS_ACTIVE, JOBS_TOTAL
+from app.one_drive.governor import BULK, lane
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """El trabajo se canceló mientras se ejecutaba"""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+
+class JobContext:
+    """Lo que recibe cada handler: parámetros, backend y avisos de progreso"""
+
+    def __init__(self, jobs: "JobManager", job: Job, manager: Any):
+        self._jobs = jobs
+        self.job = job
+        self.params = job.params
+        self.manager = manager
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, fraction: float, message: str = "") -> None:
+        """Publicar el avance (0..1); también es punto de cancelación"""
+        self.check_cancelled()
+        self._jobs._update(self.job, progress=min(max(fraction, 0.0), 1.0), message=message)
+
+
+JobHandler = Callable[[JobContext], Any]
+
+
+class JobManager:
+    """Cola de trabajos largos con un pool de hilos propio y acotado.
+
+    Los trabajos no ocupan la conexión HTTP ni los hilos del threadpool de
+    FastAPI, de modo que no compiten con las peticiones interactivas. Se
+    deduplican por clave de idempotencia, se pueden cancelar y su estado se
+    guarda en ``<jobs_dir>/jobs.json`` para sobrevivir a reinicios.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, jobs_dir: Optional[str] = None, max_finished: int = 500):
+        self.max_workers = max_workers or config.JOB_WORKERS
+        self.jobs_dir = jobs_dir or config.JOBS_DIR
+        self.max_finished = max_finished
+        self.handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._keys: Dict[str, str] = {}
+        self._futures: Dict[str, Future] = {}
+        self._contexts: Dict[str, JobContext] = {}
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-worker")
+        self._load()
+
+    # --- Registro y envío --------------------------------------------------
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    def submit(self, kind: str, params: Dict[str, Any], manager: Any = None,
+               idempotency_key: Optional[str] = None) -> Tuple[Job, bool]:
+        """Encolar un trabajo; devuelve ``(job, creado)``.
+
+        Con la misma clave de idempotencia se devuelve el trabajo existente,
+        salvo que haya fallado o se haya cancelado (entonces se reintenta).
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+
+        with self._lock:
+            if idempotency_key and idempotency_key in self._keys:
+                existing = self._jobs.get(self._keys[idempotency_key])
+                if existing is not None and existing.status not in (FAILED, CANCELLED):
+                    return existing, False
+
+            job = Job(id=uuid.uuid4().hex, kind=kind, params=params, idempotency_key=idempotency_key)
+            self._jobs[job.id] = job
+            if idempotency_key:
+                self._keys[idempotency_key] = job.id
+            context = JobContext(self, job, manager)
+            self._contexts[job.id] = context
+            JOBS_ACTIVE.inc(state=QUEUED)
+            self._futures[job.id] = self._executor.submit(self._run, context)
+            self._save()
+
+        print(f" Trabajo {kind} encolado ({job.id})")
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, status: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if status is None or job.status == status]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancelar un trabajo en cola (no llega a ejecutarse) o en ejecución"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            context = self._contexts.get(job_id)
+            if context is not None:
+                context.cancel_event.set()
+            future = self._futures.get(job_id)
+            if job.status == QUEUED and future is not None and future.cancel():
+                JOBS_ACTIVE.dec(state=QUEUED)
+                self._finish(job, CANCELLED, message="Cancelado antes de empezar")
+        return job
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            for context in self._contexts.values():
+                context.cancel_event.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # --- Eventos -----------------------------------------------------------
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Cola asyncio que recibe una instantánea del trabajo en cada cambio"""
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = [s for s in self._subscribers.get(job_id, []) if s[1] is not queue]
+            if subscribers:
+                self._subscribers[job_id] = subscribers
+            else:
+                self._subscribers.pop(job_id, None)
+
+    def _publish(self, job: Job) -> None:
+        snapshot = job.to_dict()
+        for loop, queue in self._subscribers.get(job.id, []):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+            except RuntimeError:
+                pass  # el event loop del suscriptor ya se cerró
+
+    # --- Ejecución ---------------------------------------------------------
+
+    def _run(self, context: JobContext) -> None:
+        job = context.job
+        JOBS_ACTIVE.dec(state=QUEUED)
+        if context.cancelled:
+            self._finish(job, CANCELLED, message="Cancelado antes de empezar")
+            return
+
+        JOBS_ACTIVE.inc(state=RUNNING)
+        self._update(job, status=RUNNING, started_at=time.time(), persist=True)
+        try:
+            # Las llamadas a Graph de los trabajos ceden el paso a las interactivas
+            with lane(BULK):
+                result = self.handlers[job.kind](context)
+        except JobCancelled:
+            self._finish(job, CANCELLED, message="Cancelado")
+        except Exception as e:
+            print(f" Error en trabajo {job.kind} ({job.id}): {e}")
+            self._finish(job, FAILED, error=str(e))
+        else:
+            self._finish(job, SUCCEEDED, result=result, progress=1.0)
+        finally:
+            JOBS_ACTIVE.dec(state=RUNNING)
+
+    def _update(self, job: Job, persist: bool = False, **changes) -> None:
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            # El progreso solo se guarda en memoria; los cambios de estado se persisten
+            if persist:
+                self._save()
+            self._publish(job)
+
+    def _finish(self, job: Job, status: str, **changes) -> None:
+        with self._lock:
+            self._contexts.pop(job.id, None)
+            self._futures.pop(job.id, None)
+            self._update(job, status=status, finished_at=time.time(), **changes)
+            self._prune()
+            self._save()
+        JOBS_TOTAL.inc(kind=job.kind, status=status)
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished]
+        if len(finished) <= self.max_finished:
+            return
+        finished.sort(key=lambda job: job.finished_at or 0)
+        for job in finished[:len(finished) - self.max_finished]:
+            del self._jobs[job.id]
+            if job.idempotency_key and self._keys.get(job.idempotency_key) == job.id:
+                del self._keys[job.idempotency_key]
+
+    # --- Persistencia ------------------------------------------------------
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.jobs_dir, "jobs.json")
+
+    def _save(self) -> None:
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump([job.to_dict() for job in self._jobs.values()], f, default=str)
+        os.replace(temp_path, self.state_path)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f" No se pudo leer el estado de los trabajos: {e}")
+            return
+
+        for record in records:
+            job = Job(**record)
+            if not job.finished:
+                # El proceso se detuvo con el trabajo a medias: no se reanuda a ciegas
+                job.status = FAILED
+                job.error = "Interrumpido por un reinicio del servidor"
+                job.finished_at = time.time()
+            self._jobs[job.id] = job
+            if job.idempotency_key:
+                self._keys[job.idempotency_key] = job.id
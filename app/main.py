@@ -1,20 +1,27 @@
 from app.one_drive.OD_manager import OneDriveManager, DriveItem
-import pandas as pd
-from typing import List, Optional
+from typing import Dict, List, Optional
+from app import config
 from app.auth.auth_manager import AuthManager
+from app.cache.ttl_cache import TTLCache
 from app.one_drive.OD_manager import OneDriveManager
+from app.storage.base import update_listing
+from app.storage.factory import create_storage_backend, requires_authentication
 
 class OneDriveNavigator:
 
     def __init__(self):
-        print(" Autenticando...")
-        auth = AuthManager()
-        self.token = auth.get_token()
+        self.token = None
+        if requires_authentication():
+            print(" Autenticando...")
+            auth = AuthManager()
+            self.token = auth.get_token()
         self.current_path = ["datacampus"]
         self.navigation_history = []
-        self.manager = OneDriveManager(self.token)
+        self.manager = create_storage_backend(self.token)
         self.history = []
         self.current_folder_id = None
+        # Listados ya mostrados por id de carpeta: volver atrás o repintar no llama a Graph
+        self.listing_cache = TTLCache("navigator_listing", config.CACHE_TTL_SECONDS, max_entries=256)
         self.initialize()
 
     def initialize(self):
@@ -31,7 +38,12 @@ class OneDriveNavigator:
     def list_and_display_contents(self) -> List[DriveItem]:
         """Listar y mostrar contenido de la carpeta actual"""
         try:
-            items = self.manager.list_folder_contents(self.current_folder_id)
+            items = self.listing_cache.get(self.current_folder_id)
+            if items is None:
+                items = self.manager.list_folder_contents(self.current_folder_id)
+                self.listing_cache.set(self.current_folder_id, items)
+            # Lo siguiente suele ser entrar en una subcarpeta o abrir un Excel de esta
+            self.manager.prefetch_children(self.current_folder_id, items)
             
             if not items:
                 print(" Carpeta vacía")
@@ -90,6 +102,18 @@ class OneDriveNavigator:
             print(f"Error en navegación: {e}")
             return False
 
+    def _update_current_listing(self, added: Optional[Dict] = None, removed_id: Optional[str] = None):
+        """Aplicar una modificación propia al listado en caché de la carpeta actual"""
+        cached = self.listing_cache.get(self.current_folder_id)
+        if cached is not None:
+            added_item = DriveItem.from_json(added) if added else None
+            self.listing_cache.set(self.current_folder_id, update_listing(cached, added_item, removed_id))
+
+    def refresh_current_folder(self):
+        """Descartar el listado en caché para volver a pedirlo"""
+        self.listing_cache.pop(self.current_folder_id)
+        self.manager.forget_listing(self.current_folder_id)
+
     def go_back(self) -> bool:
         if self.navigation_history:
             self.current_folder_id, self.current_path = self.navigation_history.pop()
@@ -123,9 +147,12 @@ class OneDriveNavigator:
                         values = [val.strip() for val in values_str.split(',') if val.strip()]
                         data_dict[col] = values
                     
+                    import pandas as pd
+
                     data = pd.DataFrame(data_dict)
 
             result = self.manager.create_excel_file(self.current_folder_id, filename, data)
+            self._update_current_listing(added=result)
             print(f" Archivo creado con ID: {result['id'][:8]}...")
             
         except Exception as e:
@@ -209,6 +236,8 @@ class OneDriveNavigator:
                             except ValueError:
                                 new_row[col] = value
                         
+                        import pandas as pd
+
                         df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
                         
                     elif edit_option == "2":
@@ -268,7 +297,8 @@ class OneDriveNavigator:
                         return
                     
                     # Actualizar archivo
-                    self.manager.update_excel_file(selected_file.id, df)
+                    result = self.manager.update_excel_file(selected_file.id, df)
+                    self._update_current_listing(added=result)
                     print(f"Archivo '{selected_file.name}' actualizado exitosamente")
                     
                 else:
@@ -301,6 +331,8 @@ class OneDriveNavigator:
                     confirm = input(f" ¿Estás seguro de eliminar '{selected_item.name}'? (s/N): ").strip().lower()
                     if confirm == 's':
                         self.manager.delete_item(selected_item.id)
+                        self._update_current_listing(removed_id=selected_item.id)
+                        self.listing_cache.pop(selected_item.id)
                         print(f" '{selected_item.name}' eliminado exitosamente")
                     else:
                         print(" Eliminación cancelada")
@@ -322,6 +354,7 @@ class OneDriveNavigator:
                 return
             
             result = self.manager.create_folder(self.current_folder_id, folder_name)
+            self._update_current_listing(added=result)
             print(f" Carpeta '{folder_name}' creada exitosamente")
             
         except Exception as e:
@@ -384,6 +417,7 @@ class OneDriveNavigator:
                 
                 elif option == "8":
                     print(" Actualizando vista...")
+                    self.refresh_current_folder()
                     continue
                 
                 elif option == "9":
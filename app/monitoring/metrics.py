@@ -0,0 +1,236 @@
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Buckets por defecto de los clientes de Prometheus (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # clave -> [conteos por bucket..., suma, conteo total]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> float:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0.0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            for bound, bucket_count in zip(self.buckets, state):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(bucket_count)}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas con salida en formato de texto de Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        _refresh_cache_ratios()
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# API HTTP
+HTTP_REQUESTS = REGISTRY.counter(
+    "odapi_http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "odapi_http_request_duration_seconds", "Latencia de peticiones HTTP por ruta", ("method", "route"))
+HTTP_IN_PROGRESS = REGISTRY.gauge(
+    "odapi_http_requests_in_progress", "Peticiones HTTP activas (conexiones en curso)")
+HTTP_RESPONSE_BYTES = REGISTRY.counter(
+    "odapi_http_response_bytes_total", "Bytes enviados a los clientes por ruta", ("route",))
+
+# Microsoft Graph
+GRAPH_REQUESTS = REGISTRY.counter(
+    "odapi_graph_requests_total", "Llamadas a Microsoft Graph", ("operation", "method", "status"))
+GRAPH_LATENCY = REGISTRY.histogram(
+    "odapi_graph_request_duration_seconds", "Latencia de llamadas a Graph por operación", ("operation",))
+GRAPH_BYTES = REGISTRY.counter(
+    "odapi_graph_bytes_total", "Bytes intercambiados con Graph", ("operation", "direction"))
+GRAPH_THROTTLED = REGISTRY.counter(
+    "odapi_graph_throttled_total", "Respuestas 429/503 de Graph", ("operation", "status"))
+GRAPH_UNAUTHORIZED = REGISTRY.counter(
+    "odapi_graph_unauthorized_total", "Respuestas 401 de Graph", ("operation",))
+GRAPH_RETRIES = REGISTRY.counter(
+    "odapi_graph_retries_total", "Reintentos de llamadas a Graph", ("operation", "reason"))
+UPLOADS_SKIPPED = REGISTRY.counter(
+    "odapi_uploads_skipped_total", "Subidas evitadas porque el contenido no cambió", ("mode",))
+GOVERNOR_QUEUE_DEPTH = REGISTRY.gauge(
+    "odapi_graph_governor_queue_depth", "Llamadas a Graph esperando turno por carril", ("lane",))
+GOVERNOR_RATE = REGISTRY.gauge(
+    "odapi_graph_governor_rate", "Tasa actual permitida hacia Graph (peticiones/s)")
+GOVERNOR_WAIT = REGISTRY.histogram(
+    "odapi_graph_governor_wait_seconds", "Espera en el gobernador antes de llamar a Graph", ("lane",))
+
+# Cachés
+CACHE_REQUESTS = REGISTRY.counter(
+    "odapi_cache_requests_total", "Consultas a cachés", ("cache", "result"))
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "odapi_cache_hit_ratio", "Proporción de aciertos por caché", ("cache",))
+SINGLE_FLIGHT_CALLS = REGISTRY.counter(
+    "odapi_single_flight_calls_total", "Llamadas agrupadas: leader ejecuta, shared reutiliza una en curso",
+    ("group", "operation", "role"))
+PREFETCH_TOTAL = REGISTRY.counter(
+    "odapi_prefetch_total", "Precargas por tipo y resultado (fetched, cached, skipped, yielded)",
+    ("kind", "result"))
+
+DATAFRAME_BYTES_SAVED = REGISTRY.counter(
+    "odapi_dataframe_compact_bytes_saved_total", "Memoria ahorrada al compactar DataFrames", ("stage",))
+
+# Trabajos en segundo plano
+JOBS_TOTAL = REGISTRY.counter(
+    "odapi_jobs_total", "Trabajos finalizados por tipo y estado", ("kind", "status"))
+JOBS_ACTIVE = REGISTRY.gauge(
+    "odapi_jobs_active", "Trabajos en cola o en ejecución", ("state",))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Registrar un acierto o fallo de caché"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _refresh_cache_ratios() -> None:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.samples().items():
+        hits_total = totals.setdefault(cache, [0.0, 0.0])
+        if result == "hit":
+            hits_total[0] += value
+        hits_total[1] += value
+    for cache, (hits, total) in totals.items():
+        CACHE_HIT_RATIO.set(hits / total if total else 0.0, cache=cache)
+
+
+def payload_size(body: Optional[object]) -> int:
+    """Tamaño en bytes de un cuerpo de petición de requests"""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if hasattr(body, "getbuffer"):
+        return body.getbuffer().nbytes
+    return 0
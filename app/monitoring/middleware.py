@@ -0,0 +1,46 @@
+import time
+
+from app.monitoring.metrics import HTTP_IN_PROGRESS, HTTP_LATENCY, HTTP_REQUESTS, HTTP_RESPONSE_BYTES
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide latencia, estado y bytes por ruta.
+
+    Mide hasta que se envía el último fragmento del cuerpo, así que las
+    respuestas en streaming (``/tree``, descargas CSV) cuentan completas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                status["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            route = _route_template(scope)
+            method = scope.get("method", "")
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status["code"]))
+            HTTP_RESPONSE_BYTES.inc(status["bytes"], route=route)
+
+
+def _route_template(scope) -> str:
+    """Plantilla de la ruta (``/files/{file_id}/content``) para no explotar la cardinalidad"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
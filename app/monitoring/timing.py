@@ -0,0 +1,161 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Set
+
+from app import config
+
+
+class RequestTimings:
+    """Duraciones por fase de una petición (graph_fetch, parse, transform, serialize...)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.threads: Set[int] = {threading.get_ident()}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing_header(self) -> str:
+        """Valor de la cabecera ``Server-Timing`` con duraciones en milisegundos"""
+        with self._lock:
+            parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Medir una fase de la petición en curso.
+
+    Fuera de una petición (CLI, tests) no registra nada. Si la fase se ejecuta
+    en un hilo del threadpool, ese hilo pasa a formar parte del perfilado.
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    timings.threads.add(threading.get_ident())
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+class StackSampler:
+    """Perfilador por muestreo: toma la pila de los hilos de una petición cada intervalo.
+
+    Guarda pilas colapsadas (``frame;frame;frame N``), el formato que leen
+    flamegraph.pl y speedscope.
+    """
+
+    def __init__(self, timings: RequestTimings, interval: float):
+        self.timings = timings
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.timings.threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.samples[_collapse(frame)] += 1
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _collapse(frame) -> str:
+    stack: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class ServerTimingMiddleware:
+    """Middleware ASGI que publica ``Server-Timing`` y perfila peticiones lentas.
+
+    El perfilado es opcional: se activa con ``PROFILE_SLOW_REQUESTS_MS`` y solo
+    muestrea una fracción ``PROFILE_SAMPLE_RATE`` de las peticiones.
+    """
+
+    def __init__(self, app, slow_threshold_ms: Optional[float] = None, sample_rate: Optional[float] = None,
+                 interval_ms: Optional[float] = None, profile_dir: Optional[str] = None):
+        self.app = app
+        self.slow_threshold_ms = config.PROFILE_SLOW_REQUESTS_MS if slow_threshold_ms is None else slow_threshold_ms
+        self.sample_rate = config.PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.interval = (config.PROFILE_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+        self.profile_dir = profile_dir or config.PROFILE_DIR
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+
+        sampler = None
+        if self.slow_threshold_ms > 0 and random.random() < self.sample_rate:
+            sampler = StackSampler(timings, self.interval)
+            sampler.start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing_header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_timings.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                elapsed_ms = timings.elapsed() * 1000
+                if elapsed_ms >= self.slow_threshold_ms:
+                    self._dump_profile(scope, sampler, elapsed_ms)
+
+    def _dump_profile(self, scope, sampler: StackSampler, elapsed_ms: float) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9_.-]+", "_", scope.get("path", "")).strip("_") or "root"
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{scope.get('method', '')}_{route}_{elapsed_ms:.0f}ms.folded"
+        path = os.path.join(self.profile_dir, filename)
+        sampler.dump(path)
+        print(f" Petición lenta ({elapsed_ms:.0f} ms), perfil guardado en {path}")
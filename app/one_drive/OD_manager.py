@@ -1,48 +1,84 @@
-import requests
-import pandas as pd
-import msal
-import os
-import dotenv
-import webbrowser
-import io
 import json
-from msal import PublicClientApplication, SerializableTokenCache
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+import time
+from dataclasses import asdict
+from typing import IO, TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+from app import config
 from app.auth.auth_manager import AuthManager
+from app.cache.invalidation import CHANGES, ChangeSet
+from app.cache.shared_state import get_shared_state, make_cache
+from app.one_drive.governor import RateGovernor
+from app.one_drive.prefetcher import Prefetcher
+from app.monitoring.metrics import (
+    GRAPH_BYTES, GRAPH_LATENCY, GRAPH_REQUESTS, GRAPH_RETRIES,
+    GRAPH_THROTTLED, GRAPH_UNAUTHORIZED, payload_size
+)
+from app.storage.base import CopyOperation, DriveItem, StorageBackend, XLSX_CONTENT_TYPE, update_listing
 
-# Inicializar y autenticar
-dotenv.load_dotenv()
-
-TENANT_ID = os.getenv("TENANT_ID")
-CLIENT_ID = os.getenv("CLIENT_ID")
-AUTHORITY = f"https://login.microsoftonline.com/{TENANT_ID}"
-SCOPES = [
-    'https://graph.microsoft.com/Files.ReadWrite.All',
-    'https://graph.microsoft.com/Sites.ReadWrite.All',
-    'https://graph.microsoft.com/User.Read'
-]
-
-@dataclass
-class DriveItem:
-    id: str
-    name: str
-    type: str 
-    size: int = 0
-    created_datetime: str = ""
-    modified_datetime: str = ""
-
-class OneDriveManager:
+if TYPE_CHECKING:
+    import requests
+
+# Reintentos ante respuestas 429/503 de Graph
+MAX_THROTTLE_RETRIES = 5
+# Por encima de este tamaño se sube con una sesión de carga (PUT simple hasta 4 MiB)
+SIMPLE_UPLOAD_MAX_BYTES = 4 * 1024 * 1024
+# Fragmentos de la sesión de carga: múltiplo de 320 KiB, como exige Graph
+UPLOAD_CHUNK_BYTES = 32 * 320 * 1024
+
+
+def _dump_listing(items: List[DriveItem]) -> bytes:
+    return json.dumps([asdict(item) for item in items]).encode("utf-8")
+
+
+def _load_listing(data: bytes) -> List[DriveItem]:
+    return [DriveItem(**item) for item in json.loads(data)]
+
+
+def _dump_content(entry: Tuple[str, bytes]) -> bytes:
+    version, data = entry
+    return version.encode("utf-8") + b"\n" + data
+
+
+def _load_content(data: bytes) -> Tuple[str, bytes]:
+    version, content = data.split(b"\n", 1)
+    return version.decode("utf-8"), content
+
+class GraphRequestError(Exception):
+    """Respuesta de error de Graph; ``status_code`` distingue lo que no tiene arreglo de lo transitorio"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OneDriveManager(StorageBackend):
+    """Backend de almacenamiento sobre Microsoft Graph (carpeta compartida datacampus)"""
 
     def __init__(self, token=None):
         """Inicializar OneDriveManager con o sin token"""
+        super().__init__()
         self.token = token
         self.authenticated = token is not None
+        self.graph_url = config.GRAPH_BASE_URL
         
         # Inicializar atributos que se usan en initialize_datacampus
         self.datacampus_drive_id = None
         self.datacampus_root_id = None
+
+        # Tasa compartida entre hilos, con prioridad para las peticiones interactivas
+        self.governor = RateGovernor()
+
+        # Listados, metadatos y contenido por id; las notificaciones de cambios los invalidan.
+        # El contenido se guarda junto al cTag con que se descargó y solo vale mientras info() dé ese cTag.
+        # Con SHARED_STATE_PATH viven en SQLite y las comparten todos los workers del nodo
+        self.listing_cache = make_cache("graph_listing", config.CACHE_TTL_SECONDS, max_entries=1024,
+                                        dumps=_dump_listing, loads=_load_listing)
+        self.item_cache = make_cache("graph_item", config.CACHE_TTL_SECONDS, max_entries=4096)
+        self.content_cache = make_cache("graph_content", config.CACHE_TTL_SECONDS, max_entries=256,
+                                        max_bytes=int(config.CONTENT_CACHE_MAX_MB * 1024 * 1024),
+                                        sizeof=lambda entry: len(entry[1]),
+                                        dumps=_dump_content, loads=_load_content)
+        CHANGES.subscribe(self.apply_changes)
+        self.prefetcher = Prefetcher(self) if config.PREFETCH_ENABLED else None
         
         if token:
             self._initialize_with_token(token)
@@ -61,7 +97,7 @@ class OneDriveManager:
             self.authenticated = True
         return True
 
-    def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
+    def _make_request(self, method: str, url: str, operation: str = "other", **kwargs) -> "requests.Response":
         """Realizar petición HTTP con manejo de errores"""
         if not self.token:
             raise Exception("No hay token de autenticación. Llama a authenticate() primero.")
@@ -69,24 +105,75 @@ class OneDriveManager:
         headers = kwargs.get('headers', {})
         headers['Authorization'] = f"Bearer {self.token['access_token']}"
         kwargs['headers'] = headers
-        
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            self.governor.acquire()
+            response = self._send(method, url, operation, **kwargs)
+
+            if response.status_code == 401:
+                print(" Token expirado, reautenticando...")
+                GRAPH_UNAUTHORIZED.inc(operation=operation)
+                GRAPH_RETRIES.inc(operation=operation, reason="unauthorized")
+                self.authenticate()
+                headers['Authorization'] = f"Bearer {self.token['access_token']}"
+                response = self._send(method, url, operation, **kwargs)
+
+            if response.status_code not in (429, 503):
+                self.governor.succeeded()
+                return response
+
+            # Graph nos está limitando: bajar la tasa y pausar a todos los hilos, no solo a este
+            GRAPH_THROTTLED.inc(operation=operation, status=str(response.status_code))
+            delay = self._retry_after_seconds(response, attempt)
+            self.governor.throttled(delay)
+            if attempt == MAX_THROTTLE_RETRIES:
+                return response
+            GRAPH_RETRIES.inc(operation=operation, reason="throttled")
+            print(f" Graph limitó la petición ({response.status_code}), reintentando en {delay:.1f}s...")
+
+        return response
+
+    def _send(self, method: str, url: str, operation: str, **kwargs) -> "requests.Response":
+        """Enviar una petición a Graph registrando métricas"""
+        import requests  # diferido: no pesa en el arranque de la API
+
+        started = time.perf_counter()
         response = requests.request(method, url, **kwargs)
-        
-        if response.status_code == 401:
-            print(" Token expirado, reautenticando...")
-            self.authenticate()
-            headers['Authorization'] = f"Bearer {self.token['access_token']}"
-            response = requests.request(method, url, **kwargs)
-            
+        GRAPH_LATENCY.observe(time.perf_counter() - started, operation=operation)
+        GRAPH_REQUESTS.inc(operation=operation, method=method, status=str(response.status_code))
+
+        sent = payload_size(getattr(getattr(response, 'request', None), 'body', None))
+        if sent:
+            GRAPH_BYTES.inc(sent, operation=operation, direction="sent")
+        # En descargas por fragmentos los bytes se cuentan al iterar
+        received = 0 if kwargs.get('stream') else len(response.content or b"")
+        if received:
+            GRAPH_BYTES.inc(received, operation=operation, direction="received")
         return response
 
+    @staticmethod
+    def _retry_after_seconds(response: "requests.Response", attempt: int) -> float:
+        """Segundos a esperar según Retry-After o backoff exponencial"""
+        retry_after = response.headers.get('Retry-After')
+        try:
+            return max(float(retry_after), 0.0)
+        except (TypeError, ValueError):
+            return min(2 ** attempt, 30)
+
     def initialize_datacampus(self) -> Tuple[str, str]:
         """Inicializar y encontrar la carpeta datacampus"""
         if self.datacampus_drive_id and self.datacampus_root_id:
             return self.datacampus_drive_id, self.datacampus_root_id
+
+        # Otro worker del nodo ya la encontró
+        state = get_shared_state()
+        shared_ids = state.get("datacampus", "ids") if state else None
+        if shared_ids:
+            self.datacampus_drive_id, self.datacampus_root_id = json.loads(shared_ids)
+            return self.datacampus_drive_id, self.datacampus_root_id
             
-        url = 'https://graph.microsoft.com/v1.0/me/drive/sharedWithMe'
-        response = self._make_request('GET', url)
+        url = f"{self.graph_url}/me/drive/sharedWithMe"
+        response = self._make_request('GET', url, operation="shared_with_me")
 
         if response.status_code != 200:
             raise Exception(f"Error al obtener archivos compartidos: {response.status_code} - {response.text}")
@@ -101,148 +188,388 @@ class OneDriveManager:
                 
                 self.datacampus_drive_id = drive_id
                 self.datacampus_root_id = root_id
+                if state:
+                    state.set("datacampus", "ids", json.dumps([drive_id, root_id]).encode("utf-8"))
                 
                 print(f" Datacampus encontrado - Drive ID: {drive_id[:8]}...")
                 return drive_id, root_id
 
         raise Exception(" No se encontró la carpeta 'datacampus' en elementos compartidos.")
 
-    def list_folder_contents(self, folder_id: Optional[str] = None) -> List[DriveItem]:
-        """Listar contenido de una carpeta"""
-        if not folder_id:
-            folder_id = self.datacampus_root_id
-            
-        url = f"https://graph.microsoft.com/v1.0/drives/{self.datacampus_drive_id}/items/{folder_id}/children"
-        response = self._make_request('GET', url)
+    def list(self, folder_id: str) -> List[DriveItem]:
+        """Listar los hijos de una carpeta siguiendo la paginación de Graph"""
+        cached = self.listing_cache.get(folder_id)
+        if cached is not None:
+            return list(cached)
 
-        if response.status_code != 200:
-            raise Exception(f"Error al listar contenido: {response.status_code} - {response.text}")
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{folder_id}/children"
 
         items = []
-        for item_data in response.json().get('value', []):
-            item_type = 'folder' if 'folder' in item_data else 'file'
-            
-            items.append(DriveItem(
-                id=item_data['id'],
-                name=item_data['name'],
-                type=item_type,
-                size=item_data.get('size', 0),
-                created_datetime=item_data.get('createdDateTime', ''),
-                modified_datetime=item_data.get('lastModifiedDateTime', '')
-            ))
-        
-        return items
+        # Graph pagina los hijos; seguir @odata.nextLink hasta el final
+        while url:
+            response = self._make_request('GET', url, operation="list_children")
+
+            if response.status_code != 200:
+                raise Exception(f"Error al listar contenido: {response.status_code} - {response.text}")
+
+            payload = response.json()
+            for item_data in payload.get('value', []):
+                # Los hijos traen los mismos metadatos que /items/{id}
+                self.item_cache.set(item_data['id'], item_data)
+                items.append(DriveItem.from_json(item_data))
+            url = payload.get('@odata.nextLink')
+
+        self.listing_cache.set(folder_id, items)
+        return list(items)
+
+    def _content_version(self, item_id: str) -> str:
+        """Versión del contenido según los metadatos (los mismos que usan los ETag de la API)"""
+        info = self.info(item_id)
+        return info.get('cTag') or info.get('eTag', '')
+
+    def cached_content(self, item_id: str) -> Optional[bytes]:
+        """Contenido en caché solo si es de la versión que dicen los metadatos actuales"""
+        cached = self.content_cache.get(item_id)
+        if cached is None:
+            return None
+        if cached[0] != self._content_version(item_id):
+            # Otro cliente lo editó y list()/info() ya ven el cTag nuevo
+            self.content_cache.pop(item_id)
+            return None
+        return cached[1]
+
+    def read(self, item_id: str) -> bytes:
+        """Descargar el contenido de un archivo"""
+        cached = self.cached_content(item_id)
+        if cached is not None:
+            return cached
+
+        # La versión se toma antes de descargar: si cambia entretanto, la siguiente lectura vuelve a bajarlo
+        version = self._content_version(item_id)
+
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{item_id}/content"
+        response = self._make_request('GET', url, operation="download_content")
 
-    def find_item_by_name(self, name: str, folder_id: Optional[str] = None) -> Optional[DriveItem]:
-        """Buscar un elemento por nombre en una carpeta"""
-        items = self.list_folder_contents(folder_id)
-        
-        for item in items:
-            if item.name.lower() == name.lower():
-                return item
-        
-        return None
+        if response.status_code != 200:
+            raise Exception(f"Error al descargar archivo: {response.status_code} - {response.text}")
 
-    def create_excel_file(self, folder_id: str, filename: str, data: Optional[pd.DataFrame] = None) -> Dict:
-        """Crear un archivo Excel en una carpeta"""
-        if not filename.endswith('.xlsx'):
-            filename += '.xlsx'
-        
-        # Excel por defecto
-        if data is None:
-            data = pd.DataFrame({
-                'Columna1': ['Valor1', 'Valor2', 'Valor3'],
-                'Columna2': [10, 20, 30],
-                'Columna3': ['A', 'B', 'C']
-            })
-        
-        excel_buffer = io.BytesIO()
-        data.to_excel(excel_buffer, index=False, engine='openpyxl')
-        excel_buffer.seek(0)
+        self.content_cache.set(item_id, (version, response.content))
+        return response.content
 
-        url = f"https://graph.microsoft.com/v1.0/drives/{self.datacampus_drive_id}/items/{folder_id}:/{filename}:/content"
-        headers = {
-            "Content-Type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        }
+    def stream(self, item_id: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Descargar el contenido de un archivo por fragmentos"""
+        cached = self.cached_content(item_id)
+        if cached is not None:
+            for offset in range(0, len(cached), chunk_size):
+                yield cached[offset:offset + chunk_size]
+            return
+
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{item_id}/content"
+        response = self._make_request('GET', url, operation="download_content", stream=True)
+
+        if response.status_code != 200:
+            raise Exception(f"Error al descargar archivo: {response.status_code} - {response.text}")
+
+        with response:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                GRAPH_BYTES.inc(len(chunk), operation="download_content", direction="received")
+                yield chunk
+
+    def write(self, folder_id: str, filename: str, data: bytes, content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """Subir un archivo a una carpeta (crea o reemplaza por nombre)"""
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{folder_id}:/{filename}:/content"
+        headers = {"Content-Type": content_type}
         
-        response = self._make_request('PUT', url, headers=headers, data=excel_buffer)
+        response = self._make_request('PUT', url, operation="upload_content", headers=headers, data=data)
 
         if response.status_code in [200, 201]:
-            print(f" Archivo '{filename}' creado exitosamente")
-            return response.json()
+            return self._written(response.json(), folder_id)
         else:
             raise Exception(f"Error al crear archivo: {response.status_code} - {response.text}")
 
-    def read_excel_file(self, file_id: str) -> pd.DataFrame:
-        """Leer un archivo Excel y retornar DataFrame"""
-        url = f"https://graph.microsoft.com/v1.0/drives/{self.datacampus_drive_id}/items/{file_id}/content"
-        response = self._make_request('GET', url)
+    def write_stream(self, folder_id: str, filename: str, source: IO[bytes],
+                     content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """Subir desde un archivo abierto; los grandes por fragmentos con una sesión de carga"""
+        size = source.seek(0, 2)
+        source.seek(0)
+        if size <= SIMPLE_UPLOAD_MAX_BYTES:
+            return self.write(folder_id, filename, source.read(), content_type)
+
+        url = (f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{folder_id}:/{filename}:"
+               f"/createUploadSession")
+        data = {"item": {"@microsoft.graph.conflictBehavior": "replace"}}
+        response = self._make_request('POST', url, operation="create_upload_session", json=data)
 
         if response.status_code != 200:
-            raise Exception(f"Error al descargar archivo: {response.status_code} - {response.text}")
+            raise Exception(f"Error al crear sesión de carga: {response.status_code} - {response.text}")
 
+        upload_url = response.json()['uploadUrl']
         try:
-            return pd.read_excel(io.BytesIO(response.content), engine='openpyxl')
-        except Exception as e:
-            raise Exception(f"Error al leer archivo Excel: {e}")
-
-    def update_excel_file(self, file_id: str, data: pd.DataFrame) -> Dict:
-        """Actualizar un archivo Excel existente"""
-        excel_buffer = io.BytesIO()
-        data.to_excel(excel_buffer, index=False, engine='openpyxl')
-        excel_buffer.seek(0)
-
-        url = f"https://graph.microsoft.com/v1.0/drives/{self.datacampus_drive_id}/items/{file_id}/content"
-        headers = {
-            "Content-Type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        }
+            for start in range(0, size, UPLOAD_CHUNK_BYTES):
+                chunk = source.read(UPLOAD_CHUNK_BYTES)
+                response = self._upload_chunk(upload_url, chunk, start, size)
+        except BaseException:
+            # Liberar la sesión en Graph; la URL ya va firmada
+            self._send('DELETE', upload_url, "cancel_upload_session")
+            raise
+        return self._written(response.json(), folder_id)
+
+    def _upload_chunk(self, upload_url: str, chunk: bytes, start: int, size: int) -> "requests.Response":
+        """Enviar un fragmento (sin Authorization: la URL de la sesión ya lo incluye).
+
+        Un 429 (o 503 con Retry-After) es limitación de Graph y pausa al
+        gobernador. Cualquier otro 5xx es un fallo de este fragmento: se espera
+        solo aquí y se reenvía desde lo que Graph dice tener (``nextExpectedRanges``).
+        """
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            headers = {"Content-Length": str(len(chunk)),
+                       "Content-Range": f"bytes {start}-{start + len(chunk) - 1}/{size}"}
+            self.governor.acquire()
+            response = self._send('PUT', upload_url, "upload_chunk", headers=headers, data=chunk)
+            if response.status_code in (200, 201, 202):
+                self.governor.succeeded()
+                return response
+            if response.status_code not in (429, 500, 502, 503, 504) or attempt == MAX_THROTTLE_RETRIES:
+                break
+
+            delay = self._retry_after_seconds(response, attempt)
+            if response.status_code == 429 or (response.status_code == 503 and 'Retry-After' in response.headers):
+                GRAPH_RETRIES.inc(operation="upload_chunk", reason="throttled")
+                self.governor.throttled(delay)
+                continue
+
+            GRAPH_RETRIES.inc(operation="upload_chunk", reason="server_error")
+            time.sleep(delay)
+            status = self._send('GET', upload_url, "upload_session_status")
+            expected = self._next_expected_offset(status)
+            if expected == start + len(chunk) and start + len(chunk) < size:
+                # Graph guardó el fragmento entero antes de fallar
+                return status
+            if expected is not None and start < expected < start + len(chunk):
+                chunk, start = chunk[expected - start:], expected
+        raise Exception(f"Error al subir fragmento: {response.status_code} - {response.text}")
+
+    @staticmethod
+    def _next_expected_offset(status: "requests.Response") -> Optional[int]:
+        """Primer byte que espera la sesión de carga (None si no se sabe)"""
+        if status.status_code != 200:
+            return None
+        try:
+            ranges = status.json().get('nextExpectedRanges') or []
+            return int(ranges[0].split('-', 1)[0]) if ranges else None
+        except (ValueError, AttributeError):
+            return None
+
+    def replace(self, item_id: str, data: bytes, content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """Reemplazar el contenido de un archivo existente"""
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{item_id}/content"
+        headers = {"Content-Type": content_type}
         
-        response = self._make_request('PUT', url, headers=headers, data=excel_buffer)
+        response = self._make_request('PUT', url, operation="update_content", headers=headers, data=data)
 
         if response.status_code == 200:
-            print(" Archivo actualizado exitosamente")
-            return response.json()
+            return self._written(response.json())
         else:
             raise Exception(f"Error al actualizar archivo: {response.status_code} - {response.text}")
 
-    def delete_item(self, item_id: str) -> None:
+    def delete(self, item_id: str) -> None:
         """Eliminar un archivo o carpeta"""
-        url = f"https://graph.microsoft.com/v1.0/drives/{self.datacampus_drive_id}/items/{item_id}"
-        response = self._make_request('DELETE', url)
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{item_id}"
+        response = self._make_request('DELETE', url, operation="delete_item")
 
-        if response.status_code == 204:
-            print(" Elemento eliminado exitosamente")
-        else:
+        if response.status_code != 204:
             raise Exception(f"Error al eliminar elemento: {response.status_code} - {response.text}")
 
-    def create_folder(self, parent_folder_id: str, folder_name: str) -> Dict:
-        """Crear una nueva carpeta"""
-        url = f"https://graph.microsoft.com/v1.0/drives/{self.datacampus_drive_id}/items/{parent_folder_id}/children"
+        parent_id = (self.item_cache.get(item_id) or {}).get('parentReference', {}).get('id')
+        self.apply_changes(ChangeSet(item_ids={item_id}))
+        if parent_id:
+            self.item_cache.pop(parent_id)
+            self._update_cached_listing(parent_id, removed_id=item_id)
+
+    def mkdir(self, parent_id: str, name: str) -> Dict:
+        """Crear una carpeta"""
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{parent_id}/children"
         
         data = {
-            "name": folder_name,
+            "name": name,
             "folder": {},
             "@microsoft.graph.conflictBehavior": "rename"
         }
         
-        response = self._make_request('POST', url, json=data)
+        response = self._make_request('POST', url, operation="create_folder", json=data)
 
         if response.status_code == 201:
-            print(f" Carpeta '{folder_name}' creada exitosamente")
-            return response.json()
+            return self._written(response.json(), parent_id)
         else:
             raise Exception(f"Error al crear carpeta: {response.status_code} - {response.text}")
 
-    def get_item_info(self, item_id: str) -> Dict:
-        """Obtener información detallada de un elemento"""
-        url = f"https://graph.microsoft.com/v1.0/drives/{self.datacampus_drive_id}/items/{item_id}"
-        response = self._make_request('GET', url)
+    def info(self, item_id: str) -> Dict:
+        """Obtener metadatos de un elemento"""
+        cached = self.item_cache.get(item_id)
+        if cached is not None:
+            return cached
+
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{item_id}"
+        response = self._make_request('GET', url, operation="get_item")
 
         if response.status_code == 200:
-            return response.json()
+            item = response.json()
+            self.item_cache.set(item_id, item)
+            return item
         else:
             raise Exception(f"Error al obtener información: {response.status_code} - {response.text}")
 
+    def fresh_info(self, item_id: str) -> Dict:
+        """Metadatos sin pasar por la caché (incluyen ``file.hashes.quickXorHash``)"""
+        self.item_cache.pop(item_id)
+        return self.info(item_id)
+
+    def child_info(self, folder_id: str, name: str) -> Optional[Dict]:
+        """Metadatos de un hijo por ruta, en una sola llamada y sin listar la carpeta"""
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{folder_id}:/{name}"
+        response = self._make_request('GET', url, operation="get_item")
+
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise Exception(f"Error al obtener información: {response.status_code} - {response.text}")
+
+        item = response.json()
+        self.item_cache.set(item['id'], item)
+        return item
+
+    def start_copy(self, item_id: str, parent_id: str, name: Optional[str] = None) -> CopyOperation:
+        """Iniciar una copia en el servidor; Graph responde 202 con la URL de seguimiento"""
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{item_id}/copy"
+        data = {"parentReference": {"driveId": self.datacampus_drive_id, "id": parent_id}}
+        if name:
+            data["name"] = name
+
+        response = self._make_request('POST', url, operation="copy_item", json=data)
+
+        if response.status_code != 202:
+            raise Exception(f"Error al copiar elemento: {response.status_code} - {response.text}")
+        return CopyOperation(item_id, parent_id, name, monitor_url=response.headers['Location'])
+
+    def poll_copy(self, operation: CopyOperation) -> CopyOperation:
+        """Consultar la URL de seguimiento de una copia.
+
+        La URL ya va firmada: no lleva cabecera Authorization y no se siguen
+        redirecciones (al terminar puede redirigir al elemento nuevo).
+        """
+        self.governor.acquire()
+        response = self._send('GET', operation.monitor_url, "copy_monitor", allow_redirects=False)
+
+        if response.status_code in (429, 503):
+            self.governor.throttled(self._retry_after_seconds(response, 0))
+            return operation
+        if response.status_code == 303:
+            operation.status, operation.percent = "completed", 100.0
+            operation.resource_id = response.headers.get('Location', '').rstrip('/').rsplit('/', 1)[-1]
+        elif response.status_code in (200, 202):
+            status = response.json()
+            operation.status = status.get('status', operation.status)
+            operation.percent = float(status.get('percentageComplete') or operation.percent)
+            operation.resource_id = status.get('resourceId') or operation.resource_id
+            if operation.status == "failed":
+                operation.error = status.get('error', {}).get('message') or "La copia falló en el servidor"
+        else:
+            operation.status = "failed"
+            operation.error = f"Error al consultar la copia: {response.status_code} - {response.text}"
+
+        if operation.status == "completed":
+            # La copia aparece en la carpeta destino sin volver a listarla
+            self._written(self.info(operation.resource_id), operation.parent_id)
+        return operation
+
+    def move(self, item_id: str, parent_id: str, name: Optional[str] = None) -> Dict:
+        """Mover (y opcionalmente renombrar) un elemento; Graph lo hace al momento"""
+        url = f"{self.graph_url}/drives/{self.datacampus_drive_id}/items/{item_id}"
+        data = {"parentReference": {"id": parent_id}}
+        if name:
+            data["name"] = name
+
+        old_parent_id = (self.item_cache.get(item_id) or {}).get('parentReference', {}).get('id')
+        response = self._make_request('PATCH', url, operation="move_item", json=data)
+
+        if response.status_code != 200:
+            raise Exception(f"Error al mover elemento: {response.status_code} - {response.text}")
+
+        # El contenido no cambia: solo se corrigen los metadatos y los listados de ambas carpetas
+        item = response.json()
+        self.item_cache.set(item_id, item)
+        for folder_id in {old_parent_id, parent_id} - {None}:
+            self.item_cache.pop(folder_id)
+        if old_parent_id:
+            self._update_cached_listing(old_parent_id, removed_id=item_id)
+        self._update_cached_listing(parent_id, added=DriveItem.from_json(item))
+        return item
+
+    def delta(self, delta_link: Optional[str] = None) -> Tuple[List[Dict], str]:
+        """Cambios en datacampus desde ``delta_link`` y el enlace para la siguiente consulta.
+
+        Sin enlace previo se pide ``token=latest``: no devuelve elementos, solo
+        el punto de partida para las consultas siguientes. OneDrive para la
+        Empresa solo admite delta en la raíz del drive, así que con datacampus
+        compartida desde el drive de otro usuario Graph suele rechazarlo.
+        """
+        url = delta_link or (f"{self.graph_url}/drives/{self.datacampus_drive_id}"
+                             f"/items/{self.datacampus_root_id}/delta?token=latest")
+
+        changes = []
+        while True:
+            response = self._make_request('GET', url, operation="delta")
+
+            if response.status_code != 200:
+                raise GraphRequestError(f"Error al consultar cambios: {response.status_code} - {response.text}",
+                                        response.status_code)
+
+            payload = response.json()
+            changes.extend(payload.get('value', []))
+            if '@odata.nextLink' in payload:
+                url = payload['@odata.nextLink']
+            else:
+                return changes, payload['@odata.deltaLink']
+
+    # --- Cachés ----------------------------------------------------------
+
+    def _written(self, item: Dict, parent_id: Optional[str] = None) -> Dict:
+        """Actualizar las cachés tras una escritura propia"""
+        parent_id = parent_id or item.get('parentReference', {}).get('id')
+        self.apply_changes(ChangeSet(item_ids={item['id']}))
+        self.item_cache.set(item['id'], item)
+        if parent_id:
+            # La carpeta cambia de tamaño y fecha, pero su listado se corrige aquí mismo
+            self.item_cache.pop(parent_id)
+            self._update_cached_listing(parent_id, added=DriveItem.from_json(item))
+        return item
+
+    def forget_listing(self, folder_id: str) -> None:
+        self.listing_cache.pop(folder_id)
+
+    def close(self) -> None:
+        CHANGES.unsubscribe(self.apply_changes)
+        super().close()
+
+    def _update_cached_listing(self, folder_id: str, added: Optional[DriveItem] = None,
+                               removed_id: Optional[str] = None) -> None:
+        """Aplicar una escritura propia al listado en caché de la carpeta (si lo hay)"""
+        cached = self.listing_cache.get(folder_id)
+        if cached is not None:
+            self.listing_cache.set(folder_id, update_listing(cached, added, removed_id))
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        """Invalidar solo los elementos y carpetas afectados (o todo si ``reset``)"""
+        if changes.reset:
+            self.listing_cache.clear()
+            self.item_cache.clear()
+            self.content_cache.clear()
+            return
+        # El tamaño y la fecha de una carpeta cambian con sus hijos
+        affected = changes.item_ids | changes.folder_ids
+        self.item_cache.invalidate(affected)
+        self.listing_cache.invalidate(affected)
+        self.content_cache.invalidate(changes.item_ids)
 
 def encontrar_carpeta_datacampus(token):
     """Función de compatibilidad"""
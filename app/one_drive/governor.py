@@ -0,0 +1,187 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from app import config
+from app.monitoring.metrics import GOVERNOR_QUEUE_DEPTH, GOVERNOR_RATE, GOVERNOR_WAIT
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+_current_lane: ContextVar[str] = ContextVar("graph_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def lane(name: str) -> Iterator[None]:
+    """Marcar las llamadas a Graph del bloque con una prioridad (``interactive`` o ``bulk``).
+
+    La prioridad viaja en una contextvar, que los pools de hilos no heredan:
+    hay que enviar las tareas con ``contextvars.copy_context().run`` o volver
+    a entrar en ``lane(BULK)`` dentro del hilo.
+    """
+    if name not in LANES:
+        raise ValueError(f"Prioridad desconocida: {name}")
+    token = _current_lane.set(name)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+class RateGovernor:
+    """Cubeta de tokens delante de Graph con dos carriles de prioridad.
+
+    - ``interactive`` (lecturas de la API) siempre pasa primero.
+    - ``bulk`` (trabajos, exportaciones, precarga, /tree) solo toma un token si
+      no hay peticiones interactivas esperando, deja ``interactive_reserve``
+      tokens libres para las que lleguen y además nunca pasa de ``bulk_rate``,
+      aunque la tasa global no tenga límite.
+
+    La tasa se adapta (AIMD): cada 429/503 la reduce a la mitad y pausa
+    durante ``Retry-After`` al carril que lo recibió (un 429 interactivo
+    pausa también a bulk, uno bulk no frena a las interactivas); cada
+    respuesta correcta la sube un poco hasta volver a ``max_rate``. Con
+    ``max_rate <= 0`` (por defecto) no hay límite global hasta el primer 429:
+    entonces se limita a la mitad de la tasa que se llevaba y, al
+    recuperarla, se vuelve a no limitar.
+    """
+
+    def __init__(self, max_rate: Optional[float] = None, burst: Optional[float] = None,
+                 min_rate: Optional[float] = None, interactive_reserve: float = 2.0,
+                 bulk_rate: Optional[float] = None):
+        self.max_rate = config.GRAPH_RATE_LIMIT if max_rate is None else max_rate
+        self.bulk_rate = config.GRAPH_BULK_RATE_LIMIT if bulk_rate is None else bulk_rate
+        self.burst = max(config.GRAPH_RATE_BURST if burst is None else burst, 1.0)
+        self.min_rate = config.GRAPH_MIN_RATE if min_rate is None else min_rate
+        self.interactive_reserve = min(interactive_reserve, self.burst - 1)
+        self.rate = self.max_rate
+        # Tasa a la que se deja de limitar tras un 429 (max_rate, o la observada si no hay límite)
+        self._ceiling = self.max_rate
+        self._window_started = time.monotonic()
+        self._window_calls = 0
+        self._observed_rate = 0.0
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._bulk_tokens = self.burst
+        self._bulk_refilled = self._refilled
+        self._paused_until = {name: 0.0 for name in LANES}
+        self._waiting = {name: 0 for name in LANES}
+        self._cond = threading.Condition()
+        GOVERNOR_RATE.set(self.rate)
+
+    @property
+    def limited(self) -> bool:
+        """Hay límite de tasa activo (configurado o por un 429 reciente)"""
+        return self.rate > 0
+
+    def acquire(self, lane_name: Optional[str] = None) -> float:
+        """Esperar turno para una llamada; devuelve los segundos esperados"""
+        lane_name = lane_name or current_lane()
+        started = time.monotonic()
+        with self._cond:
+            self._waiting[lane_name] += 1
+            GOVERNOR_QUEUE_DEPTH.set(self._waiting[lane_name], lane=lane_name)
+            try:
+                while True:
+                    wait = self._try_take(lane_name)
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[lane_name] -= 1
+                GOVERNOR_QUEUE_DEPTH.set(self._waiting[lane_name], lane=lane_name)
+                # Al salir alguien puede cambiar quién tiene turno
+                self._cond.notify_all()
+
+        waited = time.monotonic() - started
+        GOVERNOR_WAIT.observe(waited, lane=lane_name)
+        return waited
+
+    def _try_take(self, lane_name: str) -> float:
+        """Tomar un token si toca; si no, segundos hasta volver a intentarlo"""
+        now = time.monotonic()
+        if now < self._paused_until[lane_name]:
+            return self._paused_until[lane_name] - now
+
+        bulk = lane_name == BULK
+        if bulk:
+            if self._waiting[INTERACTIVE]:
+                return 0.05
+            if self.bulk_rate > 0:
+                self._bulk_tokens = min(self.burst, self._bulk_tokens + (now - self._bulk_refilled) * self.bulk_rate)
+                self._bulk_refilled = now
+                if self._bulk_tokens < 1.0:
+                    return (1.0 - self._bulk_tokens) / self.bulk_rate
+
+        if self.limited:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            needed = 1.0 + (self.interactive_reserve if bulk else 0.0)
+            if self._tokens < needed:
+                return (needed - self._tokens) / self.rate
+            self._tokens -= 1.0
+
+        if bulk and self.bulk_rate > 0:
+            self._bulk_tokens -= 1.0
+        self._count_call(now)
+        return 0.0
+
+    def _count_call(self, now: float) -> None:
+        # Tasa observada en ventanas de ~1 s, punto de partida si llega un 429 sin límite
+        elapsed = now - self._window_started
+        if elapsed >= 1.0:
+            self._observed_rate = self._window_calls / elapsed
+            self._window_started, self._window_calls = now, 0
+        self._window_calls += 1
+
+    def throttled(self, retry_after: float, lane_name: Optional[str] = None) -> None:
+        """Graph respondió 429/503: reducir la tasa y pausar el carril (con interactive, a todos)"""
+        lane_name = lane_name or current_lane()
+        with self._cond:
+            now = time.monotonic()
+            for paused in (LANES if lane_name == INTERACTIVE else (lane_name,)):
+                self._paused_until[paused] = max(self._paused_until[paused], now + retry_after)
+            if lane_name == INTERACTIVE:
+                self._tokens = 0.0
+            else:
+                # Las interactivas conservan los tokens que quedaban; bulk queda en pausa
+                refill = (now - self._refilled) * self.rate if self.limited else self.burst
+                self._tokens = min(self.burst, self._tokens + refill)
+            self._refilled = now
+            if self.limited:
+                self.rate = max(self.min_rate, self.rate / 2)
+            else:
+                current = self._window_calls / max(now - self._window_started, 1.0)
+                self._ceiling = max(self._observed_rate, current, self.min_rate)
+                self.rate = max(self.min_rate, self._ceiling / 2)
+            GOVERNOR_RATE.set(self.rate)
+            self._cond.notify_all()
+
+    def succeeded(self) -> None:
+        """Aumento aditivo: ~1 petición/s más por cada ``rate`` respuestas correctas"""
+        if not self.limited or self.rate == self.max_rate:
+            return
+        with self._cond:
+            if not self.limited:
+                return
+            self.rate += 1.0 / self.rate
+            if self.rate >= self._ceiling:
+                # De vuelta al límite configurado (0 = sin límite)
+                self.rate = self.max_rate
+            GOVERNOR_RATE.set(self.rate)
+
+    def busy(self) -> bool:
+        """Hay peticiones interactivas esperando turno o el carril bulk está en pausa"""
+        with self._cond:
+            return bool(self._waiting[INTERACTIVE]) or time.monotonic() < self._paused_until[BULK]
+
+    def queue_depth(self, lane_name: str) -> int:
+        with self._cond:
+            return self._waiting[lane_name]
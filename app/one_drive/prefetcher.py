@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from app import config
+from app.monitoring.metrics import PREFETCH_TOTAL
+from app.one_drive.governor import BULK, lane
+from app.storage.base import DriveItem
+
+if TYPE_CHECKING:
+    from app.one_drive.OD_manager import OneDriveManager
+
+
+class Prefetcher:
+    """Precarga en segundo plano lo que se suele abrir después de un listado.
+
+    Tras listar una carpeta lo habitual es entrar en una subcarpeta o abrir
+    un Excel de ella, así que se calientan los listados de las subcarpetas y
+    el contenido de los ``.xlsx`` pequeños en las cachés del manager. Cada
+    listado tiene un presupuesto de peticiones y de bytes; las llamadas van
+    por el carril ``bulk`` del gobernador y la precarga se abandona en cuanto
+    hay peticiones interactivas esperando o Graph nos pide pausa.
+    """
+
+    def __init__(self, manager: "OneDriveManager", max_requests: Optional[int] = None,
+                 max_bytes: Optional[int] = None, max_file_bytes: Optional[int] = None,
+                 workers: Optional[int] = None):
+        self.manager = manager
+        self.max_requests = config.PREFETCH_MAX_REQUESTS if max_requests is None else max_requests
+        self.max_bytes = int(config.PREFETCH_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self.max_file_bytes = (int(config.PREFETCH_MAX_FILE_MB * 1024 * 1024)
+                               if max_file_bytes is None else max_file_bytes)
+        self._executor = ThreadPoolExecutor(max_workers=workers or config.PREFETCH_WORKERS,
+                                            thread_name_prefix="prefetch")
+        self._pending: set = set()
+        self._lock = threading.Lock()
+
+    def after_listing(self, folder_id: str, items: List[DriveItem]) -> bool:
+        """Programar la precarga de los hijos de ``folder_id``; False si ya estaba en curso"""
+        with self._lock:
+            if folder_id in self._pending:
+                return False
+            self._pending.add(folder_id)
+        self._executor.submit(self._run, folder_id, list(items))
+        return True
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def plan(self, items: List[DriveItem]) -> List[Tuple[str, DriveItem]]:
+        """Orden de precarga: subcarpetas y luego los Excel pequeños más recientes"""
+        folders = [("folder", item) for item in items if item.type == 'folder']
+        files = [item for item in items
+                 if item.type == 'file' and item.name.lower().endswith('.xlsx') and item.size <= self.max_file_bytes]
+        files.sort(key=lambda item: item.modified_datetime, reverse=True)
+        return folders + [("file", item) for item in files]
+
+    def warm(self, items: List[DriveItem]) -> Dict[str, int]:
+        """Calentar las cachés dentro del presupuesto; devuelve lo gastado"""
+        spent = {"requests": 0, "bytes": 0}
+        plan = self.plan(items)
+        for position, (kind, item) in enumerate(plan):
+            if spent["requests"] >= self.max_requests:
+                PREFETCH_TOTAL.inc(len(plan) - position, kind="any", result="skipped")
+                break
+            if self.manager.governor.busy():
+                PREFETCH_TOTAL.inc(len(plan) - position, kind="any", result="yielded")
+                break
+
+            if kind == "folder":
+                if item.id in self.manager.listing_cache:
+                    PREFETCH_TOTAL.inc(kind=kind, result="cached")
+                    continue
+                self.manager.list_folder_contents(item.id)
+            else:
+                if self.manager.cached_content(item.id) is not None:
+                    PREFETCH_TOTAL.inc(kind=kind, result="cached")
+                    continue
+                if spent["bytes"] + item.size > self.max_bytes:
+                    PREFETCH_TOTAL.inc(kind=kind, result="skipped")
+                    continue
+                self.manager.read(item.id)
+                spent["bytes"] += item.size
+
+            spent["requests"] += 1
+            PREFETCH_TOTAL.inc(kind=kind, result="fetched")
+        return spent
+
+    def _run(self, folder_id: str, items: List[DriveItem]) -> None:
+        try:
+            with lane(BULK):
+                self.warm(items)
+        except Exception as e:
+            # Una precarga fallida no afecta a nadie: la petición real lo reintentará
+            print(f" Error en precarga de la carpeta {folder_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(folder_id)
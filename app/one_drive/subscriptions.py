@@ -0,0 +1,300 @@
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app import config
+from app.cache.invalidation import CHANGES, ChangeSet, InvalidationBus
+from app.cache.shared_state import FOREVER, SharedState, get_shared_state
+from app.one_drive.OD_manager import GraphRequestError, OneDriveManager
+
+# Respuestas de delta que no se arreglan reintentando (carpeta que no es la raíz, sin acceso al drive)
+DELTA_UNSUPPORTED_STATUS = (400, 403, 404, 405, 501)
+
+
+def changes_from_delta(items: List[Dict]) -> ChangeSet:
+    """Elementos cambiados y carpetas cuyo listado quedó desactualizado"""
+    changes = ChangeSet()
+    for item in items:
+        changes.item_ids.add(item['id'])
+        parent_id = item.get('parentReference', {}).get('id')
+        if parent_id:
+            changes.folder_ids.add(parent_id)
+        if 'folder' in item and 'deleted' not in item:
+            changes.folder_ids.add(item['id'])
+    return changes
+
+
+class SubscriptionManager:
+    """Suscripción a notificaciones de cambios de Graph sobre datacampus.
+
+    Graph solo avisa de que "algo cambió" en el drive; al recibir el aviso se
+    consulta ``delta`` para saber qué elementos fueron y se publican en el
+    bus de invalidación, de modo que las cachés descartan solo esos elementos
+    y sus carpetas. Las notificaciones que llegan en ráfaga se agrupan en una
+    sola consulta. La suscripción se renueva antes de caducar.
+
+    Con estado compartido (``SHARED_STATE_PATH``) hay una sola suscripción
+    por nodo: la crea y renueva el worker que tiene el lease, y cualquier
+    worker puede validar los avisos y consultar delta (de uno en uno).
+
+    datacampus suele ser una carpeta compartida desde el drive de otro
+    usuario: OneDrive para la Empresa no admite delta fuera de la raíz y la
+    suscripción a la raíz ajena responde 403. En ese caso se avisa una vez y
+    se deja de intentar; las cachés se renuevan solo por ``CACHE_TTL_SECONDS``.
+    """
+
+    def __init__(self, manager: OneDriveManager, notification_url: Optional[str] = None,
+                 client_state: Optional[str] = None, lifetime_minutes: Optional[int] = None,
+                 bus: InvalidationBus = CHANGES, state: Optional[SharedState] = None):
+        self.manager = manager
+        self.state = state if state is not None else get_shared_state()
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.notification_url = notification_url or config.GRAPH_NOTIFICATION_URL
+        client_state = client_state or config.GRAPH_NOTIFICATION_CLIENT_STATE
+        if not client_state and self.state is not None:
+            # Todos los workers deben aceptar el mismo secreto
+            client_state = self.state.setdefault("subscriptions", "client_state",
+                                                 secrets.token_urlsafe(24).encode()).decode()
+        self.client_state = client_state or secrets.token_urlsafe(24)
+        self.lifetime = timedelta(minutes=lifetime_minutes or config.GRAPH_SUBSCRIPTION_MINUTES)
+        self.bus = bus
+        self.subscription: Optional[Dict] = None
+        self.delta_link: Optional[str] = None
+        # Motivo por el que Graph no admite notificaciones sobre datacampus (None = admitidas)
+        self.unsupported: Optional[str] = None
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def subscription_id(self) -> Optional[str]:
+        return self.subscription['id'] if self.subscription else None
+
+    # --- Estado compartido entre workers -----------------------------------
+
+    def _shared(self, key: str):
+        data = self.state.get("subscriptions", key) if self.state is not None else None
+        return json.loads(data) if data else None
+
+    def _share(self, key: str, value, ttl: float = FOREVER) -> None:
+        if self.state is not None:
+            self.state.set("subscriptions", key, json.dumps(value).encode("utf-8"), ttl)
+
+    def _set_subscription(self, subscription: Optional[Dict]) -> None:
+        self.subscription = subscription
+        self._share("current", subscription)
+
+    def _set_delta_link(self, delta_link: Optional[str]) -> None:
+        self.delta_link = delta_link
+        self._share("delta_link", delta_link)
+
+    def _expiration(self) -> str:
+        return (datetime.now(timezone.utc) + self.lifetime).strftime("%Y-%m-%dT%H:%M:%S.0000000Z")
+
+    # --- Ciclo de vida de la suscripción ---------------------------------
+
+    def _disable(self, reason: str) -> None:
+        """Pasar a modo solo TTL: sin suscripción ni delta"""
+        self.unsupported = reason
+        # Los workers que arranquen en el próximo día no lo vuelven a intentar
+        self._share("unsupported", reason, ttl=24 * 3600)
+        print(f" Notificaciones de cambios no disponibles en datacampus ({reason}); "
+              f"las cachés caducarán a los {config.CACHE_TTL_SECONDS:g}s")
+
+    def _is_unsupported(self) -> bool:
+        """También vale si lo descubrió otro worker del nodo"""
+        if self.unsupported is None:
+            self.unsupported = self._shared("unsupported")
+        return self.unsupported is not None
+
+    def subscribe(self) -> Optional[Dict]:
+        """Crear la suscripción; Graph valida antes la URL contra /notifications.
+
+        Devuelve None (y queda en modo solo TTL) si Graph no admite delta o
+        la suscripción sobre la carpeta compartida.
+        """
+        # Punto de partida de delta: solo interesan los cambios a partir de ahora
+        try:
+            delta_link = self.manager.delta()[1]
+        except GraphRequestError as e:
+            if e.status_code not in DELTA_UNSUPPORTED_STATUS:
+                raise
+            self._disable(f"delta respondió {e.status_code}")
+            return None
+        self._set_delta_link(delta_link)
+
+        data = {
+            "changeType": "updated",
+            "notificationUrl": self.notification_url,
+            "resource": f"drives/{self.manager.datacampus_drive_id}/root",
+            "expirationDateTime": self._expiration(),
+            "clientState": self.client_state,
+        }
+        response = self.manager._make_request('POST', f"{self.manager.graph_url}/subscriptions",
+                                              operation="create_subscription", json=data)
+
+        if response.status_code == 403:
+            # Sin acceso a la raíz del drive del propietario de la carpeta
+            self._disable("la suscripción respondió 403")
+            return None
+        if response.status_code != 201:
+            raise Exception(f"Error al crear suscripción: {response.status_code} - {response.text}")
+
+        self._set_subscription(response.json())
+        print(f" Suscripción a cambios creada ({self.subscription_id}), caduca {self.subscription['expirationDateTime']}")
+        return self.subscription
+
+    def renew(self) -> Optional[Dict]:
+        """Ampliar la caducidad; si Graph ya la borró se crea de nuevo"""
+        if self._is_unsupported():
+            return None
+        if self.subscription is None:
+            return self.subscribe()
+
+        url = f"{self.manager.graph_url}/subscriptions/{self.subscription_id}"
+        response = self.manager._make_request('PATCH', url, operation="renew_subscription",
+                                              json={"expirationDateTime": self._expiration()})
+
+        if response.status_code == 404:
+            print(" La suscripción ya no existe, creando una nueva...")
+            self._set_subscription(None)
+            # Pudo haber cambios sin notificar mientras no había suscripción
+            self.bus.publish(ChangeSet(reset=True))
+            return self.subscribe()
+        if response.status_code != 200:
+            raise Exception(f"Error al renovar suscripción: {response.status_code} - {response.text}")
+
+        self._set_subscription(response.json())
+        return self.subscription
+
+    def unsubscribe(self) -> None:
+        if self.subscription is None:
+            return
+        url = f"{self.manager.graph_url}/subscriptions/{self.subscription_id}"
+        response = self.manager._make_request('DELETE', url, operation="delete_subscription")
+        if response.status_code not in (204, 404):
+            raise Exception(f"Error al eliminar suscripción: {response.status_code} - {response.text}")
+        self._set_subscription(None)
+
+    def seconds_until_renewal(self) -> float:
+        """Renovar cuando quede un 20 % de vida (Graph limita la duración máxima)"""
+        if self.subscription is None:
+            return 0.0
+        expires = datetime.fromisoformat(self.subscription['expirationDateTime'])
+        remaining = (expires - datetime.now(timezone.utc)).total_seconds()
+        return max(remaining - self.lifetime.total_seconds() * 0.2, 0.0)
+
+    # --- Hilos de fondo ----------------------------------------------------
+
+    def start(self) -> None:
+        """Crear la suscripción y mantenerla viva en segundo plano.
+
+        La creación va en un hilo porque Graph llama a /notifications para
+        validar la URL mientras espera la respuesta de POST /subscriptions.
+        """
+        for target, name in ((self._renewal_loop, "graph-subscription"), (self._process_loop, "graph-delta")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, unsubscribe: bool = True) -> None:
+        self._stop.set()
+        self._pending.set()
+        if self.state is not None:
+            # La suscripción es del nodo: no se borra, se libera el lease para que otro worker la retome
+            self.state.release_lease("graph-subscription", self.owner)
+            return
+        if unsubscribe:
+            try:
+                self.unsubscribe()
+            except Exception as e:
+                print(f" No se pudo eliminar la suscripción: {e}")
+
+    def _renewal_loop(self) -> None:
+        retry = 30.0
+        while not self._stop.is_set():
+            if self._is_unsupported():
+                return
+            if self.state is not None and not self._lead():
+                # Otro worker mantiene la suscripción; tomar el relevo si deja de renovar su lease
+                self._stop.wait(60.0)
+                continue
+            try:
+                if self.renew() is None:
+                    return
+                retry = 30.0
+                wait = max(self.seconds_until_renewal(), 30.0)
+            except Exception as e:
+                print(f" Error en la suscripción a cambios: {e}")
+                wait, retry = retry, min(retry * 2, 900.0)
+            if self.state is not None:
+                self.state.acquire_lease("graph-subscription", self.owner, wait + 120.0)
+            self._stop.wait(wait)
+
+    def _lead(self) -> bool:
+        """Tomar el lease de la suscripción y adoptar la que dejó el anterior titular"""
+        if not self.state.acquire_lease("graph-subscription", self.owner, 120.0):
+            return False
+        if self.subscription is None:
+            self.subscription = self._shared("current")
+        return True
+
+    def _process_loop(self) -> None:
+        while not self._stop.is_set():
+            self._pending.wait()
+            if self._stop.is_set():
+                return
+            self._pending.clear()
+            self.process_changes()
+
+    # --- Notificaciones ----------------------------------------------------
+
+    def handle_notifications(self, payload: Dict) -> int:
+        """Validar las notificaciones recibidas y programar la consulta de cambios.
+
+        Devuelve cuántas se aceptaron. Las que no traen nuestro ``clientState``
+        o son de otra suscripción se descartan.
+        """
+        accepted = 0
+        for notification in payload.get('value', []):
+            if not secrets.compare_digest(str(notification.get('clientState', '')).encode(), self.client_state.encode()):
+                continue
+            subscription_id = (self._shared("current") or {}).get('id') if self.state else self.subscription_id
+            if subscription_id and notification.get('subscriptionId') != subscription_id:
+                continue
+            accepted += 1
+
+        if accepted:
+            self._pending.set()
+        return accepted
+
+    def process_changes(self) -> ChangeSet:
+        """Consultar delta y publicar lo que cambió"""
+        with self._lock:
+            if self.state is not None:
+                # Un solo worker consulta delta a la vez; los demás esperan y siguen desde su enlace
+                while not self.state.acquire_lease("graph-delta", self.owner, 120.0):
+                    time.sleep(0.2)
+                self.delta_link = self._shared("delta_link")
+            try:
+                items, delta_link = self.manager.delta(self.delta_link)
+                self._set_delta_link(delta_link)
+                changes = changes_from_delta(items)
+            except Exception as e:
+                # Sin delta (enlace caducado, carpeta compartida sin soporte...) se vacía todo
+                print(f" No se pudieron consultar los cambios, se invalidan todas las cachés: {e}")
+                self._set_delta_link(None)
+                changes = ChangeSet(reset=True)
+            finally:
+                if self.state is not None:
+                    self.state.release_lease("graph-delta", self.owner)
+
+        if changes:
+            self.bus.publish(changes)
+        return changes
@@ -0,0 +1,149 @@
+import contextvars
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.one_drive.OD_manager import DriveItem
+from app.one_drive.governor import lane
+
+
+@dataclass
+class FolderNode:
+    id: str
+    name: str
+    path: List[str]
+    depth: int
+    file_count: int = 0
+    size: int = 0
+    total_file_count: int = 0
+    total_size: int = 0
+    truncated: bool = False
+    error: Optional[str] = None
+    children: List["FolderNode"] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación anidada para la respuesta JSON"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "path": self.path,
+            "depth": self.depth,
+            "file_count": self.file_count,
+            "size": self.size,
+            "total_file_count": self.total_file_count,
+            "total_size": self.total_size,
+            "truncated": self.truncated,
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class FolderTreeCrawler:
+    """Recorre el árbol de carpetas en anchura con listados concurrentes.
+
+    Las esperas por 429/Retry-After las resuelve ``OneDriveManager._make_request``,
+    que pausa a todos los hilos a la vez, así que el crawler solo limita
+    cuántos listados hay en vuelo. Con ``lane_name`` los listados van por ese
+    carril del gobernador; si no, por el del llamante.
+    """
+
+    def __init__(self, manager, max_workers: int = 8, lane_name: Optional[str] = None):
+        self.manager = manager
+        self.max_workers = max(1, max_workers)
+        self.lane_name = lane_name
+
+    def _list(self, folder_id: str) -> List[DriveItem]:
+        if self.lane_name is None:
+            return self.manager.list_folder_contents(folder_id)
+        with lane(self.lane_name):
+            return self.manager.list_folder_contents(folder_id)
+
+    def crawl(self, folder_id: str, folder_name: str, depth: int) -> Iterator[Dict[str, Any]]:
+        """Recorrer hasta ``depth`` niveles y emitir eventos parciales.
+
+        Emite un evento ``folder`` por cada carpeta listada (o ``error`` si falla)
+        y, al terminar, un único evento ``tree`` con el árbol agregado.
+        """
+        started = time.monotonic()
+        root = FolderNode(id=folder_id, name=folder_name, path=[folder_name], depth=0)
+        pending = deque([root])
+        in_flight = {}
+        listed = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or in_flight:
+                while pending and len(in_flight) < self.max_workers:
+                    node = pending.popleft()
+                    # Con el contexto del llamante: carril del gobernador y fases de Server-Timing
+                    future = executor.submit(contextvars.copy_context().run, self._list, node.id)
+                    in_flight[future] = node
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = in_flight.pop(future)
+                    listed += 1
+                    try:
+                        items = future.result()
+                    except Exception as e:
+                        node.error = str(e)
+                        yield {"event": "error", "id": node.id, "path": node.path, "error": node.error}
+                        continue
+
+                    subfolders = self._fill_node(node, items, depth)
+                    pending.extend(subfolders)
+                    yield {
+                        "event": "folder",
+                        "id": node.id,
+                        "name": node.name,
+                        "path": node.path,
+                        "depth": node.depth,
+                        "file_count": node.file_count,
+                        "size": node.size,
+                        "subfolder_count": len(node.children),
+                    }
+
+        self._aggregate(root)
+        yield {
+            "event": "tree",
+            "tree": root.to_dict(),
+            "stats": {
+                "folders_listed": listed,
+                "total_files": root.total_file_count,
+                "total_size": root.total_size,
+                "elapsed_seconds": round(time.monotonic() - started, 3),
+            },
+        }
+
+    def _fill_node(self, node: FolderNode, items: List[DriveItem], depth: int) -> List[FolderNode]:
+        """Completar conteos directos y devolver las subcarpetas a recorrer"""
+        to_visit = []
+        for item in items:
+            if item.type == 'folder':
+                child = FolderNode(
+                    id=item.id,
+                    name=item.name,
+                    path=node.path + [item.name],
+                    depth=node.depth + 1,
+                )
+                node.children.append(child)
+                if child.depth < depth:
+                    to_visit.append(child)
+                else:
+                    # No se lista: Graph ya reporta el tamaño total de la carpeta
+                    child.truncated = True
+                    child.size = item.size
+            else:
+                node.file_count += 1
+                node.size += item.size
+        return to_visit
+
+    def _aggregate(self, node: FolderNode) -> None:
+        """Sumar archivos y bytes de abajo hacia arriba"""
+        node.total_file_count = node.file_count
+        node.total_size = node.size
+        for child in node.children:
+            self._aggregate(child)
+            node.total_file_count += child.total_file_count
+            node.total_size += child.total_size
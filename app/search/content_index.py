@@ -0,0 +1,230 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    file_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    cells INTEGER NOT NULL DEFAULT 0,
+    indexed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cells (
+    id INTEGER PRIMARY KEY,
+    file INTEGER NOT NULL,
+    sheet TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    col TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cells_file ON cells (file);
+CREATE VIRTUAL TABLE IF NOT EXISTS cell_text USING fts5(
+    value, content='cells', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# Celdas que se insertan por lote al indexar un libro
+INSERT_BATCH = 5000
+
+Cell = Tuple[str, int, str, str]
+
+
+def _cell_text(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def workbook_cells(source: IO[bytes]) -> Iterator[Cell]:
+    """Celdas no vacías de todas las hojas: ``(hoja, fila, columna, texto)``.
+
+    openpyxl en modo ``read_only`` recorre el XML sin cargar el libro entero.
+    Filas y columnas siguen la numeración de Excel (1, "A").
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils import get_column_letter
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for row_number, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+                for column, value in enumerate(row, start=1):
+                    if value is None:
+                        continue
+                    text = _cell_text(value)
+                    if text:
+                        yield sheet.title, row_number, get_column_letter(column), text
+    finally:
+        workbook.close()
+
+
+class ContentIndex:
+    """Índice invertido del texto de las celdas, en SQLite con FTS5.
+
+    ``cells`` guarda cada celda con su archivo, hoja, fila y columna, y
+    ``cell_text`` (FTS5 sobre ``cells``) es el índice invertido de sus
+    palabras, sin tildes ni mayúsculas. ``files`` recuerda el cTag indexado
+    de cada libro para reindexar solo los que cambian.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def versions(self) -> Dict[str, str]:
+        """Versión (cTag) indexada de cada archivo"""
+        return dict(self._connect().execute("SELECT file_id, version FROM files"))
+
+    def index_file(self, file_id: str, name: str, version: str, cells: Iterable[Cell]) -> int:
+        """Sustituir las celdas indexadas de un archivo; devuelve cuántas quedan.
+
+        ``cells`` suele venir de un libro que aún se está descargando y
+        leyendo: se vuelca primero a una tabla temporal de esta conexión, sin
+        bloquear la base, y la escritura (``BEGIN IMMEDIATE``) solo dura la copia.
+        """
+        conn = self._connect()
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS pending_cells (sheet TEXT, row INTEGER, col TEXT, value TEXT)")
+        conn.execute("DELETE FROM temp.pending_cells")
+        try:
+            total, batch = 0, []
+            for cell in cells:
+                batch.append(cell)
+                if len(batch) >= INSERT_BATCH:
+                    conn.executemany("INSERT INTO temp.pending_cells VALUES (?, ?, ?, ?)", batch)
+                    total += len(batch)
+                    batch = []
+            conn.executemany("INSERT INTO temp.pending_cells VALUES (?, ?, ?, ?)", batch)
+            total += len(batch)
+
+            with self._transaction() as conn:
+                self._delete(conn, file_id)
+                file_key = conn.execute("INSERT INTO files (file_id, name, version, cells, indexed) VALUES (?, ?, ?, ?, ?)",
+                                        (file_id, name, version, total, time.time())).lastrowid
+                conn.execute("INSERT INTO cells (file, sheet, row, col, value) "
+                             "SELECT ?, sheet, row, col, value FROM temp.pending_cells", (file_key,))
+                conn.execute("INSERT INTO cell_text (rowid, value) SELECT id, value FROM cells WHERE file = ?", (file_key,))
+        finally:
+            conn.execute("DELETE FROM temp.pending_cells")
+        return total
+
+    def remove_files(self, file_ids: Iterable[str]) -> None:
+        with self._transaction() as conn:
+            for file_id in file_ids:
+                self._delete(conn, file_id)
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, file_id: str) -> None:
+        row = conn.execute("SELECT id FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        if row is None:
+            return
+        # Con contenido externo, FTS5 necesita el valor antiguo para quitar sus palabras
+        conn.execute("INSERT INTO cell_text (cell_text, rowid, value) "
+                     "SELECT 'delete', id, value FROM cells WHERE file = ?", (row[0],))
+        conn.execute("DELETE FROM cells WHERE file = ?", (row[0],))
+        conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def search(self, query: str, limit: int = 100, prefix: bool = False) -> List[Dict]:
+        """Celdas que contienen ``query`` como frase (``prefix``: la última palabra puede seguir)"""
+        phrase = '"' + query.replace('"', '""') + '"' + ("*" if prefix else "")
+        rows = self._connect().execute(
+            """SELECT f.file_id, f.name, c.sheet, c.row, c.col, c.value
+               FROM cell_text JOIN cells c ON c.id = cell_text.rowid JOIN files f ON f.id = c.file
+               WHERE cell_text MATCH ? LIMIT ?""", (phrase, limit))
+        return [{"file_id": file_id, "name": name, "sheet": sheet, "row": row, "column": column, "value": value}
+                for file_id, name, sheet, row, column, value in rows]
+
+    def stats(self) -> Dict[str, int]:
+        files, cells = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(cells), 0) FROM files").fetchone()
+        return {"files": files, "cells": cells}
+
+
+def refresh_index(index: ContentIndex, manager, folder_id: Optional[str] = None,
+                  max_file_bytes: Optional[int] = None,
+                  progress: Optional[Callable[[float, str], None]] = None) -> Dict[str, int]:
+    """Poner al día el índice con los .xlsx bajo ``folder_id`` (toda datacampus por defecto).
+
+    Se listan las carpetas y solo se descargan los libros nuevos o con otro
+    cTag. Los archivos que ya no existen se quitan solo al recorrer
+    datacampus entera (en un subárbol no se sabe si se movieron fuera).
+    """
+    if max_file_bytes is None:
+        max_file_bytes = int(config.CONTENT_INDEX_MAX_FILE_MB * 1024 * 1024)
+    root = folder_id or manager.datacampus_root_id
+
+    files, pending = {}, [root]
+    while pending:
+        for item in manager.list_folder_contents(pending.pop()):
+            if item.type == "folder":
+                pending.append(item.id)
+            elif item.name.lower().endswith(".xlsx"):
+                files[item.id] = item
+
+    known = index.versions()
+    changed = [item for item in files.values() if known.get(item.id) != (item.ctag or item.etag)]
+    removed = set(known) - set(files) if root == manager.datacampus_root_id else set()
+    index.remove_files(removed)
+
+    summary = {"files": len(files), "indexed": 0, "unchanged": len(files) - len(changed),
+               "removed": len(removed), "skipped": 0, "failed": 0}
+    for i, item in enumerate(changed):
+        if progress is not None:
+            progress(i / len(changed), f"Indexando {item.name}")
+        if item.size > max_file_bytes:
+            summary["skipped"] += 1
+            continue
+        try:
+            with manager.open_content(item.id) as source:
+                index.index_file(item.id, item.name, item.ctag or item.etag, workbook_cells(source))
+            summary["indexed"] += 1
+        except Exception as e:
+            print(f" No se pudo indexar {item.name}: {e}")
+            summary["failed"] += 1
+    return summary
+
+
+_index: Optional[ContentIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_content_index() -> ContentIndex:
+    """Índice de ``CONTENT_INDEX_PATH`` (uno por proceso)"""
+    global _index
+    with _index_lock:
+        if _index is None or _index.path != config.CONTENT_INDEX_PATH:
+            _index = ContentIndex(config.CONTENT_INDEX_PATH)
+        return _index
@@ -0,0 +1,484 @@
+import io
+import re
+import tempfile
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app import config
+from app.cache.shared_state import make_cache
+from app.cache.single_flight import SingleFlight
+from app.monitoring.metrics import DATAFRAME_BYTES_SAVED, UPLOADS_SKIPPED
+from app.monitoring.timing import span
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Seguimiento de copias en el servidor: espera creciente entre consultas y límite total
+COPY_POLL_SECONDS = 0.5
+COPY_POLL_MAX_SECONDS = 5.0
+COPY_TIMEOUT_SECONDS = 30 * 60
+
+# Cómo decidir si hace falta subir un Excel: siempre, comparando el hash de los
+# bytes generados con el de los metadatos, o comparando antes el DataFrame
+COMPARE_OFF = "off"
+COMPARE_HASH = "hash"
+COMPARE_DATAFRAME = "dataframe"
+COMPARE_MODES = (COMPARE_OFF, COMPARE_HASH, COMPARE_DATAFRAME)
+
+# openpyxl escribe la hora de guardado en el zip y en docProps/core.xml; se fija
+# para que los mismos datos generen los mismos bytes (y el mismo hash)
+REPRODUCIBLE_DATE = (1980, 1, 1, 0, 0, 0)
+_CORE_DATES = re.compile(rb"(<dcterms:(?:created|modified)[^>]*>)[^<]*(</dcterms:)")
+
+
+@dataclass
+class DriveItem:
+    id: str
+    name: str
+    type: str
+    size: int = 0
+    created_datetime: str = ""
+    modified_datetime: str = ""
+    etag: str = ""
+    ctag: str = ""
+
+    @classmethod
+    def from_json(cls, item_data: Dict) -> "DriveItem":
+        """Convertir un driveItem (JSON de Graph o de ``info``/``write``/``mkdir``)"""
+        return cls(
+            id=item_data['id'],
+            name=item_data['name'],
+            type='folder' if 'folder' in item_data else 'file',
+            size=item_data.get('size', 0),
+            created_datetime=item_data.get('createdDateTime', ''),
+            modified_datetime=item_data.get('lastModifiedDateTime', ''),
+            etag=item_data.get('eTag', ''),
+            ctag=item_data.get('cTag', '')
+        )
+
+
+@dataclass
+class CopyOperation:
+    """Copia hecha por el servidor de almacenamiento (los bytes no pasan por este nodo).
+
+    Graph responde ``202`` con una URL de seguimiento (``monitor_url``); el
+    estado se consulta ahí hasta que sea ``completed`` (con el id del nuevo
+    elemento en ``resource_id``) o ``failed``.
+    """
+    item_id: str
+    parent_id: str
+    name: Optional[str] = None
+    monitor_url: str = ""
+    status: str = "inProgress"
+    percent: float = 0.0
+    resource_id: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+
+def update_listing(items: List[DriveItem], added: Optional[DriveItem] = None,
+                   removed_id: Optional[str] = None) -> List[DriveItem]:
+    """Copia de un listado tras una escritura propia, sin volver a pedirlo.
+
+    ``added`` sustituye al elemento con el mismo id o nombre (las subidas
+    reemplazan por nombre) o se añade al final; ``removed_id`` se quita.
+    """
+    drop = {removed_id, added.id if added else None} - {None}
+    name = added.name.lower() if added else None
+    updated = [item for item in items if item.id not in drop and item.name.lower() != name]
+    if added is not None:
+        updated.append(added)
+    return updated
+
+
+def compact_frame(df: "pd.DataFrame", stage: str) -> "pd.DataFrame":
+    """``compact_dataframe`` midiendo la fase y registrando la memoria ahorrada"""
+    from utils.df_tools import compact_dataframe
+
+    with span("compact"):
+        df, report = compact_dataframe(df)
+    DATAFRAME_BYTES_SAVED.inc(max(report["bytes_saved"], 0), stage=stage)
+    print(f" DataFrame compactado ({stage}): {report['bytes_before'] / 1048576:.1f} MB -> "
+          f"{report['bytes_after'] / 1048576:.1f} MB"
+          f"{'' if report['arrow_strings'] else ' (sin pyarrow: texto sin cadenas de Arrow)'}")
+    return df
+
+
+def reproducible_xlsx(data: bytes) -> bytes:
+    """Reescribir un .xlsx con fechas fijas en las entradas del zip y en las propiedades"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as source, zipfile.ZipFile(output, "w") as target:
+        for entry in source.infolist():
+            content = source.read(entry)
+            if entry.filename == "docProps/core.xml":
+                content = _CORE_DATES.sub(rb"\g<1>1980-01-01T00:00:00Z\g<2>", content)
+            fixed = zipfile.ZipInfo(entry.filename, REPRODUCIBLE_DATE)
+            fixed.compress_type = entry.compress_type
+            fixed.external_attr = entry.external_attr
+            target.writestr(fixed, content)
+    return output.getvalue()
+
+
+class StorageBackend(ABC):
+    """Interfaz de almacenamiento sobre la que trabajan la API y el navegador.
+
+    Las implementaciones solo definen las primitivas (list, read, write,
+    replace, delete, mkdir, info, stream, start_copy, move). Las operaciones
+    con Excel, las copias en bloque y la búsqueda por nombre se construyen
+    encima y son comunes a todos los backends.
+    Los diccionarios que devuelven ``info``/``write``/``mkdir`` siguen la forma
+    de un driveItem de Graph (id, name, size, eTag, cTag, parentReference...).
+    """
+
+    def __init__(self):
+        self.authenticated = False
+        self.datacampus_drive_id: Optional[str] = None
+        self.datacampus_root_id: Optional[str] = None
+        # Lecturas idénticas concurrentes comparten una sola llamada y un solo parseo
+        self._flights = SingleFlight()
+        # Precarga opcional tras los listados (ver app/one_drive/prefetcher.py)
+        self.prefetcher = None
+        # Huella del último DataFrame escrito por archivo y el cTag que resultó (compare="dataframe")
+        self.written_frames = make_cache("written_frames", 7 * 24 * 3600, max_entries=4096)
+
+    # --- Primitivas --------------------------------------------------------
+
+    @abstractmethod
+    def initialize_datacampus(self) -> Tuple[str, str]:
+        """Localizar la raíz de datacampus y devolver (drive_id, root_id)"""
+
+    @abstractmethod
+    def list(self, folder_id: str) -> List[DriveItem]:
+        """Listar los hijos directos de una carpeta"""
+
+    @abstractmethod
+    def read(self, item_id: str) -> bytes:
+        """Leer el contenido completo de un archivo"""
+
+    @abstractmethod
+    def stream(self, item_id: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Leer el contenido de un archivo por fragmentos"""
+
+    @abstractmethod
+    def write(self, folder_id: str, filename: str, data: bytes, content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """Crear (o reemplazar por nombre) un archivo en una carpeta"""
+
+    @abstractmethod
+    def replace(self, item_id: str, data: bytes, content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """Reemplazar el contenido de un archivo existente"""
+
+    @abstractmethod
+    def delete(self, item_id: str) -> None:
+        """Eliminar un archivo o carpeta"""
+
+    @abstractmethod
+    def mkdir(self, parent_id: str, name: str) -> Dict:
+        """Crear una carpeta (renombrando si ya existe)"""
+
+    @abstractmethod
+    def info(self, item_id: str) -> Dict:
+        """Metadatos de un elemento"""
+
+    @abstractmethod
+    def start_copy(self, item_id: str, parent_id: str, name: Optional[str] = None) -> CopyOperation:
+        """Pedir al servidor que copie un elemento en ``parent_id`` (falla si el nombre existe)"""
+
+    @abstractmethod
+    def move(self, item_id: str, parent_id: str, name: Optional[str] = None) -> Dict:
+        """Mover (y opcionalmente renombrar) un elemento sin transferir su contenido"""
+
+    def write_stream(self, folder_id: str, filename: str, source: IO[bytes],
+                     content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """``write`` desde un archivo abierto; los backends lo envían por fragmentos"""
+        return self.write(folder_id, filename, source.read(), content_type)
+
+    def fresh_info(self, item_id: str) -> Dict:
+        """Metadatos leídos del almacenamiento, sin caché (con ``file.hashes`` si los hay)"""
+        return self.info(item_id)
+
+    def child_info(self, folder_id: str, name: str) -> Optional[Dict]:
+        """Metadatos actuales de un hijo por nombre, o None si no existe"""
+        item = self.find_item_by_name(name, folder_id)
+        return self.fresh_info(item.id) if item is not None else None
+
+    def poll_copy(self, operation: CopyOperation) -> CopyOperation:
+        """Actualizar el estado de una copia (los backends que copian al momento no hacen nada)"""
+        return operation
+
+    # --- Operaciones comunes -----------------------------------------------
+
+    def list_folder_contents(self, folder_id: Optional[str] = None) -> List[DriveItem]:
+        """Listar contenido de una carpeta"""
+        folder_id = folder_id or self.datacampus_root_id
+        return self._flights.do(("list", folder_id), lambda: self.list(folder_id))
+
+    def prefetch_children(self, folder_id: str, items: List[DriveItem]) -> None:
+        """Precargar en segundo plano lo que probablemente se abra después de un listado"""
+        if self.prefetcher is not None:
+            self.prefetcher.after_listing(folder_id, items)
+
+    def forget_listing(self, folder_id: str) -> None:
+        """Descartar el listado en caché de una carpeta (los backends sin caché no hacen nada)"""
+
+    def close(self) -> None:
+        """Liberar los hilos de fondo del backend (al reemplazarlo tras un nuevo login o al apagar)"""
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+            self.prefetcher = None
+
+    def find_item_by_name(self, name: str, folder_id: Optional[str] = None) -> Optional[DriveItem]:
+        """Buscar un elemento por nombre en una carpeta"""
+        items = self.list_folder_contents(folder_id)
+
+        for item in items:
+            if item.name.lower() == name.lower():
+                return item
+
+        return None
+
+    def create_excel_file(self, folder_id: str, filename: str, data: Optional["pd.DataFrame"] = None,
+                          compare: str = COMPARE_OFF) -> Dict:
+        """Crear un archivo Excel en una carpeta.
+
+        Con ``compare="hash"`` (para salidas que se regeneran, como
+        ``combine_folder``) antes se busca el archivo por nombre y, si ya
+        tiene los mismos bytes, no se sube.
+        """
+        import pandas as pd
+
+        if not filename.endswith('.xlsx'):
+            filename += '.xlsx'
+
+        # Excel por defecto
+        if data is None:
+            data = pd.DataFrame({
+                'Columna1': ['Valor1', 'Valor2', 'Valor3'],
+                'Columna2': [10, 20, 30],
+                'Columna3': ['A', 'B', 'C']
+            })
+
+        if compare == COMPARE_OFF:
+            result = self.write(folder_id, filename, self._to_excel_bytes(data))
+        else:
+            result = self.write_if_changed(folder_id, filename, self._to_excel_bytes(data, reproducible=True))
+        if not result.get("skipped"):
+            print(f" Archivo '{filename}' creado exitosamente")
+        return result
+
+    def read_excel_file(self, file_id: str, compact: Optional[bool] = None) -> "pd.DataFrame":
+        """Leer un archivo Excel y retornar DataFrame.
+
+        Las llamadas concurrentes para el mismo archivo reciben el mismo
+        DataFrame: no debe modificarse en el sitio. ``compact`` (por defecto
+        ``COMPACT_DATAFRAMES``) reduce su memoria con ``compact_frame``.
+        """
+        if compact is None:
+            compact = config.COMPACT_DATAFRAMES
+        return self._flights.do(("read_excel", file_id, compact), lambda: self._read_excel(file_id, compact))
+
+    def _read_excel(self, file_id: str, compact: bool = False) -> "pd.DataFrame":
+        import pandas as pd
+
+        with span("graph_fetch"):
+            content = self.read(file_id)
+
+        try:
+            with span("parse"):
+                df = pd.read_excel(io.BytesIO(content), engine='openpyxl')
+        except Exception as e:
+            raise Exception(f"Error al leer archivo Excel: {e}")
+        return compact_frame(df, "read") if compact else df
+
+    def open_content(self, file_id: str, spool_max_size: int = 8 * 1024 * 1024) -> IO[bytes]:
+        """Contenido de un archivo como archivo temporal con ``seek`` (a disco si es grande).
+
+        Para lectores que necesitan acceso aleatorio (un .xlsx es un zip)
+        sin tener todo el archivo en memoria.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=spool_max_size)
+        try:
+            for chunk in self.stream(file_id):
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+    def upload_file(self, folder_id: str, filename: str, source: IO[bytes],
+                    passthrough: bool = True, verify: bool = True) -> Dict:
+        """Guardar un archivo subido (.xlsx, .csv o .parquet).
+
+        Un .xlsx se envía tal cual, por fragmentos y sin parsear las celdas
+        (se conservan fórmulas, estilos y todas las hojas); ``verify`` solo
+        revisa que sea un zip con las partes de un libro. Con
+        ``passthrough=False`` se lee con pandas y se vuelve a generar. CSV y
+        Parquet se convierten a .xlsx con el mismo nombre.
+        """
+        from utils.upload_formats import check_xlsx, frame_to_xlsx, read_table, upload_format, xlsx_name
+
+        extension = upload_format(filename)
+        if extension == ".xlsx" and passthrough:
+            if verify:
+                check_xlsx(source)
+            with span("graph_upload"):
+                result = self.write_stream(folder_id, filename, source)
+        elif extension == ".xlsx":
+            import pandas as pd
+
+            with span("parse"):
+                df = pd.read_excel(source, engine='openpyxl')
+            result = self.create_excel_file(folder_id, filename, df)
+        else:
+            with span("parse"):
+                df = read_table(source, extension)
+            with span("serialize"):
+                data = frame_to_xlsx(df)
+            with span("graph_upload"):
+                result = self.write(folder_id, xlsx_name(filename), data)
+        print(f" Archivo '{result['name']}' subido exitosamente")
+        return result
+
+    def update_excel_file(self, file_id: str, data: "pd.DataFrame", compare: str = COMPARE_HASH) -> Dict:
+        """Actualizar un archivo Excel existente, sin subirlo si el contenido no cambió.
+
+        ``hash`` genera el Excel y compara su hash con el de los metadatos (una
+        llamada). ``dataframe`` compara antes la huella del DataFrame con la de
+        la última escritura propia, si el cTag remoto sigue siendo el que dejó:
+        entonces no hace falta ni generar el Excel. ``off`` sube siempre.
+        Si no se sube, se devuelven los metadatos actuales con ``skipped``.
+        """
+        if compare not in COMPARE_MODES:
+            raise ValueError(f"Modo de comparación no soportado: {compare}")
+
+        current, fingerprint = None, None
+        if compare == COMPARE_DATAFRAME:
+            from utils.df_tools import frame_fingerprint
+
+            fingerprint = frame_fingerprint(data)
+            record = self.written_frames.get(file_id)
+            current = self._current_info(file_id)
+            if record and current and record["fingerprint"] == fingerprint and record["ctag"] == current.get('cTag'):
+                return self._skipped(current, COMPARE_DATAFRAME)
+
+        payload = self._to_excel_bytes(data, reproducible=compare != COMPARE_OFF)
+        if compare != COMPARE_OFF and current is None:
+            current = self._current_info(file_id)
+        if compare != COMPARE_OFF and self._same_content(payload, current):
+            result = self._skipped(current, COMPARE_HASH)
+        else:
+            result = self.replace(file_id, payload)
+            print(" Archivo actualizado exitosamente")
+
+        if fingerprint is not None:
+            self.written_frames.set(file_id, {"fingerprint": fingerprint, "ctag": result.get('cTag', '')})
+        return result
+
+    def write_if_changed(self, folder_id: str, filename: str, data: bytes,
+                         content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """``write`` que no sube nada si ya hay un archivo con ese nombre y los mismos bytes"""
+        try:
+            current = self.child_info(folder_id, filename)
+        except Exception:
+            current = None
+        if current is not None and 'file' in current and self._same_content(data, current):
+            return self._skipped(current, COMPARE_HASH)
+        return self.write(folder_id, filename, data, content_type)
+
+    def _current_info(self, file_id: str) -> Optional[Dict]:
+        # Si no se pueden leer los metadatos se sube igualmente
+        try:
+            return self.fresh_info(file_id)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _same_content(data: bytes, info: Optional[Dict]) -> bool:
+        from utils.content_hash import same_content
+
+        return info is not None and bool(same_content(data, info))
+
+    @staticmethod
+    def _skipped(info: Dict, mode: str) -> Dict:
+        UPLOADS_SKIPPED.inc(mode=mode)
+        print(" Sin cambios: no se sube el archivo")
+        return {**info, "skipped": True}
+
+    def delete_item(self, item_id: str) -> None:
+        """Eliminar un archivo o carpeta"""
+        self.delete(item_id)
+        print(" Elemento eliminado exitosamente")
+
+    def create_folder(self, parent_folder_id: str, folder_name: str) -> Dict:
+        """Crear una nueva carpeta"""
+        result = self.mkdir(parent_folder_id, folder_name)
+        print(f" Carpeta '{folder_name}' creada exitosamente")
+        return result
+
+    def copy_items(self, copies: List[Tuple[str, str, Optional[str]]],
+                   progress: Optional[Callable[[float, str], None]] = None,
+                   timeout: float = COPY_TIMEOUT_SECONDS) -> List[CopyOperation]:
+        """Lanzar varias copias ``(item_id, parent_id, name)`` y esperar a que terminen.
+
+        Todas se inician antes de consultar ninguna, así que el servidor las
+        hace en paralelo. ``progress`` recibe el avance medio (0..1).
+        """
+        operations = []
+        for item_id, parent_id, name in copies:
+            try:
+                operations.append(self.start_copy(item_id, parent_id, name))
+            except Exception as e:
+                operations.append(CopyOperation(item_id, parent_id, name, status="failed", error=str(e)))
+
+        deadline = time.monotonic() + timeout
+        interval = COPY_POLL_SECONDS
+        pending = [operation for operation in operations if not operation.finished]
+        while pending:
+            if time.monotonic() >= deadline:
+                for operation in pending:
+                    operation.status, operation.error = "failed", "Tiempo de espera agotado"
+                break
+            time.sleep(interval)
+            interval = min(interval * 2, COPY_POLL_MAX_SECONDS)
+            for operation in pending:
+                self.poll_copy(operation)
+            pending = [operation for operation in operations if not operation.finished]
+            if progress is not None:
+                done = sum(100.0 if op.finished else op.percent for op in operations) / (100.0 * len(operations))
+                progress(done, f"Copiando ({len(operations) - len(pending)}/{len(operations)})")
+        return operations
+
+    def copy_item(self, item_id: str, parent_id: str, name: Optional[str] = None) -> Dict:
+        """Copiar un elemento y devolver los metadatos de la copia"""
+        operation = self.copy_items([(item_id, parent_id, name)])[0]
+        if operation.status != "completed":
+            raise Exception(f"Error al copiar elemento: {operation.error}")
+        print(" Elemento copiado exitosamente")
+        return self.get_item_info(operation.resource_id)
+
+    def move_item(self, item_id: str, parent_id: str, name: Optional[str] = None) -> Dict:
+        """Mover un elemento a otra carpeta"""
+        result = self.move(item_id, parent_id, name)
+        print(" Elemento movido exitosamente")
+        return result
+
+    def get_item_info(self, item_id: str) -> Dict:
+        """Obtener información detallada de un elemento"""
+        return self._flights.do(("info", item_id), lambda: self.info(item_id))
+
+    @staticmethod
+    def _to_excel_bytes(data: "pd.DataFrame", reproducible: bool = False) -> bytes:
+        """Excel en bytes; ``reproducible`` fija las fechas (solo si se va a comparar el hash)"""
+        excel_buffer = io.BytesIO()
+        data.to_excel(excel_buffer, index=False, engine='openpyxl')
+        if reproducible:
+            return reproducible_xlsx(excel_buffer.getvalue())
+        return excel_buffer.getvalue()
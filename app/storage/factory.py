@@ -0,0 +1,26 @@
+from typing import Optional
+
+from app import config
+from app.storage.base import StorageBackend
+
+
+def create_storage_backend(token: Optional[dict] = None, backend: Optional[str] = None) -> StorageBackend:
+    """Crear el backend configurado en STORAGE_BACKEND e inicializar datacampus"""
+    backend = (backend or config.STORAGE_BACKEND).lower()
+
+    if backend == "local":
+        from app.storage.local_backend import LocalStorageBackend
+        storage = LocalStorageBackend(config.LOCAL_STORAGE_ROOT)
+    elif backend == "graph":
+        from app.one_drive.OD_manager import OneDriveManager
+        storage = OneDriveManager(token)
+    else:
+        raise Exception(f"Backend de almacenamiento desconocido: {backend}")
+
+    storage.initialize_datacampus()
+    return storage
+
+
+def requires_authentication(backend: Optional[str] = None) -> bool:
+    """Solo el backend de Graph necesita token de Microsoft"""
+    return (backend or config.STORAGE_BACKEND).lower() == "graph"
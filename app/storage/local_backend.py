@@ -0,0 +1,246 @@
+import base64
+import hashlib
+import mimetypes
+import mmap
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.storage.base import CopyOperation, DriveItem, StorageBackend, XLSX_CONTENT_TYPE
+
+LOCAL_DRIVE_ID = "local"
+ROOT_ID = "root"
+
+
+class LocalStorageBackend(StorageBackend):
+    """Backend sobre un directorio local (copia espejo de datacampus o árbol de CI).
+
+    Los ids son la ruta relativa codificada en base64 url-safe, así que son
+    opacos y seguros dentro de una URL igual que los de Graph. Las lecturas
+    grandes usan ``mmap`` para no duplicar el archivo en memoria al trocearlo.
+    """
+
+    def __init__(self, root_path: str):
+        super().__init__()
+        self.root = Path(root_path).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.authenticated = True
+        self.token = None
+
+    # --- Ids y rutas ---------------------------------------------------------
+
+    def _path(self, item_id: str) -> Path:
+        if not item_id or item_id == ROOT_ID:
+            return self.root
+        try:
+            relative = base64.urlsafe_b64decode(item_id + "=" * (-len(item_id) % 4)).decode("utf-8")
+        except Exception:
+            raise Exception(f"Id de elemento inválido: {item_id}")
+        path = (self.root / relative).resolve()
+        if path != self.root and self.root not in path.parents:
+            raise Exception(f"Id de elemento inválido: {item_id}")
+        return path
+
+    def _id(self, path: Path) -> str:
+        if path == self.root:
+            return ROOT_ID
+        relative = path.relative_to(self.root).as_posix()
+        return base64.urlsafe_b64encode(relative.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _existing(self, item_id: str) -> Path:
+        path = self._path(item_id)
+        if not path.exists():
+            raise Exception(f"Elemento no encontrado: {item_id}")
+        return path
+
+    @staticmethod
+    def _iso(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    @staticmethod
+    def _version(stat: os.stat_result) -> str:
+        return f"{stat.st_mtime_ns:x}{stat.st_size:x}"
+
+    def _to_json(self, path: Path) -> Dict:
+        """Metadatos con la forma de un driveItem de Graph"""
+        stat = path.stat()
+        item_id = self._id(path)
+        version = self._version(stat)
+        data = {
+            "id": item_id,
+            "name": "datacampus" if path == self.root else path.name,
+            "size": stat.st_size,
+            "createdDateTime": self._iso(stat.st_ctime),
+            "lastModifiedDateTime": self._iso(stat.st_mtime),
+            "eTag": f'"{{{item_id}}},{version}"',
+            "cTag": f'"c:{{{item_id}}},{version}"',
+            "parentReference": {
+                "driveId": LOCAL_DRIVE_ID,
+                "id": None if path == self.root else self._id(path.parent),
+            },
+        }
+        if path.is_dir():
+            data["size"] = 0
+            data["folder"] = {"childCount": sum(1 for _ in path.iterdir())}
+        else:
+            data["file"] = {"mimeType": mimetypes.guess_type(path.name)[0] or "application/octet-stream"}
+        return data
+
+    # --- Primitivas ------------------------------------------------------------
+
+    def initialize_datacampus(self) -> Tuple[str, str]:
+        """La raíz del directorio hace de carpeta datacampus"""
+        self.datacampus_drive_id = LOCAL_DRIVE_ID
+        self.datacampus_root_id = ROOT_ID
+        return self.datacampus_drive_id, self.datacampus_root_id
+
+    def list(self, folder_id: str) -> List[DriveItem]:
+        """Listar los hijos de una carpeta local"""
+        folder = self._existing(folder_id)
+        if not folder.is_dir():
+            raise Exception(f"Error al listar contenido: {folder_id} no es una carpeta")
+
+        items = []
+        for entry in sorted(os.scandir(folder), key=lambda e: e.name.lower()):
+            if entry.name.startswith("."):
+                continue
+            stat = entry.stat()
+            item_id = self._id(Path(entry.path))
+            version = self._version(stat)
+            items.append(DriveItem(
+                id=item_id,
+                name=entry.name,
+                type='folder' if entry.is_dir() else 'file',
+                size=0 if entry.is_dir() else stat.st_size,
+                created_datetime=self._iso(stat.st_ctime),
+                modified_datetime=self._iso(stat.st_mtime),
+                etag=f'"{{{item_id}}},{version}"',
+                ctag=f'"c:{{{item_id}}},{version}"'
+            ))
+        return items
+
+    def read(self, item_id: str) -> bytes:
+        """Leer un archivo completo"""
+        path = self._existing(item_id)
+        if path.is_dir():
+            raise Exception(f"Error al descargar archivo: {item_id} es una carpeta")
+        return path.read_bytes()
+
+    def stream(self, item_id: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Leer un archivo por fragmentos sobre un mapa de memoria"""
+        path = self._existing(item_id)
+        if path.stat().st_size == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(0, len(mapped), chunk_size):
+                yield mapped[offset:offset + chunk_size]
+
+    def write(self, folder_id: str, filename: str, data: bytes, content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """Crear o reemplazar un archivo por nombre"""
+        folder = self._existing(folder_id)
+        target = (folder / filename).resolve()
+        if target.parent != folder:
+            raise Exception(f"Error al crear archivo: nombre inválido '{filename}'")
+        self._atomic_write(target, data)
+        return self._to_json(target)
+
+    def write_stream(self, folder_id: str, filename: str, source: IO[bytes],
+                     content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """Copiar por bloques (sin cargar el archivo en memoria)"""
+        folder = self._existing(folder_id)
+        target = (folder / filename).resolve()
+        if target.parent != folder:
+            raise Exception(f"Error al crear archivo: nombre inválido '{filename}'")
+        self._atomic_write(target, source)
+        return self._to_json(target)
+
+    def replace(self, item_id: str, data: bytes, content_type: str = XLSX_CONTENT_TYPE) -> Dict:
+        """Reemplazar el contenido de un archivo existente"""
+        path = self._existing(item_id)
+        self._atomic_write(path, data)
+        return self._to_json(path)
+
+    def delete(self, item_id: str) -> None:
+        """Eliminar un archivo o carpeta"""
+        path = self._existing(item_id)
+        if path == self.root:
+            raise Exception("Error al eliminar elemento: no se puede eliminar la raíz")
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+
+    def mkdir(self, parent_id: str, name: str) -> Dict:
+        """Crear una carpeta; si existe se renombra como hace Graph ("nombre 1")"""
+        parent = self._existing(parent_id)
+        if not name or "/" in name or "\\" in name or name in (".", ".."):
+            raise Exception(f"Error al crear carpeta: nombre inválido '{name}'")
+        target = parent / name
+        suffix = 0
+        while target.exists():
+            suffix += 1
+            target = parent / f"{name} {suffix}"
+        target.mkdir()
+        return self._to_json(target)
+
+    def info(self, item_id: str) -> Dict:
+        """Metadatos de un elemento"""
+        return self._to_json(self._existing(item_id))
+
+    def fresh_info(self, item_id: str) -> Dict:
+        """Metadatos con el ``sha1Hash`` del archivo, para comparar antes de escribir"""
+        data = self.info(item_id)
+        if "file" in data:
+            digest = hashlib.sha1(self._existing(item_id).read_bytes()).hexdigest().upper()
+            data["file"]["hashes"] = {"sha1Hash": digest}
+        return data
+
+    def start_copy(self, item_id: str, parent_id: str, name: Optional[str] = None) -> CopyOperation:
+        """Copiar un archivo o carpeta; la operación termina al momento"""
+        source = self._existing(item_id)
+        target = self._target(parent_id, name or source.name, "copiar")
+        if source.is_dir():
+            if source == target or source in target.parents:
+                raise Exception("Error al copiar elemento: no se puede copiar una carpeta dentro de sí misma")
+            shutil.copytree(source, target)
+        else:
+            shutil.copy2(source, target)
+        return CopyOperation(item_id, parent_id, name, status="completed", percent=100.0, resource_id=self._id(target))
+
+    def move(self, item_id: str, parent_id: str, name: Optional[str] = None) -> Dict:
+        """Mover o renombrar; el id cambia porque es la ruta relativa"""
+        source = self._existing(item_id)
+        if source == self.root:
+            raise Exception("Error al mover elemento: no se puede mover la raíz")
+        target = self._target(parent_id, name or source.name, "mover")
+        if source.is_dir() and source in target.parents:
+            raise Exception("Error al mover elemento: no se puede mover una carpeta dentro de sí misma")
+        source.rename(target)
+        return self._to_json(target)
+
+    def _target(self, parent_id: str, name: str, action: str) -> Path:
+        folder = self._existing(parent_id)
+        target = (folder / name).resolve()
+        if not folder.is_dir() or target.parent != folder:
+            raise Exception(f"Error al {action} elemento: destino inválido '{name}'")
+        if target.exists():
+            raise Exception(f"Error al {action} elemento: ya existe '{name}' en la carpeta destino")
+        return target
+
+    @staticmethod
+    def _atomic_write(target: Path, data: Union[bytes, IO[bytes]]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(data, bytes):
+                    f.write(data)
+                else:
+                    shutil.copyfileobj(data, f, 1024 * 1024)
+            os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
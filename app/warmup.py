@@ -0,0 +1,51 @@
+import importlib
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from app import config
+
+# Lo que la API importa de forma diferida en la primera petición que lo necesita
+HEAVY_MODULES = (
+    "pandas",
+    "openpyxl",
+    "pandas.io.excel._openpyxl",
+    "requests",
+    "msal",
+    "utils.df_tools",
+    "app.jobs.handlers",
+)
+
+
+def preload(modules: Iterable[str] = HEAVY_MODULES) -> Dict[str, float]:
+    """Importar los módulos pesados; devuelve los segundos que costó cada uno"""
+    timings = {}
+    for name in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f" No se pudo precargar {name}: {e}")
+            continue
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+def start_warmup(delay: Optional[float] = None) -> Optional[threading.Thread]:
+    """Precargar en un hilo de fondo tras ``delay`` segundos (None si está desactivado).
+
+    El retraso deja que uvicorn termine de abrir el socket y responda a
+    /health antes de que las importaciones compitan por el GIL.
+    """
+    if not config.WARMUP_ENABLED:
+        return None
+    delay = config.WARMUP_DELAY_SECONDS if delay is None else delay
+
+    def run():
+        time.sleep(delay)
+        timings = preload()
+        print(f" Precarga de módulos completada en {sum(timings.values()):.2f}s")
+
+    thread = threading.Thread(target=run, name="warmup", daemon=True)
+    thread.start()
+    return thread
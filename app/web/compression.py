@@ -0,0 +1,223 @@
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+
+from app import config
+from app.monitoring.timing import span
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+# Tipos que merece la pena comprimir (Excel, Parquet o imágenes ya van comprimidos)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/xml", "application/javascript")
+
+# Por encima de este tamaño la compresión se hace en un hilo para no bloquear el event loop
+OFFLOAD_BYTES = 64 * 1024
+
+_ACCEPT_ITEM = re.compile(r"\s*([A-Za-z0-9*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*")
+
+
+class _Gzip:
+    def __init__(self, level: int = 6):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Z_SYNC_FLUSH: cada fragmento llega al cliente sin esperar al siguiente
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality: int = 4):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int = 3):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings() -> Dict[str, type]:
+    """Codificaciones soportadas en orden de preferencia del servidor"""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = _Zstd
+    if brotli is not None:
+        encodings["br"] = _Brotli
+    encodings["gzip"] = _Gzip
+    return encodings
+
+
+def negotiate(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """Elegir la codificación según ``Accept-Encoding`` (q-values y comodín ``*``)"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        match = _ACCEPT_ITEM.fullmatch(item)
+        if not match:
+            continue
+        try:
+            weights[match.group(1).lower()] = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        # Ante empate manda el orden del servidor (zstd > br > gzip)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _is_compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    content_type = ""
+    for name, value in headers:
+        name = name.lower()
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value.decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compressed_headers(headers: List[Tuple[bytes, bytes]], encoding: str) -> List[Tuple[bytes, bytes]]:
+    result = []
+    vary = None
+    for name, value in headers:
+        lower = name.lower()
+        if lower == b"content-length":
+            continue
+        if lower == b"vary":
+            vary = value
+            continue
+        if lower == b"etag" and not value.startswith(b"W/"):
+            # El cuerpo ya no es idéntico byte a byte: la etiqueta pasa a ser débil
+            value = b"W/" + value
+        result.append((name, value))
+    result.append((b"content-encoding", encoding.encode("latin-1")))
+    result.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+    return result
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime las respuestas según ``Accept-Encoding``.
+
+    Soporta gzip siempre y brotli/zstd si están instalados (``brotli``,
+    ``zstandard``). Las respuestas completas por debajo de ``minimum_size``
+    se envían tal cual. Las respuestas en streaming (CSV, NDJSON) se
+    comprimen fragmento a fragmento, y los fragmentos grandes en un hilo.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = config.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.minimum_size < 0:
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+
+        encoding = negotiate(accept, list(self.encodings)) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.encodings[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str, compressor_class: type, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.compressor_class = compressor_class
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            status = message["status"]
+            headers = list(message.get("headers", []))
+            if status < 200 or status in (204, 304) or not _is_compressible(headers):
+                self.passthrough = True
+                await self._send(message)
+            else:
+                # Se retiene hasta saber si el cuerpo supera el umbral
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            # Las respuestas en streaming se comprimen desde el primer fragmento:
+            # retenerlas hasta el umbral retrasaría los eventos NDJSON
+            if not more_body and len(body) < self.minimum_size:
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+            self._start_compressed()
+
+        chunk = await self._compress(body, final=not more_body)
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _start_compressed(self) -> None:
+        self.compressor = self.compressor_class()
+        headers = _compressed_headers(list(self.start_message.get("headers", [])), self.encoding)
+        self.start_message = {**self.start_message, "headers": headers}
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        def work() -> bytes:
+            with span("compress"):
+                chunk = self.compressor.compress(data) if data else b""
+                return chunk + self.compressor.finish() if final else chunk
+
+        if len(data) >= OFFLOAD_BYTES:
+            chunk = await anyio.to_thread.run_sync(work)
+        else:
+            chunk = work()
+
+        if self.start_message is not None:
+            # La cabecera se envía con el primer fragmento comprimido, así
+            # Server-Timing ya incluye la fase "compress" de respuestas completas
+            await self._send(self.start_message)
+            self.start_message = None
+        return chunk
@@ -0,0 +1,93 @@
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request, Response
+
+# Los clientes pueden guardar la respuesta pero deben revalidarla siempre
+CACHE_CONTROL = "private, no-cache"
+
+# Las etiquetas de Graph contienen comas ("{GUID},3"), así que no basta con split(",")
+_ENTITY_TAG = re.compile(r'(?:W/)?"[^"]*"')
+
+
+def make_etag(*parts: str) -> str:
+    """ETag fuerte derivado de validadores de Graph (cTag/eTag) y de la variante servida"""
+    digest = hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def quote_etag(value: str) -> str:
+    """Graph ya entrega el eTag entre comillas; se normaliza por si acaso"""
+    value = value.strip()
+    if value.startswith('"') or value.startswith('W/"'):
+        return value
+    return f'"{value}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110 §13.1.2)"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(candidate) == target for candidate in _ENTITY_TAG.findall(if_none_match))
+
+
+def http_date(iso_datetime: Optional[str]) -> Optional[str]:
+    """Convertir ``2024-05-01T10:00:00Z`` (Graph) a fecha HTTP"""
+    if not iso_datetime:
+        return None
+    try:
+        parsed = datetime.fromisoformat(iso_datetime.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return format_datetime(parsed.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def latest(iso_datetimes: Iterable[str]) -> Optional[str]:
+    values = [value for value in iso_datetimes if value]
+    return max(values) if values else None
+
+
+def validator_headers(etag: str, last_modified: Optional[str] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[str] = None) -> Optional[Response]:
+    """Respuesta 304 si el cliente ya tiene esta versión; ``None`` en caso contrario.
+
+    If-None-Match tiene prioridad; If-Modified-Since solo se usa si el
+    cliente no envía etiquetas.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, etag)
+    else:
+        fresh = _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+
+    if fresh:
+        return Response(status_code=304, headers=validator_headers(etag, last_modified))
+    return None
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: Optional[str]) -> bool:
+    if not if_modified_since or not last_modified:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
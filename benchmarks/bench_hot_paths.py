@@ -0,0 +1,250 @@
+"""Micro-benchmarks de las rutas de parseo y serialización.
+
+Genera libros .xlsx deterministas (formas ``narrow`` y ``wide``), mide las
+rutas calientes con Graph simulado y escribe resultados en JSON. Con
+``--baseline`` compara contra una ejecución anterior y sale con código 1 si
+alguna medición empeora más que la tolerancia.
+
+Uso (desde la raíz del repositorio)::
+
+    python -m benchmarks.bench_hot_paths --sizes 1000,10000 --output bench.json
+    python -m benchmarks.bench_hot_paths --baseline bench.json --tolerance 0.15
+    python -m benchmarks.bench_hot_paths --sizes 1000000 --only excel_bytes_to_df
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import app.api_server as api_server
+from app.one_drive.OD_manager import OneDriveManager
+from utils.df_tools import excel_bytes_to_df
+
+SHAPES = {"narrow": 5, "wide": 50}
+DEFAULT_SIZES = "1000,10000,100000"
+CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache")
+BENCHMARKS = ("excel_bytes_to_df", "read_excel_file", "create_excel_file", "content_json", "download_csv")
+
+
+def generate_workbook(rows: int, cols: int, seed: int = 42) -> bytes:
+    """Libro con columnas numéricas, de texto repetido y fechas (reproducible por semilla)"""
+    path = os.path.join(CACHE_DIR, f"wb_{rows}x{cols}_{seed}.xlsx")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    rng = np.random.default_rng(seed)
+    columns = []
+    for c in range(cols):
+        kind = c % 4
+        if kind == 0:
+            columns.append(rng.integers(0, 1_000_000, rows).tolist())
+        elif kind == 1:
+            values = rng.normal(1000, 250, rows).round(2)
+            values[rng.random(rows) < 0.02] = np.nan
+            columns.append([None if np.isnan(v) else float(v) for v in values])
+        elif kind == 2:
+            labels = np.array([f"CLIENTE-{i:04d}" for i in range(500)])
+            columns.append(labels[rng.integers(0, 500, rows)].tolist())
+        else:
+            dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1500, rows), unit="D")
+            columns.append(dates.to_pydatetime().tolist())
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Datos")
+    ws.append([f"col_{c}" for c in range(cols)])
+    for row in zip(*columns):
+        ws.append(row)
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(buffer.getvalue())
+    return buffer.getvalue()
+
+
+class FakeGraphResponse:
+    def __init__(self, status_code: int = 200, content: bytes = b"", payload: Optional[Dict] = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+        self.text = ""
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+
+def fake_graph(workbook: bytes) -> Callable:
+    """Sustituto de ``requests.request`` que responde como Graph sin red"""
+    def request(method, url, **kwargs):
+        if method == "GET" and url.endswith("/content"):
+            return FakeGraphResponse(content=workbook)
+        if method == "PUT":
+            body = kwargs.get("data")
+            if hasattr(body, "read"):
+                body.read()
+            return FakeGraphResponse(status_code=201, payload={"id": "bench-file", "name": "bench.xlsx"})
+        return FakeGraphResponse(payload={"id": "bench-file", "name": "bench.xlsx"})
+    return request
+
+
+class StubManager:
+    """Manager que entrega un DataFrame ya parseado (o el libro ya descargado) para aislar la conversión de salida"""
+
+    datacampus_root_id = "root"
+
+    def __init__(self, df: pd.DataFrame, workbook: bytes = b""):
+        self.df = df
+        self.workbook = workbook
+
+    def read_excel_file(self, file_id: str) -> pd.DataFrame:
+        return self.df
+
+    def open_content(self, file_id: str) -> io.BytesIO:
+        return io.BytesIO(self.workbook)
+
+    def get_item_info(self, item_id: str) -> Dict:
+        return {"id": item_id, "name": "bench.xlsx"}
+
+
+def time_call(fn: Callable, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+@lru_cache(maxsize=2)
+def parsed_workbook(rows: int, shape: str) -> pd.DataFrame:
+    return excel_bytes_to_df(generate_workbook(rows, SHAPES[shape]))
+
+
+def run_case(name: str, rows: int, shape: str, repeat: int) -> Dict:
+    workbook = generate_workbook(rows, SHAPES[shape])
+    df = parsed_workbook(rows, shape)
+
+    manager = OneDriveManager({"access_token": "benchmark"})
+    manager.datacampus_drive_id = "bench-drive"
+    manager.datacampus_root_id = "root"
+    # Se mide la ruta completa: sin cachés de metadatos ni de contenido
+    manager.listing_cache.ttl = manager.item_cache.ttl = manager.content_cache.ttl = 0
+
+    client = None
+    if name in ("content_json", "download_csv"):
+        api_server.app.dependency_overrides[api_server.get_manager] = lambda: StubManager(df, workbook)
+        client = TestClient(api_server.app)
+
+    cases = {
+        "excel_bytes_to_df": lambda: excel_bytes_to_df(workbook),
+        "read_excel_file": lambda: manager.read_excel_file("bench-file"),
+        "create_excel_file": lambda: manager.create_excel_file("root", "bench", df),
+        "content_json": lambda: client.get("/files/bench-file/content").content,
+        "download_csv": lambda: client.get("/files/bench-file/download").content,
+    }
+
+    with mock.patch("requests.request", side_effect=fake_graph(workbook)), \
+            mock.patch("builtins.print"):
+        timings = time_call(cases[name], repeat)
+
+    api_server.app.dependency_overrides.clear()
+    return {
+        "name": name,
+        "shape": shape,
+        "rows": rows,
+        "cols": SHAPES[shape],
+        "workbook_bytes": len(workbook),
+        "repeat": repeat,
+        "min_s": round(min(timings), 6),
+        "median_s": round(statistics.median(timings), 6),
+        "max_s": round(max(timings), 6),
+    }
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[Dict]:
+    """Comparar medianas con la línea base; devuelve las regresiones"""
+    previous = {(r["name"], r["shape"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get((result["name"], result["shape"], result["rows"]))
+        if not base:
+            continue
+        ratio = result["median_s"] / base["median_s"] if base["median_s"] else 1.0
+        result["baseline_median_s"] = base["median_s"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de parseo/serialización")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Filas separadas por coma (ej. 1000,10000,1000000)")
+    parser.add_argument("--shapes", default="narrow,wide", help="Formas: narrow (5 columnas), wide (50 columnas)")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="Benchmarks a ejecutar, separados por coma")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por caso")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto, salida estándar)")
+    parser.add_argument("--baseline", help="Resultados JSON anteriores contra los que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Empeoramiento permitido (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for shape in args.shapes.split(","):
+        for rows in (int(size) for size in args.sizes.split(",")):
+            for name in args.only.split(","):
+                result = run_case(name, rows, shape, args.repeat)
+                results.append(result)
+                print(f"{name:<20} {shape:<7} {rows:>9} filas  mediana {result['median_s']:.4f}s",
+                      file=sys.stderr)
+
+    report = {"environment": environment(), "results": results}
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESIÓN {r['name']} {r['shape']} {r['rows']}: x{r['ratio']} "
+                  f"({r['baseline_median_s']}s -> {r['median_s']}s)", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Tiempo de importación de los puntos de entrada (arranque en frío).
+
+Cada medición se hace en un intérprete nuevo. Muestra la mediana del tiempo
+de ``import``, los módulos más caros según ``python -X importtime`` y qué
+librerías pesadas quedaron cargadas. Con ``--forbid`` sale con código 1 si
+alguna de ellas se importa durante el arranque.
+
+Uso (desde la raíz del repositorio)::
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --modules app.api_server --repeat 10 --top 20
+    python -m benchmarks.import_time --forbid pandas,openpyxl,msal,requests
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_MODULES = "app.api_server,app.main"
+HEAVY = ("pandas", "numpy", "openpyxl", "msal", "requests", "dotenv")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    # Sin precarga de fondo: solo interesa lo que cuesta el import en sí
+    env["WARMUP_ENABLED"] = "false"
+    return subprocess.run([sys.executable, *args], cwd=root, env=env, capture_output=True, text=True, check=True)
+
+
+def measure(module: str, repeat: int) -> Dict:
+    """Mediana de ``repeat`` importaciones en frío y librerías pesadas cargadas"""
+    samples, loaded = [], []
+    for _ in range(repeat):
+        result = json.loads(_run(["-c", _PROBE.format(module=module, heavy=HEAVY)]).stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        loaded = result["loaded"]
+    return {"module": module, "median_s": statistics.median(samples), "min_s": min(samples), "loaded": loaded}
+
+
+def slowest_imports(module: str, top: int) -> List[Tuple[str, float]]:
+    """Módulos con mayor tiempo acumulado según ``-X importtime``"""
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de importación en frío")
+    parser.add_argument("--modules", default=DEFAULT_MODULES, help="Módulos a medir, separados por coma")
+    parser.add_argument("--repeat", type=int, default=5, help="Intérpretes nuevos por módulo")
+    parser.add_argument("--top", type=int, default=10, help="Importaciones más lentas a mostrar")
+    parser.add_argument("--forbid", default="", help="Librerías que no deben cargarse al importar (coma)")
+    parser.add_argument("--output", help="Guardar resultados en JSON")
+    args = parser.parse_args(argv)
+
+    forbidden = {name.strip() for name in args.forbid.split(",") if name.strip()}
+    results, failed = [], False
+    for module in args.modules.split(","):
+        result = measure(module.strip(), args.repeat)
+        result["slowest"] = slowest_imports(module.strip(), args.top)
+        results.append(result)
+
+        print(f"\n{result['module']}: {result['median_s'] * 1000:.0f} ms (mediana), {result['min_s'] * 1000:.0f} ms (mín)")
+        print(f"  Cargadas: {', '.join(result['loaded']) or 'ninguna de ' + ', '.join(HEAVY)}")
+        for name, seconds in result["slowest"]:
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+        unexpected = forbidden & set(result["loaded"])
+        if unexpected:
+            print(f"  ERROR: se importaron {', '.join(sorted(unexpected))} durante el arranque")
+            failed = True
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
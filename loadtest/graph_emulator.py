@@ -0,0 +1,565 @@
+"""Emulador local de los endpoints de Microsoft Graph que usa OneDriveManager.
+
+Mantiene un árbol de carpetas y libros en memoria y responde a sharedWithMe,
+children (paginado), items, content GET/PUT, creación de carpetas, borrado,
+copia (202 + URL de seguimiento), movimiento, sesiones de carga, delta y
+suscripciones. Permite simular latencia, ancho de banda y limitación
+(429 con Retry-After). Tras cada cambio avisa a las suscripciones como lo
+haría Graph, y ``POST /_emulator/notify`` simula una edición externa.
+
+Uso::
+
+    python -m loadtest.graph_emulator --port 8100 --latency-ms 40 --rate-limit 50
+    GRAPH_BASE_URL=http://127.0.0.1:8100/v1.0 python -m uvicorn app.api_server:app
+"""
+import argparse
+import asyncio
+import io
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import openpyxl
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from utils.content_hash import quick_xor_hash
+
+DRIVE_ID = "emulated-drive"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@dataclass
+class EmulatorSettings:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    bandwidth_mbps: float = 0.0
+    page_size: int = 200
+    rate_limit: float = 0.0
+    burst: int = 20
+    retry_after: int = 1
+    throttle_probability: float = 0.0
+    notifications: bool = True
+    notification_delay: float = 0.05
+    copy_seconds: float = 0.2
+    # Como OneDrive para la Empresa con una carpeta compartida desde el drive de otro
+    # usuario: delta fuera de la raíz responde 400 y la suscripción al drive, 403
+    shared_folder: bool = False
+
+
+@dataclass
+class EmulatedItem:
+    id: str
+    name: str
+    parent_id: Optional[str]
+    is_folder: bool
+    content: bytes = b""
+    created: str = ""
+    modified: str = ""
+    version: int = 1
+    children: List[str] = field(default_factory=list)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def make_workbook(rows: int, cols: int = 5, seed: int = 0) -> bytes:
+    """Libro .xlsx pequeño con datos deterministas"""
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Datos")
+    ws.append([f"col_{c}" for c in range(cols)])
+    for r in range(rows):
+        ws.append([r if c == 0 else (f"CLIENTE-{rng.randint(0, 300):04d}" if c % 2 else rng.random() * 1000)
+                   for c in range(cols)])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+class GraphEmulator:
+    """Estado en memoria del drive emulado"""
+
+    def __init__(self, settings: Optional[EmulatorSettings] = None):
+        self.settings = settings or EmulatorSettings()
+        self.items: Dict[str, EmulatedItem] = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.throttled_count = 0
+        self._tokens = float(self.settings.burst)
+        self._last_refill = time.monotonic()
+        # Registro de cambios para delta: (secuencia, id, padre)
+        self.changes: List[Tuple[int, str, Optional[str]]] = []
+        self.subscriptions: Dict[str, Dict] = {}
+        self.notifications_sent = 0
+        # Copias en curso por id de seguimiento y sesiones de carga abiertas
+        self.monitors: Dict[str, Dict] = {}
+        self.upload_sessions: Dict[str, Dict] = {}
+        self.root_id = self._add("datacampus", None, is_folder=True)
+
+    # --- Estado ---------------------------------------------------------
+
+    def _add(self, name: str, parent_id: Optional[str], is_folder: bool, content: bytes = b"") -> str:
+        item_id = uuid.uuid4().hex.upper()[:34]
+        now = _now()
+        self.items[item_id] = EmulatedItem(item_id, name, parent_id, is_folder, content, now, now)
+        if parent_id:
+            self.items[parent_id].children.append(item_id)
+        self.record_change(item_id, parent_id)
+        return item_id
+
+    def record_change(self, item_id: str, parent_id: Optional[str]) -> None:
+        self.changes.append((len(self.changes) + 1, item_id, parent_id))
+
+    def update_content(self, item: EmulatedItem, content: bytes) -> None:
+        item.content, item.modified = content, _now()
+        item.version += 1
+        self.record_change(item.id, item.parent_id)
+
+    def delta(self, since: int) -> List[Dict]:
+        """Estado actual de los elementos cambiados después de ``since``"""
+        latest: Dict[str, Optional[str]] = {}
+        for seq, item_id, parent_id in self.changes[since:]:
+            latest[item_id] = parent_id
+        result = []
+        for item_id, parent_id in latest.items():
+            if item_id in self.items:
+                result.append(self.to_json(self.items[item_id]))
+            else:
+                result.append({"id": item_id, "deleted": {"state": "deleted"},
+                               "parentReference": {"driveId": DRIVE_ID, "id": parent_id}})
+        return result
+
+    def seed(self, folders: int = 5, files_per_folder: int = 5, rows: int = 100, depth: int = 2) -> None:
+        """Poblar el drive con un árbol de carpetas y libros"""
+        workbook = make_workbook(rows)
+        with self.lock:
+            level = [self.root_id]
+            for d in range(depth):
+                next_level = []
+                for parent in level:
+                    for f in range(files_per_folder):
+                        self._add(f"reporte_{d}_{f}.xlsx", parent, is_folder=False, content=workbook)
+                    for i in range(folders if d == 0 else max(1, folders // 2)):
+                        next_level.append(self._add(f"carpeta_{d}_{i}", parent, is_folder=True))
+                level = next_level
+
+    def find_child(self, parent_id: str, name: str) -> Optional[EmulatedItem]:
+        for child_id in self.items[parent_id].children:
+            child = self.items[child_id]
+            if child.name.lower() == name.lower():
+                return child
+        return None
+
+    def copy(self, item_id: str, parent_id: str, name: str) -> str:
+        """Copia recursiva de un elemento (los bytes se comparten, como en el servidor)"""
+        source = self.items[item_id]
+        new_id = self._add(name, parent_id, source.is_folder, source.content)
+        for child_id in list(source.children):
+            self.copy(child_id, new_id, self.items[child_id].name)
+        return new_id
+
+    def move(self, item: EmulatedItem, parent_id: str, name: str) -> None:
+        self.record_change(item.id, item.parent_id)
+        self.items[item.parent_id].children.remove(item.id)
+        self.items[parent_id].children.append(item.id)
+        item.parent_id, item.name, item.modified = parent_id, name, _now()
+        item.version += 1
+        self.record_change(item.id, parent_id)
+
+    def remove(self, item_id: str) -> None:
+        item = self.items.pop(item_id)
+        for child_id in list(item.children):
+            self.remove(child_id)
+        if item.parent_id in self.items:
+            self.items[item.parent_id].children.remove(item_id)
+        self.record_change(item_id, item.parent_id)
+
+    def to_json(self, item: EmulatedItem) -> Dict:
+        data = {
+            "id": item.id,
+            "name": item.name,
+            "size": self._size(item),
+            "createdDateTime": item.created,
+            "lastModifiedDateTime": item.modified,
+            "eTag": f'"{{{item.id}}},{item.version}"',
+            "cTag": f'"c:{{{item.id}}},{item.version}"',
+            "parentReference": {"driveId": DRIVE_ID, "id": item.parent_id},
+        }
+        if item.is_folder:
+            data["folder"] = {"childCount": len(item.children)}
+        else:
+            data["file"] = {"mimeType": XLSX_MIME, "hashes": {"quickXorHash": quick_xor_hash(item.content)}}
+        return data
+
+    def _size(self, item: EmulatedItem) -> int:
+        if not item.is_folder:
+            return len(item.content)
+        return sum(self._size(self.items[c]) for c in item.children)
+
+    # --- Simulación de red y limitación ----------------------------------
+
+    def _take_token(self) -> bool:
+        rate = self.settings.rate_limit
+        if rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(self.settings.burst, self._tokens + (now - self._last_refill) * rate)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def throttled(self) -> bool:
+        self.request_count += 1
+        if not self._take_token() or random.random() < self.settings.throttle_probability:
+            self.throttled_count += 1
+            return True
+        return False
+
+    async def delay(self, payload_bytes: int = 0) -> None:
+        seconds = (self.settings.latency_ms + random.uniform(0, self.settings.jitter_ms)) / 1000
+        if self.settings.bandwidth_mbps > 0:
+            seconds += payload_bytes * 8 / (self.settings.bandwidth_mbps * 1_000_000)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+
+def create_app(emulator: GraphEmulator) -> FastAPI:
+    app = FastAPI(title="Graph emulator")
+    app.state.emulator = emulator
+
+    def error(status: int, code: str, message: str) -> JSONResponse:
+        return JSONResponse({"error": {"code": code, "message": message}}, status_code=status)
+
+    pending_notification = {"task": None}
+
+    async def send_notifications(delay: float = 0.0) -> int:
+        """Avisar a cada suscripción, como Graph, sin detallar qué cambió"""
+        await asyncio.sleep(delay)
+        sent = 0
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            for subscription in list(emulator.subscriptions.values()):
+                payload = {"value": [{
+                    "subscriptionId": subscription["id"],
+                    "clientState": subscription.get("clientState"),
+                    "changeType": "updated",
+                    "resource": subscription["resource"],
+                    "subscriptionExpirationDateTime": subscription["expirationDateTime"],
+                    "tenantId": "emulated-tenant",
+                }]}
+                try:
+                    await client.post(subscription["notificationUrl"], json=payload)
+                    sent += 1
+                except httpx.HTTPError as e:
+                    print(f" No se pudo notificar a {subscription['notificationUrl']}: {e}")
+        emulator.notifications_sent += sent
+        return sent
+
+    def schedule_notifications() -> None:
+        # Los cambios seguidos se agrupan en un solo aviso
+        if not emulator.settings.notifications or not emulator.subscriptions:
+            return
+        task = pending_notification["task"]
+        if task is None or task.done():
+            pending_notification["task"] = asyncio.get_running_loop().create_task(
+                send_notifications(emulator.settings.notification_delay))
+
+    @app.middleware("http")
+    async def simulate_network(request: Request, call_next):
+        if request.url.path.startswith("/_emulator"):
+            return await call_next(request)
+        if emulator.throttled():
+            await emulator.delay()
+            return JSONResponse(
+                {"error": {"code": "activityLimitReached", "message": "Throttled"}},
+                status_code=429,
+                headers={"Retry-After": str(emulator.settings.retry_after)},
+            )
+        response = await call_next(request)
+        await emulator.delay(int(response.headers.get("content-length", 0)))
+        return response
+
+    @app.get("/v1.0/me/drive/sharedWithMe")
+    async def shared_with_me():
+        root = emulator.items[emulator.root_id]
+        return {"value": [{
+            "id": "shared-" + root.id,
+            "name": root.name,
+            "remoteItem": {"id": root.id, "parentReference": {"driveId": DRIVE_ID}},
+        }]}
+
+    @app.api_route("/v1.0/drives/{drive_id}/items/{item_path:path}", methods=["GET", "PUT", "POST", "PATCH", "DELETE"])
+    async def items(drive_id: str, item_path: str, request: Request):
+        if drive_id != DRIVE_ID:
+            return error(404, "itemNotFound", "Drive no encontrado")
+
+        # GET items/{parent}:/{nombre} (metadatos por ruta) y
+        # PUT items/{parent}:/{nombre}:/content  (crear o reemplazar por nombre)
+        if ":/" in item_path:
+            parent_id, _, rest = item_path.partition(":/")
+            filename = rest.rsplit(":/", 1)[0].rstrip(":")
+            if request.method == "GET" and parent_id in emulator.items:
+                existing = emulator.find_child(parent_id, filename)
+                if existing:
+                    return emulator.to_json(existing)
+            if request.method == "POST" and rest.endswith(":/createUploadSession") and parent_id in emulator.items:
+                session_id = uuid.uuid4().hex
+                emulator.upload_sessions[session_id] = {"parent": parent_id, "name": filename, "data": bytearray()}
+                return {"uploadUrl": str(request.base_url).rstrip("/") + f"/v1.0/_upload/{session_id}",
+                        "expirationDateTime": _now()}
+            if request.method != "PUT" or parent_id not in emulator.items:
+                return error(404, "itemNotFound", "Elemento no encontrado")
+            body = await request.body()
+            with emulator.lock:
+                existing = emulator.find_child(parent_id, filename)
+                if existing:
+                    emulator.update_content(existing, body)
+                    response = JSONResponse(emulator.to_json(existing), status_code=200)
+                else:
+                    new_id = emulator._add(filename, parent_id, is_folder=False, content=body)
+                    response = JSONResponse(emulator.to_json(emulator.items[new_id]), status_code=201)
+            schedule_notifications()
+            return response
+
+        item_id, _, action = item_path.partition("/")
+        item = emulator.items.get(item_id)
+        if item is None:
+            return error(404, "itemNotFound", "Elemento no encontrado")
+
+        if action == "" and request.method == "GET":
+            return emulator.to_json(item)
+
+        if action == "" and request.method == "DELETE":
+            with emulator.lock:
+                emulator.remove(item_id)
+            schedule_notifications()
+            return Response(status_code=204)
+
+        if action == "" and request.method == "PATCH":
+            data = await request.json()
+            parent_id = data.get("parentReference", {}).get("id") or item.parent_id
+            name = data.get("name") or item.name
+            if parent_id not in emulator.items:
+                return error(404, "itemNotFound", "Carpeta destino no encontrada")
+            with emulator.lock:
+                existing = emulator.find_child(parent_id, name)
+                if existing and existing.id != item_id:
+                    return error(409, "nameAlreadyExists", "Ya existe un elemento con ese nombre")
+                emulator.move(item, parent_id, name)
+            schedule_notifications()
+            return emulator.to_json(item)
+
+        if action == "copy" and request.method == "POST":
+            data = await request.json()
+            parent_id = data.get("parentReference", {}).get("id")
+            name = data.get("name") or item.name
+            if parent_id not in emulator.items:
+                return error(404, "itemNotFound", "Carpeta destino no encontrada")
+            if emulator.find_child(parent_id, name):
+                return error(409, "nameAlreadyExists", "Ya existe un elemento con ese nombre")
+            # Como Graph: 202 y una URL (sin autenticación) para seguir la copia
+            monitor_id = uuid.uuid4().hex
+            emulator.monitors[monitor_id] = {"source": item_id, "parent": parent_id, "name": name,
+                                             "started": time.monotonic(), "resource_id": None}
+            location = str(request.base_url).rstrip("/") + f"/v1.0/monitor/{monitor_id}"
+            return Response(status_code=202, headers={"Location": location})
+
+        if action == "children" and request.method == "GET":
+            start = int(request.query_params.get("$skiptoken", 0))
+            page_size = emulator.settings.page_size
+            children = item.children[start:start + page_size]
+            payload = {"value": [emulator.to_json(emulator.items[c]) for c in children]}
+            if start + page_size < len(item.children):
+                payload["@odata.nextLink"] = str(request.url.include_query_params(**{"$skiptoken": start + page_size}))
+            return payload
+
+        if action == "children" and request.method == "POST":
+            data = await request.json()
+            name = data["name"]
+            with emulator.lock:
+                suffix = 1
+                while emulator.find_child(item_id, name):
+                    suffix += 1
+                    name = f"{data['name']} {suffix}"
+                new_id = emulator._add(name, item_id, is_folder="folder" in data)
+            schedule_notifications()
+            return JSONResponse(emulator.to_json(emulator.items[new_id]), status_code=201)
+
+        if action == "content" and request.method == "GET":
+            return Response(item.content, media_type=XLSX_MIME)
+
+        if action == "content" and request.method == "PUT":
+            body = await request.body()
+            with emulator.lock:
+                emulator.update_content(item, body)
+            schedule_notifications()
+            return emulator.to_json(item)
+
+        if action == "delta" and request.method == "GET":
+            if emulator.settings.shared_folder:
+                return error(400, "invalidRequest", "Delta solo se admite en la raíz del drive")
+            token = request.query_params.get("token", "0")
+            with emulator.lock:
+                since = len(emulator.changes)
+                changes = [] if token == "latest" else emulator.delta(int(token))
+            next_link = request.url.replace_query_params(token=since)
+            return {"value": changes, "@odata.deltaLink": str(next_link)}
+
+        return error(400, "invalidRequest", f"Operación no soportada: {request.method} {action}")
+
+    @app.api_route("/v1.0/_upload/{session_id}", methods=["GET", "PUT", "DELETE"])
+    async def upload_session(session_id: str, request: Request):
+        session = emulator.upload_sessions.get(session_id)
+        if session is None:
+            return error(404, "itemNotFound", "Sesión de carga no encontrada")
+        if request.method == "GET":
+            return {"nextExpectedRanges": [f"{len(session['data'])}-"], "expirationDateTime": _now()}
+        if request.method == "DELETE":
+            emulator.upload_sessions.pop(session_id)
+            return Response(status_code=204)
+
+        # Content-Range: bytes inicio-fin/total; los fragmentos deben llegar en orden
+        start, _, total = request.headers["content-range"].removeprefix("bytes ").replace("/", "-").split("-")
+        if int(start) != len(session["data"]):
+            return error(416, "invalidRange", "Fragmento fuera de orden")
+        session["data"] += await request.body()
+        if len(session["data"]) < int(total):
+            return JSONResponse({"nextExpectedRanges": [f"{len(session['data'])}-"]}, status_code=202)
+
+        emulator.upload_sessions.pop(session_id)
+        with emulator.lock:
+            existing = emulator.find_child(session["parent"], session["name"])
+            if existing:
+                emulator.update_content(existing, bytes(session["data"]))
+                response = JSONResponse(emulator.to_json(existing), status_code=200)
+            else:
+                new_id = emulator._add(session["name"], session["parent"], is_folder=False, content=bytes(session["data"]))
+                response = JSONResponse(emulator.to_json(emulator.items[new_id]), status_code=201)
+        schedule_notifications()
+        return response
+
+    @app.get("/v1.0/monitor/{monitor_id}")
+    async def copy_monitor(monitor_id: str):
+        monitor = emulator.monitors.get(monitor_id)
+        if monitor is None:
+            return error(404, "itemNotFound", "Operación no encontrada")
+        elapsed = time.monotonic() - monitor["started"]
+        if monitor["resource_id"] is None and elapsed < emulator.settings.copy_seconds:
+            percent = round(100 * elapsed / emulator.settings.copy_seconds, 1)
+            return JSONResponse({"status": "inProgress", "percentageComplete": percent}, status_code=202)
+        if monitor["resource_id"] is None:
+            if monitor["source"] not in emulator.items or emulator.find_child(monitor["parent"], monitor["name"]):
+                return {"status": "failed", "error": {"code": "copyFailed", "message": "No se pudo copiar"}}
+            with emulator.lock:
+                monitor["resource_id"] = emulator.copy(monitor["source"], monitor["parent"], monitor["name"])
+            schedule_notifications()
+        return {"status": "completed", "percentageComplete": 100.0, "resourceId": monitor["resource_id"]}
+
+    @app.post("/v1.0/subscriptions")
+    async def create_subscription(request: Request):
+        data = await request.json()
+        if emulator.settings.shared_folder:
+            return error(403, "accessDenied", "Sin acceso a la raíz del drive de otro usuario")
+        # Igual que Graph: la URL debe devolver el token de validación
+        token = uuid.uuid4().hex
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                check = await client.post(data["notificationUrl"], params={"validationToken": token})
+        except httpx.HTTPError as e:
+            return error(400, "InvalidRequest", f"No se pudo validar notificationUrl: {e}")
+        if check.status_code != 200 or check.text != token:
+            return error(400, "InvalidRequest", "notificationUrl no devolvió el token de validación")
+
+        subscription = {"id": uuid.uuid4().hex, **data}
+        emulator.subscriptions[subscription["id"]] = subscription
+        return JSONResponse(subscription, status_code=201)
+
+    @app.api_route("/v1.0/subscriptions/{subscription_id}", methods=["PATCH", "DELETE"])
+    async def update_subscription(subscription_id: str, request: Request):
+        subscription = emulator.subscriptions.get(subscription_id)
+        if subscription is None:
+            return error(404, "ResourceNotFound", "Suscripción no encontrada")
+        if request.method == "DELETE":
+            del emulator.subscriptions[subscription_id]
+            return Response(status_code=204)
+        subscription.update(await request.json())
+        return subscription
+
+    @app.post("/_emulator/notify")
+    async def notify(item_id: Optional[str] = None):
+        """Simular un cambio externo (opcionalmente editando ``item_id``) y avisar ya"""
+        if item_id is not None:
+            item = emulator.items.get(item_id)
+            if item is None:
+                return error(404, "itemNotFound", "Elemento no encontrado")
+            with emulator.lock:
+                if item.is_folder:
+                    emulator.record_change(item.id, item.parent_id)
+                else:
+                    emulator.update_content(item, item.content)
+        return {"notified": await send_notifications()}
+
+    @app.get("/_emulator/stats")
+    async def stats():
+        return {
+            "items": len(emulator.items),
+            "requests": emulator.request_count,
+            "throttled": emulator.throttled_count,
+            "subscriptions": len(emulator.subscriptions),
+            "notifications_sent": emulator.notifications_sent,
+        }
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Emulador local de Microsoft Graph")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0, help="0 = sin límite")
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Peticiones/segundo antes de responder 429")
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--throttle-probability", type=float, default=0.0)
+    parser.add_argument("--no-notifications", action="store_true", help="No avisar a las suscripciones tras cada cambio")
+    parser.add_argument("--shared-folder", action="store_true",
+                        help="Rechazar delta y suscripciones como con una carpeta compartida de OneDrive para la Empresa")
+    parser.add_argument("--folders", type=int, default=5)
+    parser.add_argument("--files-per-folder", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=2)
+    args = parser.parse_args()
+
+    emulator = GraphEmulator(EmulatorSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        bandwidth_mbps=args.bandwidth_mbps,
+        page_size=args.page_size,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        retry_after=args.retry_after,
+        throttle_probability=args.throttle_probability,
+        notifications=not args.no_notifications,
+        shared_folder=args.shared_folder,
+    ))
+    emulator.seed(args.folders, args.files_per_folder, args.rows, args.depth)
+    print(f" Emulador de Graph en http://{args.host}:{args.port}/v1.0 ({len(emulator.items)} elementos)")
+    uvicorn.run(create_app(emulator), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Generador de carga concurrente contra app/api_server.py.
+
+Por defecto levanta en el mismo proceso el emulador de Graph y la API
+apuntando a él, así que no necesita tenant de Microsoft. Con ``--api-url``
+ataca un servidor ya en marcha (que ya debe estar autenticado).
+
+Uso::
+
+    python -m loadtest.load_generator --concurrency 16 --duration 30
+    python -m loadtest.load_generator --latency-ms 80 --rate-limit 40 --output carga.json
+    python -m loadtest.load_generator --mix list=5,content=3,download=1,create=1
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+import uvicorn
+
+from loadtest.graph_emulator import EmulatorSettings, GraphEmulator, create_app
+
+DEFAULT_MIX = "list=4,info=2,content=2,download=1,tree=1,create=1"
+
+
+def start_server(app, port: int) -> uvicorn.Server:
+    """Levantar uvicorn en un hilo y esperar a que escuche"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"El servidor no arrancó en el puerto {port}")
+        time.sleep(0.05)
+    return server
+
+
+def start_local_stack(args) -> Tuple[str, GraphEmulator]:
+    """Emulador de Graph + API apuntando a él, ambos en este proceso"""
+    emulator = GraphEmulator(EmulatorSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        page_size=args.page_size,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+    ))
+    emulator.seed(args.folders, args.files_per_folder, args.rows)
+    start_server(create_app(emulator), args.emulator_port)
+
+    import app.api_server as api_server
+    from app.one_drive.OD_manager import OneDriveManager
+
+    manager = OneDriveManager({"access_token": "emulator"})
+    manager.graph_url = f"http://127.0.0.1:{args.emulator_port}/v1.0"
+    manager.initialize_datacampus()
+    api_server.od_manager = manager
+
+    start_server(api_server.app, args.api_port)
+    return f"http://127.0.0.1:{args.api_port}", emulator
+
+
+class Workload:
+    """Operaciones de la mezcla de carga sobre la API"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.local = threading.local()
+        root = self.session().get(f"{base_url}/folders").json()
+        self.root_id = root["current_folder_id"]
+        self.folders = [i["id"] for i in root["items"] if i["type"] == "folder"] or [self.root_id]
+        self.files = [i["id"] for i in root["items"] if i["type"] == "file" and i["name"].endswith(".xlsx")]
+        if not self.files:
+            for folder_id in self.folders:
+                listing = self.session().get(f"{base_url}/folders", params={"folder_id": folder_id}).json()
+                self.files.extend(i["id"] for i in listing["items"] if i["name"].endswith(".xlsx"))
+        if not self.files:
+            raise RuntimeError("No hay archivos .xlsx para la carga de lectura")
+
+    def session(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def operations(self) -> Dict[str, Callable[[], requests.Response]]:
+        url = self.base_url
+        return {
+            "list": lambda: self.session().get(f"{url}/folders", params={"folder_id": random.choice(self.folders)}),
+            "info": lambda: self.session().get(f"{url}/items/{random.choice(self.files)}"),
+            "content": lambda: self.session().get(f"{url}/files/{random.choice(self.files)}/content"),
+            "download": lambda: self.session().get(f"{url}/files/{random.choice(self.files)}/download"),
+            "tree": lambda: self.session().get(f"{url}/tree", params={"depth": 2, "stream": "false"}),
+            "create": self.create_and_delete,
+        }
+
+    def create_and_delete(self) -> requests.Response:
+        name = f"carga_{random.randint(0, 10**9)}"
+        response = self.session().post(f"{self.base_url}/files/excel",
+                                       json={"filename": name, "folder_id": self.root_id,
+                                             "data": {"a": [1, 2, 3], "b": ["x", "y", "z"]}})
+        if response.ok:
+            self.session().delete(f"{self.base_url}/items/{response.json()['file_id']}")
+        return response
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_load(workload: Workload, mix: Dict[str, int], concurrency: int, duration: float) -> Dict:
+    operations = workload.operations()
+    names = [name for name in mix if name in operations]
+    weights = [mix[name] for name in names]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        while time.monotonic() < deadline:
+            name = random.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = operations[name]().ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    wall = time.monotonic() - started
+
+    def summary(values: List[float], failed: int) -> Dict:
+        return {
+            "requests": len(values),
+            "errors": failed,
+            "throughput_rps": round(len(values) / wall, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p90_ms": round(percentile(values, 90) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        }
+
+    all_values = [v for values in latencies.values() for v in values]
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(wall, 2),
+        "total": summary(all_values, sum(errors.values())),
+        "operations": {name: summary(latencies[name], errors[name]) for name in names},
+    }
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de OneDrive")
+    parser.add_argument("--api-url", help="API ya en marcha; si se omite se levanta la pila local")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0, help="Segundos de carga")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos por operación: list,info,content,download,tree,create")
+    parser.add_argument("--output", help="Guardar el informe JSON en este archivo")
+    emulator_args = parser.add_argument_group("emulador local")
+    emulator_args.add_argument("--api-port", type=int, default=8201)
+    emulator_args.add_argument("--emulator-port", type=int, default=8200)
+    emulator_args.add_argument("--latency-ms", type=float, default=30.0)
+    emulator_args.add_argument("--jitter-ms", type=float, default=20.0)
+    emulator_args.add_argument("--page-size", type=int, default=100)
+    emulator_args.add_argument("--rate-limit", type=float, default=0.0)
+    emulator_args.add_argument("--retry-after", type=int, default=1)
+    emulator_args.add_argument("--folders", type=int, default=5)
+    emulator_args.add_argument("--files-per-folder", type=int, default=5)
+    emulator_args.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    emulator = None
+    base_url = args.api_url
+    if not base_url:
+        base_url, emulator = start_local_stack(args)
+
+    report = run_load(Workload(base_url), parse_mix(args.mix), args.concurrency, args.duration)
+    if emulator is not None:
+        report["graph"] = {"requests": emulator.request_count, "throttled": emulator.throttled_count}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.agents.async_datacampus_agent import (
+    AgentNotFoundError, AgentServerError, AsyncDatacampusAgent
+)
+
+
+def make_agent(handler, **kwargs):
+    return AsyncDatacampusAgent(transport=httpx.MockTransport(handler), backoff_base=0, **kwargs)
+
+
+def test_retries_throttled_requests_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) < 3:
+            return httpx.Response(429, headers={"Retry-After": "0"}, json={"detail": "throttled"})
+        return httpx.Response(200, json={"items": []})
+
+    async def run():
+        async with make_agent(handler) as agent:
+            return await agent.listar_contenido("abc")
+
+    assert asyncio.run(run()) == {"items": []}
+    assert len(calls) == 3
+
+
+def test_typed_errors_and_no_retry_on_post_500():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if request.method == "POST":
+            return httpx.Response(500, json={"detail": "boom"})
+        return httpx.Response(404, json={"detail": "Elemento no encontrado"})
+
+    async def run():
+        async with make_agent(handler) as agent:
+            with pytest.raises(AgentNotFoundError) as not_found:
+                await agent.obtener_info("missing")
+            with pytest.raises(AgentServerError):
+                await agent.crear_reporte("root", "x", {"a": [1]})
+            return not_found.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 404
+    assert error.detail == "Elemento no encontrado"
+    assert calls == ["GET", "POST"]
+
+
+def test_gather_contents_respects_concurrency_limit():
+    state = {"active": 0, "peak": 0}
+
+    async def handler(request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return httpx.Response(200, json={"id": request.url.path.split("/")[2]})
+
+    async def run():
+        async with make_agent(handler, max_concurrency=3) as agent:
+            return await agent.gather_contents([f"f{i}" for i in range(10)])
+
+    results = asyncio.run(run())
+    assert results["f7"] == {"id": "f7"}
+    assert len(results) == 10
+    assert state["peak"] == 3
+
+
+def test_listar_arbol_reads_ndjson_stream():
+    lines = [
+        {"event": "folder", "id": "root"},
+        {"event": "tree", "tree": {"id": "root", "total_size": 10}},
+    ]
+
+    def handler(request):
+        body = "".join(json.dumps(line) + "\n" for line in lines)
+        return httpx.Response(200, content=body.encode(), headers={"Content-Type": "application/x-ndjson"})
+
+    async def run():
+        async with make_agent(handler) as agent:
+            return await agent.listar_arbol(depth=2)
+
+    assert asyncio.run(run())["tree"]["total_size"] == 10
+
+
+def test_json_parsed_from_chunks_split_mid_token():
+    payload = {"columns": ["ciudad", "monto"], "data": [["Medellín", 0.1 + 0.2], ["Cali", 2 ** 53 + 1]],
+               "vacío": None, "ok": True}
+    raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    async def chunks():
+        for i in range(0, len(raw), 7):
+            yield raw[i:i + 7]
+
+    def handler(request):
+        if request.method == "DELETE":
+            return httpx.Response(200)
+        return httpx.Response(200, content=chunks())
+
+    async def run():
+        async with make_agent(handler, cache_responses=False) as agent:
+            return await agent.obtener_excel_como_json("abc"), await agent.eliminar_elemento("abc")
+
+    content, deleted = asyncio.run(run())
+    assert content == payload and content["data"][0][1] == 0.1 + 0.2
+    assert deleted is None
@@ -0,0 +1,59 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.web.compression import CompressionMiddleware, negotiate
+
+
+def make_client(minimum_size=100):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse("fila,valor\n" * 500, headers={"ETag": '"abc"'})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"{i},x\n".encode() * 50 for i in range(20)), media_type="text/csv")
+
+    return TestClient(app)
+
+
+def test_negotiate_honors_q_values_and_server_preference():
+    assert negotiate("gzip, deflate", ["zstd", "br", "gzip"]) == "gzip"
+    assert negotiate("gzip;q=0.5, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("*", ["zstd", "br", "gzip"]) == "zstd"
+    assert negotiate("gzip;q=0, identity", ["gzip"]) is None
+
+
+def test_compresses_only_above_threshold_and_weakens_etag():
+    client = make_client()
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    large = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["etag"] == 'W/"abc"'
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert large.text == "fila,valor\n" * 500
+    assert large.num_bytes_downloaded < 200
+
+
+def test_streaming_response_is_compressed_chunk_by_chunk():
+    client = make_client()
+    expected = b"".join(f"{i},x\n".encode() * 50 for i in range(20))
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == expected
@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app import api_server, config
+from app.agents.async_datacampus_agent import AsyncDatacampusAgent
+from app.storage.local_backend import LocalStorageBackend
+from app.web.conditional import etag_matches
+
+
+@pytest.fixture
+def client(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path / "datacampus"))
+    backend.initialize_datacampus()
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+    yield TestClient(api_server.app), backend
+    api_server.app.dependency_overrides.clear()
+
+
+def test_etag_matching_handles_graph_tags_and_weak_prefix():
+    assert etag_matches('"{ABC},3", W/"other"', '"{ABC},3"')
+    assert etag_matches('W/"x"', '"x"')
+    assert etag_matches("*", '"x"')
+    assert not etag_matches('"{ABC},4"', '"{ABC},3"')
+
+
+def test_content_returns_304_until_file_changes(client):
+    http, backend = client
+    created = backend.create_excel_file(backend.datacampus_root_id, "datos", pd.DataFrame({"a": [1, 2]}))
+    url = f"/files/{created['id']}/content"
+
+    first = http.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    assert http.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert http.get("/folders", headers={"If-None-Match": http.get("/folders").headers["etag"]}).status_code == 304
+
+    backend.update_excel_file(created["id"], pd.DataFrame({"a": [1, 2, 3]}))
+    refreshed = http.get(url, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["info"]["rows"] == 3
+
+
+def test_compacted_content_is_a_different_variant(client, monkeypatch):
+    http, backend = client
+    created = backend.create_excel_file(backend.datacampus_root_id, "datos", pd.DataFrame({"a": [1, 2]}))
+    url = f"/files/{created['id']}/content"
+    plain = http.get(url)
+
+    monkeypatch.setattr(config, "COMPACT_DATAFRAMES", True)
+    compact = http.get(url, headers={"If-None-Match": plain.headers["etag"]})
+    assert compact.status_code == 200 and compact.headers["etag"] != plain.headers["etag"]
+    assert compact.json()["info"]["column_types"] == {"a": "int8"}
+    assert compact.json()["data"] == plain.json()["data"]
+
+
+def test_async_agent_reuses_cached_body_on_304():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"items": [1]}, headers={"ETag": '"v1"'})
+
+    async def run():
+        async with AsyncDatacampusAgent(transport=httpx.MockTransport(handler)) as agent:
+            return [await agent.listar_contenido("abc") for _ in range(2)], agent.cache.hits
+
+    results, hits = asyncio.run(run())
+    assert results == [{"items": [1]}, {"items": [1]}]
+    assert seen == [None, '"v1"']
+    assert hits == 1
@@ -0,0 +1,84 @@
+import io
+import os
+import zipfile
+
+import pandas as pd
+import requests
+from fastapi.testclient import TestClient
+
+from app.one_drive.OD_manager import OneDriveManager
+from app.storage.base import REPRODUCIBLE_DATE, StorageBackend
+from app.storage.local_backend import LocalStorageBackend
+from loadtest.graph_emulator import EmulatorSettings, GraphEmulator, create_app
+from utils.content_hash import QuickXorHash, quick_xor_hash
+
+
+def test_quick_xor_hash_vectors_and_chunking():
+    assert quick_xor_hash(b"") == "AAAAAAAAAAAAAAAAAAAAAAAAAAA="
+    assert quick_xor_hash(b"J") == "SgAAAAAAAAAAAAAAAQAAAAAAAAA="
+
+    data = os.urandom(5000)
+    chunked = QuickXorHash()
+    for offset in range(0, len(data), 333):
+        chunked.update(data[offset:offset + 333])
+    assert chunked.b64digest() == quick_xor_hash(data)
+    assert quick_xor_hash(data[:-1] + bytes([data[-1] ^ 1])) != quick_xor_hash(data)
+
+
+def test_generated_workbooks_are_reproducible():
+    df = pd.DataFrame({"x": [1, 2], "y": ["a", "b"]})
+    data = StorageBackend._to_excel_bytes(df, reproducible=True)
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert {entry.date_time for entry in archive.infolist()} == {REPRODUCIBLE_DATE}
+        assert b"1980-01-01T00:00:00Z</dcterms:modified>" in archive.read("docProps/core.xml")
+    assert pd.read_excel(io.BytesIO(data)).equals(df)
+
+
+def test_update_skips_unchanged_content_on_local_backend(tmp_path, monkeypatch):
+    backend = LocalStorageBackend(str(tmp_path))
+    backend.initialize_datacampus()
+    df = pd.DataFrame({"ventas": [1, 2, 3]})
+    file_id = backend.create_excel_file(backend.datacampus_root_id, "ventas", df, compare="hash")["id"]
+    assert backend.create_excel_file(backend.datacampus_root_id, "ventas", df, compare="hash")["skipped"]
+
+    uploads, serialized = [], []
+    replace, to_bytes = backend.replace, backend._to_excel_bytes
+    monkeypatch.setattr(backend, "replace", lambda *args: uploads.append(args[0]) or replace(*args))
+    monkeypatch.setattr(backend, "_to_excel_bytes", lambda data, **kwargs: serialized.append(1) or to_bytes(data, **kwargs))
+
+    assert backend.update_excel_file(file_id, df)["skipped"]
+    assert uploads == []
+
+    backend.update_excel_file(file_id, df, compare="dataframe")  # primera vez: deja la huella
+    serialized.clear()
+    assert backend.update_excel_file(file_id, df.copy(), compare="dataframe")["skipped"]
+    assert serialized == []
+
+    assert not backend.update_excel_file(file_id, df.assign(ventas=[1, 2, 4]), compare="dataframe").get("skipped")
+    assert backend.update_excel_file(file_id, df, compare="off") and len(uploads) == 2
+
+
+def test_graph_noop_refresh_costs_one_metadata_call(monkeypatch):
+    graph = TestClient(create_app(GraphEmulator(EmulatorSettings(notifications=False))))
+    monkeypatch.setattr(requests, "request", lambda method, url, data=None, **kwargs:
+                        graph.request(method, url, content=data, **kwargs))
+    manager = OneDriveManager({"access_token": "test"})
+    manager.graph_url = "http://testserver/v1.0"
+    _, root = manager.initialize_datacampus()
+    df = pd.DataFrame({"total": [10, 20]})
+    file_id = manager.create_excel_file(root, "resumen.xlsx", df, compare="hash")["id"]
+
+    calls = []
+    make_request = manager._make_request
+    monkeypatch.setattr(manager, "_make_request", lambda method, url, operation="other", **kwargs:
+                        calls.append(operation) or make_request(method, url, operation, **kwargs))
+
+    assert manager.update_excel_file(file_id, df)["skipped"]
+    assert manager.create_excel_file(root, "resumen.xlsx", df, compare="hash")["skipped"]
+    assert calls == ["get_item", "get_item"]
+
+    # Por defecto crear no consulta nada antes ni normaliza el zip
+    calls.clear()
+    created = manager.create_excel_file(root, "nuevo.xlsx", df)
+    assert calls == ["upload_content"] and not created.get("skipped")
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app import api_server, config
+from app.search.content_index import ContentIndex, refresh_index
+from app.storage.local_backend import LocalStorageBackend
+
+
+def test_index_search_is_accent_insensitive_and_replaces_files(tmp_path):
+    index = ContentIndex(str(tmp_path / "index.db"))
+    index.index_file("a", "clientes.xlsx", "v1", [("Hoja1", 2, "B", "CL-00123 Medellín"), ("Hoja1", 3, "B", "CL-00999")])
+    index.index_file("b", "ventas.xlsx", "v1", [("Resumen", 5, "C", "cl-00123")])
+
+    hits = index.search("cl-00123")
+    assert sorted((hit["name"], hit["sheet"], hit["row"], hit["column"]) for hit in hits) == [
+        ("clientes.xlsx", "Hoja1", 2, "B"), ("ventas.xlsx", "Resumen", 5, "C")]
+    assert index.search("MEDELLIN")[0]["value"] == "CL-00123 Medellín"
+    assert len(index.search("CL-009", prefix=True)) == 1
+
+    index.index_file("a", "clientes.xlsx", "v2", [("Hoja1", 2, "B", "otro")])
+    assert [hit["file_id"] for hit in index.search("cl-00123")] == ["b"]
+    index.remove_files(["b"])
+    assert index.search("cl-00123") == [] and index.stats() == {"files": 1, "cells": 1}
+
+
+def test_refresh_only_reindexes_changed_workbooks(tmp_path, monkeypatch):
+    backend = LocalStorageBackend(str(tmp_path / "datacampus"))
+    backend.initialize_datacampus()
+    root = backend.datacampus_root_id
+    sub = backend.create_folder(root, "2024")["id"]
+    first = backend.create_excel_file(root, "enero", pd.DataFrame({"cliente": ["CL-1", "CL-2"], "monto": [10, 20]}))
+    backend.create_excel_file(sub, "febrero", pd.DataFrame({"cliente": ["CL-2"], "monto": [30]}))
+    index = ContentIndex(str(tmp_path / "index.db"))
+
+    assert refresh_index(index, backend)["indexed"] == 2
+    assert refresh_index(index, backend)["unchanged"] == 2
+
+    backend.update_excel_file(first["id"], pd.DataFrame({"cliente": ["CL-3"], "monto": [5]}))
+    summary = refresh_index(index, backend)
+    assert summary["indexed"] == 1 and summary["unchanged"] == 1
+    assert {hit["name"] for hit in index.search("CL-2")} == {"febrero.xlsx"}
+
+    monkeypatch.setattr(config, "CONTENT_INDEX_PATH", str(tmp_path / "index.db"))
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+    try:
+        response = TestClient(api_server.app).get("/search/content", params={"q": "cl-3"})
+    finally:
+        api_server.app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert response.json()["hits"] == [{"file_id": first["id"], "name": "enero.xlsx", "sheet": "Sheet1",
+                                        "row": 2, "column": "A", "value": "CL-3"}]
+
+
+def test_reading_a_workbook_does_not_hold_the_write_lock(tmp_path):
+    path = str(tmp_path / "index.db")
+    index = ContentIndex(path)
+
+    def cells():
+        yield "Hoja1", 1, "A", "primera"
+        # Otro proceso puede escribir mientras se descarga y recorre el libro
+        other = sqlite3.connect(path, timeout=0, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+        other.close()
+        yield "Hoja1", 2, "A", "segunda"
+
+    assert index.index_file("a", "libro.xlsx", "v1", cells()) == 2
+    assert [hit["row"] for hit in index.search("segunda")] == [2]
@@ -0,0 +1,103 @@
+import time
+
+import pandas as pd
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app import api_server
+from app.jobs.handlers import register_handlers
+from app.jobs.manager import JobManager
+from app.one_drive.OD_manager import OneDriveManager
+from app.storage import base
+from app.storage.local_backend import LocalStorageBackend
+from loadtest.graph_emulator import EmulatorSettings, GraphEmulator, create_app
+
+
+@pytest.fixture
+def client(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path / "datacampus"))
+    backend.initialize_datacampus()
+    jobs = register_handlers(JobManager(max_workers=1, jobs_dir=str(tmp_path / "jobs")))
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+    api_server.app.dependency_overrides[api_server.get_jobs] = lambda: jobs
+    yield TestClient(api_server.app), backend
+    api_server.app.dependency_overrides.clear()
+    jobs.shutdown(wait=True)
+
+
+def wait_job(client, location, timeout=10):
+    deadline = time.monotonic() + timeout
+    job = client.get(location).json()
+    while job["status"] not in ("succeeded", "failed") and time.monotonic() < deadline:
+        time.sleep(0.01)
+        job = client.get(location).json()
+    return job
+
+
+def test_copy_and_move_endpoints_on_local_backend(client):
+    client, backend = client
+    root = backend.datacampus_root_id
+    archive = backend.create_folder(root, "archivo")["id"]
+    report = backend.create_excel_file(root, "plantilla", pd.DataFrame({"x": [1, 2]}))["id"]
+
+    response = client.post(f"/items/{report}/copy", json={"parent_id": archive, "name": "copia.xlsx"})
+    assert response.status_code == 202
+    job = wait_job(client, response.headers["location"])
+    assert job["status"] == "succeeded" and job["result"]["copied"] == 1
+    copied = job["result"]["items"][0]["file_id"]
+    assert backend.read_excel_file(copied)["x"].tolist() == [1, 2]
+
+    moved = client.patch(f"/items/{report}/move", json={"parent_id": archive, "name": "movida.xlsx"})
+    assert moved.status_code == 200
+    assert sorted(item.name for item in backend.list(archive)) == ["copia.xlsx", "movida.xlsx"]
+    assert [item.name for item in backend.list(root)] == ["archivo"]
+
+
+def test_bulk_copy_and_move_report_each_item(client):
+    client, backend = client
+    root = backend.datacampus_root_id
+    target = backend.create_folder(root, "destino")["id"]
+    first = backend.write(root, "a.xlsx", b"a")["id"]
+    second = backend.write(root, "b.xlsx", b"b")["id"]
+    backend.write(target, "b.xlsx", b"ya existe")
+
+    response = client.post("/items/copy", json={"items": [{"item_id": first, "parent_id": target},
+                                                          {"item_id": second, "parent_id": target}]})
+    job = wait_job(client, response.headers["location"])
+    assert job["result"]["copied"] == 1 and job["result"]["failed"] == 1
+    assert "ya existe" in job["result"]["items"][1]["error"]
+
+    moved = client.patch("/items/move", json={"items": [{"item_id": first, "parent_id": target, "name": "a2.xlsx"},
+                                                       {"item_id": "no-existe"}]}).json()
+    assert moved["moved"] == 1 and moved["failed"] == 1
+
+
+def test_graph_copy_follows_monitor_and_updates_cached_listing(monkeypatch):
+    emulator = GraphEmulator(EmulatorSettings(notifications=False, copy_seconds=0.1))
+    graph = TestClient(create_app(emulator))
+
+    def send(method, url, allow_redirects=True, data=None, **kwargs):
+        return graph.request(method, url, content=data, follow_redirects=allow_redirects, **kwargs)
+
+    monkeypatch.setattr(requests, "request", send)
+    monkeypatch.setattr(base, "COPY_POLL_SECONDS", 0.02)
+    manager = OneDriveManager({"access_token": "test"})
+    manager.graph_url = "http://testserver/v1.0"
+    manager.listing_cache.ttl = manager.item_cache.ttl = 3600
+    _, root = manager.initialize_datacampus()
+    folder = manager.create_folder(root, "plantillas")["id"]
+    template = manager.write(folder, "informe.xlsx", b"contenido")["id"]
+    manager.list(root), manager.list(folder)
+
+    progress = []
+    operation = manager.copy_items([(template, root, "informe 2024.xlsx")], progress=lambda f, m: progress.append(f))[0]
+    assert operation.status == "completed" and operation.monitor_url.startswith("http://testserver/v1.0/monitor/")
+    assert any(fraction < 1 for fraction in progress) and progress[-1] == 1
+    assert emulator.items[operation.resource_id].content == b"contenido"
+    assert "informe 2024.xlsx" in [item.name for item in manager.listing_cache.get(root)]
+
+    moved = manager.move_item(template, root)
+    assert moved["parentReference"]["id"] == root
+    assert template not in [item.id for item in manager.listing_cache.get(folder)]
+    assert template in [item.id for item in manager.listing_cache.get(root)]
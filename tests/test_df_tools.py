@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.df_tools import compact_dataframe, dataframe_to_json, profile_dataframe
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "monto": [1.5, np.nan, 0.1 + 0.2],
+        "fecha": pd.to_datetime(["2024-01-01 08:30", None, "2024-03-01 10:00"]),
+        "cliente": ["A", None, "ñandú"],
+        "cantidad": [1, 2, 3],
+    })
+
+
+def test_split_keeps_row_layout_and_maps_missing_to_null(df):
+    content = json.loads(dataframe_to_json(df))
+
+    assert content["columns"] == ["monto", "fecha", "cliente", "cantidad"]
+    assert content["data"][0] == [1.5, "2024-01-01T08:30:00.000", "A", 1]
+    assert content["data"][1] == [None, None, None, 2]
+    assert content["data"][2][0] == 0.1 + 0.2  # sin redondear a 15 dígitos
+    assert content["shape"] == [3, 4]
+    assert content["info"]["column_types"]["cantidad"] == "int64"
+
+
+def test_records_and_columns_orients(df):
+    records = json.loads(dataframe_to_json(df, "records"))["data"]
+    columns = json.loads(dataframe_to_json(df, "columns"))["data"]
+
+    assert records[2]["cliente"] == "ñandú"
+    assert records[2]["monto"] == columns["monto"][2] == 0.1 + 0.2
+    assert columns["cantidad"] == [1, 2, 3]
+    assert columns["fecha"][1] is None
+    with pytest.raises(ValueError):
+        dataframe_to_json(df, "index")
+
+
+def test_numeric_columns_serialize_from_numpy_like_the_object_path():
+    df = pd.DataFrame({
+        "f32": np.array([0.1, np.nan, 3], dtype=np.float32),
+        "u8": np.array([1, 2, 255], dtype=np.uint8),
+        "ok": [True, False, True],
+        "nullable": pd.array([1, None, 3], dtype="Int64"),
+        "fecha": pd.to_datetime(["2024-01-01", None, "2024-01-03"]).tz_localize("America/Bogota"),
+    })
+    columns = json.loads(dataframe_to_json(df, "columns"))["data"]
+    rows = json.loads(dataframe_to_json(df))["data"]
+
+    assert columns == {name: [row[i] for row in rows] for i, name in enumerate(df.columns)}
+    assert columns["f32"] == [float(np.float32(0.1)), None, 3.0]
+    assert columns["fecha"] == ["2024-01-01T05:00:00.000", None, "2024-01-03T05:00:00.000"]
+    assert columns["nullable"] == [1, None, 3]
+
+    floats = pd.DataFrame({"a": [0.5, np.inf], "b": np.array([1, 2], dtype=np.float32)})
+    assert json.loads(dataframe_to_json(floats))["data"] == [[0.5, 1.0], [None, 2.0]]
+
+
+def test_compact_dataframe_keeps_values_and_reports_savings():
+    n = 1000
+    df = pd.DataFrame({
+        "ciudad": ["Medellín", "Bogotá", "Cali", None] * (n // 4),
+        "codigo": [f"CL-{i}" for i in range(n)],
+        "cantidad": np.arange(n),
+        "mitad": np.arange(n) / 2,
+        "monto": np.linspace(0.1, 99.9, n),
+    })
+    compact, report = compact_dataframe(df)
+
+    assert compact["ciudad"].dtype == "category" and compact["codigo"].dtype == df["codigo"].dtype
+    assert compact["cantidad"].dtype == "int16" and compact["mitad"].dtype == "float32"
+    assert compact["monto"].dtype == "float64"  # float32 perdería precisión
+    assert report["bytes_saved"] == report["bytes_before"] - report["bytes_after"] > 0
+    assert report["arrow_strings"] == (getattr(compact["codigo"].dtype, "storage", None) == "pyarrow")
+    assert dataframe_to_json(compact).split(b',"info"')[0] == dataframe_to_json(df).split(b',"info"')[0]
+    assert profile_dataframe(compact)["schema"][0]["min"] == "Bogotá"
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from app.one_drive.governor import BULK, INTERACTIVE, RateGovernor, current_lane, lane
+
+
+def test_lane_context_defaults_to_interactive():
+    assert current_lane() == INTERACTIVE
+    with lane(BULK):
+        assert current_lane() == BULK
+    assert current_lane() == INTERACTIVE
+    with pytest.raises(ValueError):
+        with lane("urgente"):
+            pass
+
+
+def test_throttle_halves_rate_pauses_and_recovers():
+    governor = RateGovernor(max_rate=8, burst=4, min_rate=1)
+
+    governor.throttled(0.1)
+    assert governor.rate == 4
+    assert governor.acquire() >= 0.09
+
+    for _ in range(100):
+        governor.succeeded()
+    assert governor.rate == 8
+
+
+def test_interactive_calls_skip_the_bulk_queue():
+    governor = RateGovernor(max_rate=20, burst=4, min_rate=1)
+    stop = threading.Event()
+    bulk_calls = []
+
+    def bulk_worker():
+        while not stop.is_set():
+            governor.acquire(BULK)
+            bulk_calls.append(time.monotonic())
+
+    workers = [threading.Thread(target=bulk_worker) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.3)
+
+    waits = []
+    for _ in range(5):
+        waits.append(governor.acquire(INTERACTIVE))
+        time.sleep(0.05)
+
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    # Con el carril bulk saturado, cada llamada interactiva espera a lo sumo un token
+    assert max(waits) < 0.1
+    assert len(bulk_calls) <= 20 * 0.6 + 4
+
+
+def test_unlimited_by_default_until_throttled_then_recovers():
+    governor = RateGovernor(max_rate=0, burst=4, min_rate=1)
+    for _ in range(50):
+        assert governor.acquire() < 0.01
+    assert not governor.limited
+
+    governor.throttled(0)
+    assert governor.limited and 1 <= governor.rate <= 25
+    for _ in range(1000):
+        governor.succeeded()
+    assert not governor.limited and governor.rate == 0
+
+
+
+def test_bulk_lane_is_capped_and_its_pauses_spare_interactive_calls():
+    governor = RateGovernor(max_rate=0, burst=2, min_rate=1, bulk_rate=20)
+    started = time.monotonic()
+    for _ in range(6):
+        governor.acquire(BULK)
+    assert time.monotonic() - started >= 0.15  # 2 de ráfaga y 4 a 20/s
+    assert governor.acquire(INTERACTIVE) < 0.01
+
+    with lane(BULK):
+        governor.throttled(0.2)
+    assert governor.busy()
+    assert governor.acquire(INTERACTIVE) < 0.05
+    assert governor.acquire(BULK) >= 0.15
+
+    governor.throttled(0.1, INTERACTIVE)
+    assert governor.acquire(BULK) >= 0.05
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app import api_server
+from app.jobs.handlers import register_handlers
+from app.jobs.manager import CANCELLED, FAILED, SUCCEEDED, JobManager
+from app.storage.local_backend import LocalStorageBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    storage = LocalStorageBackend(str(tmp_path / "datacampus"))
+    storage.initialize_datacampus()
+    return storage
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    manager = register_handlers(JobManager(max_workers=1, jobs_dir=str(tmp_path / "jobs")))
+    yield manager
+    manager.shutdown(wait=True)
+
+
+def wait(jobs, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not jobs.get(job_id).finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return jobs.get(job_id)
+
+
+def test_combine_folder_and_idempotency(jobs, backend):
+    for name, values in (("enero", [1, 2]), ("febrero", [3])):
+        backend.create_excel_file(backend.datacampus_root_id, name, pd.DataFrame({"ventas": values}))
+
+    job, created = jobs.submit("combine_folder", {"output_name": "total.xlsx"}, backend, "clave-1")
+    same, created_again = jobs.submit("combine_folder", {"output_name": "total.xlsx"}, backend, "clave-1")
+
+    assert created and not created_again and same.id == job.id
+    job = wait(jobs, job.id)
+    assert job.status == SUCCEEDED
+    assert job.result["rows"] == 3
+    combined = backend.read_excel_file(job.result["file_id"])
+    assert sorted(combined["archivo_origen"].unique()) == ["enero.xlsx", "febrero.xlsx"]
+
+
+def test_combine_folder_rerun_skips_its_own_output(jobs, backend):
+    for name, values in (("enero", [1, 2]), ("febrero", [3])):
+        backend.create_excel_file(backend.datacampus_root_id, name, pd.DataFrame({"ventas": values}))
+
+    first = wait(jobs, jobs.submit("combine_folder", {"output_name": "total"}, backend)[0].id)
+    second = wait(jobs, jobs.submit("combine_folder", {"output_name": "total"}, backend)[0].id)
+
+    assert first.result["name"] == "total.xlsx"
+    assert second.status == SUCCEEDED and second.result["rows"] == 3 and second.result["files"] == 2
+    assert not second.result["changed"] and second.result["file_id"] == first.result["file_id"]
+
+
+def test_combine_folder_compacted_writes_same_content(jobs, backend):
+    for name, city in (("enero", "Cali"), ("febrero", "Lima")):
+        backend.create_excel_file(backend.datacampus_root_id, name,
+                                  pd.DataFrame({"ciudad": [city] * 4, "ventas": [1, 2, 3, 4]}))
+    compacted = backend.read_excel_file(backend.find_item_by_name("enero.xlsx").id, compact=True)
+    assert compacted["ciudad"].dtype == "category" and compacted["ventas"].dtype == "int8"
+
+    plain = wait(jobs, jobs.submit("combine_folder", {"output_name": "total.xlsx"}, backend)[0].id)
+    compact = wait(jobs, jobs.submit("combine_folder", {"output_name": "total.xlsx", "compact": True}, backend)[0].id)
+    assert compact.status == SUCCEEDED and compact.result["rows"] == 8
+    assert not compact.result["changed"] and compact.result["file_id"] == plain.result["file_id"]
+
+
+def test_cancel_running_and_queued_jobs(jobs):
+    started, release = threading.Event(), threading.Event()
+
+    def slow(ctx):
+        started.set()
+        release.wait(5)
+        ctx.progress(0.5)
+
+    jobs.register("slow", slow)
+    running, _ = jobs.submit("slow", {})
+    queued, _ = jobs.submit("slow", {})
+    started.wait(5)
+
+    assert jobs.cancel(queued.id).status == CANCELLED
+    jobs.cancel(running.id)
+    release.set()
+    assert wait(jobs, running.id).status == CANCELLED
+
+
+def test_unfinished_jobs_are_marked_failed_after_restart(tmp_path, jobs):
+    started, release = threading.Event(), threading.Event()
+    jobs.register("block", lambda ctx: (started.set(), release.wait(5)))
+    job, _ = jobs.submit("block", {}, idempotency_key="k")
+    started.wait(5)
+
+    reloaded = JobManager(jobs_dir=jobs.jobs_dir)
+    release.set()
+
+    assert reloaded.get(job.id).status == FAILED
+    assert "reinicio" in reloaded.get(job.id).error
+
+
+def test_jobs_api_streams_progress_until_done(jobs, backend):
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+    api_server.app.dependency_overrides[api_server.get_jobs] = lambda: jobs
+    try:
+        client = TestClient(api_server.app)
+        response = client.post("/jobs", json={"kind": "create_excel", "params": {"filename": "nuevo"}})
+        assert response.status_code == 202
+
+        lines = client.get(response.headers["location"] + "/events").text.strip().splitlines()
+        assert '"succeeded"' in lines[-1]
+        assert client.get(response.headers["location"]).json()["result"]["name"] == "nuevo.xlsx"
+        assert client.post("/jobs", json={"kind": "desconocido"}).status_code == 400
+    finally:
+        api_server.app.dependency_overrides.clear()
+
+
+def test_background_upload_with_repeated_key_does_not_leak_spool_file(jobs, backend):
+    started, release = threading.Event(), threading.Event()
+    jobs.register("upload_excel", lambda ctx: (started.set(), release.wait(5)))
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+    api_server.app.dependency_overrides[api_server.get_jobs] = lambda: jobs
+    try:
+        client = TestClient(api_server.app)
+        upload = lambda: client.post("/files/upload", files={"file": ("datos.csv", b"a,b\n1,2\n")},
+                                     data={"background": "true"}, headers={"Idempotency-Key": "subida-1"})
+        first = upload()
+        started.wait(5)
+        again = upload()
+    finally:
+        api_server.app.dependency_overrides.clear()
+        release.set()
+
+    assert first.status_code == 202 and again.status_code == 200
+    assert again.json()["id"] == first.json()["id"]
+    uploads = os.listdir(os.path.join(jobs.jobs_dir, "uploads"))
+    assert uploads == [os.path.basename(jobs.get(first.json()["id"]).params["path"])]
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from app.one_drive.OD_manager import OneDriveManager
+from app.storage.base import DriveItem, update_listing
+
+
+def make_manager(calls):
+    manager = OneDriveManager({"access_token": "test"})
+    manager.datacampus_drive_id, manager.datacampus_root_id = "drive", "root"
+    manager.listing_cache.ttl = manager.item_cache.ttl = manager.content_cache.ttl = 3600
+    children = [
+        {"id": "a", "name": "a.xlsx", "size": 10, "parentReference": {"id": "root"}},
+        {"id": "b", "name": "b.xlsx", "size": 20, "parentReference": {"id": "root"}},
+    ]
+
+    def fake_request(method, url, operation="other", **kwargs):
+        calls.append(operation)
+        if operation == "list_children":
+            return SimpleNamespace(status_code=200, json=lambda: {"value": children})
+        if operation == "create_folder":
+            return SimpleNamespace(status_code=201, json=lambda: {"id": "c", "name": kwargs["json"]["name"], "folder": {}})
+        if operation == "upload_content":
+            return SimpleNamespace(status_code=200, json=lambda: {"id": "a", "name": "a.xlsx", "size": 99})
+        return SimpleNamespace(status_code=204)
+
+    manager._make_request = fake_request
+    return manager
+
+
+def test_update_listing_replaces_by_id_or_name_and_removes():
+    items = [DriveItem(id="1", name="Uno.xlsx", type="file"), DriveItem(id="2", name="dos", type="folder")]
+
+    updated = update_listing(items, added=DriveItem(id="9", name="uno.xlsx", type="file", size=5))
+    assert [(item.id, item.size) for item in updated] == [("2", 0), ("9", 5)]
+    assert [item.id for item in update_listing(items, removed_id="2")] == ["1"]
+    assert len(items) == 2  # el listado original no se modifica
+
+
+def test_own_writes_update_cached_listing_without_refetch():
+    calls = []
+    manager = make_manager(calls)
+    manager.list_folder_contents("root")
+
+    manager.create_folder("root", "nueva")
+    manager.write("root", "a.xlsx", b"datos")
+    manager.delete_item("b")
+    calls.clear()
+
+    items = manager.list_folder_contents("root")
+    assert calls == []
+    assert [(item.id, item.type, item.size) for item in items] == [("c", "folder", 0), ("a", "file", 99)]
+
+
+def test_forget_listing_forces_refetch():
+    calls = []
+    manager = make_manager(calls)
+    manager.list_folder_contents("root")
+    manager.forget_listing("root")
+    manager.list_folder_contents("root")
+
+    assert calls == ["list_children", "list_children"]
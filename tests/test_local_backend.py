@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from app.storage.local_backend import LocalStorageBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    storage = LocalStorageBackend(str(tmp_path / "datacampus"))
+    storage.initialize_datacampus()
+    return storage
+
+
+def test_excel_roundtrip_and_listing(backend):
+    folder = backend.create_folder(backend.datacampus_root_id, "Reportes")
+    df = pd.DataFrame({"cliente": ["A", "B"], "saldo": [10.5, 20.0]})
+
+    created = backend.create_excel_file(folder["id"], "cartera", df)
+
+    assert created["name"] == "cartera.xlsx"
+    assert created["parentReference"]["id"] == folder["id"]
+    pd.testing.assert_frame_equal(backend.read_excel_file(created["id"]), df)
+    assert [i.name for i in backend.list_folder_contents(folder["id"])] == ["cartera.xlsx"]
+    assert backend.find_item_by_name("REPORTES").type == "folder"
+    assert b"".join(backend.stream(created["id"], chunk_size=100)) == backend.read(created["id"])
+
+
+def test_update_changes_ctag_and_delete(backend):
+    created = backend.create_excel_file(backend.datacampus_root_id, "datos.xlsx")
+    before = backend.get_item_info(created["id"])["cTag"]
+
+    backend.update_excel_file(created["id"], pd.DataFrame({"x": list(range(50))}))
+
+    assert backend.get_item_info(created["id"])["cTag"] != before
+    backend.delete_item(created["id"])
+    assert backend.list_folder_contents() == []
+
+
+def test_mkdir_renames_on_conflict_and_rejects_escapes(backend):
+    first = backend.create_folder(backend.datacampus_root_id, "Datos")
+    second = backend.create_folder(backend.datacampus_root_id, "Datos")
+
+    assert (first["name"], second["name"]) == ("Datos", "Datos 1")
+    with pytest.raises(Exception):
+        backend.get_item_info("Li4vLi4vZXRj")  # "../../etc"
@@ -0,0 +1,26 @@
+from app.monitoring.metrics import MetricsRegistry
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    calls = registry.counter("test_calls_total", "Llamadas", ("operation",))
+    latency = registry.histogram("test_latency_seconds", "Latencia", ("operation",), buckets=(0.1, 1.0))
+
+    calls.inc(operation="list_children")
+    calls.inc(2, operation="list_children")
+    latency.observe(0.05, operation="get_item")
+    latency.observe(0.5, operation="get_item")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_calls_total counter" in lines
+    assert 'test_calls_total{operation="list_children"} 3' in lines
+    assert 'test_latency_seconds_bucket{operation="get_item",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{operation="get_item",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{operation="get_item",le="+Inf"} 2' in lines
+    assert 'test_latency_seconds_count{operation="get_item"} 2' in lines
+
+
+def test_register_returns_existing_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("dup_total", "Duplicada")
+    assert registry.counter("dup_total", "Duplicada") is first
@@ -0,0 +1,114 @@
+import time
+from types import SimpleNamespace
+
+import requests
+from fastapi.testclient import TestClient
+
+from app import api_server
+from app.cache.ttl_cache import TTLCache
+from app.one_drive.OD_manager import OneDriveManager
+from app.one_drive.subscriptions import SubscriptionManager
+from loadtest.graph_emulator import EmulatorSettings, GraphEmulator, create_app
+
+
+def make_manager():
+    manager = OneDriveManager({"access_token": "test"})
+    manager.datacampus_drive_id, manager.datacampus_root_id = "drive", "root"
+    manager.item_cache.ttl = manager.content_cache.ttl = 3600
+    return manager
+
+
+def test_ttl_cache_expires_and_respects_byte_budget():
+    cache = TTLCache("test", ttl=0.05, max_bytes=10, sizeof=len)
+    cache.set("a", b"12345")
+    cache.set("b", b"123456")
+
+    assert cache.get("a") is None  # expulsada por el límite de bytes
+    assert cache.get("b") == b"123456"
+    time.sleep(0.06)
+    assert cache.get("b") is None
+
+
+def test_validation_handshake_echoes_token():
+    client = TestClient(api_server.app)
+    response = client.post("/notifications?validationToken=abc%20123")
+
+    assert response.status_code == 200
+    assert response.text == "abc 123"
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_notification_invalidates_only_changed_items(monkeypatch):
+    manager = make_manager()
+    for item_id in ("A", "B", "carpeta"):
+        manager.item_cache.set(item_id, {"id": item_id})
+    manager.content_cache.set("A", ("", b"viejo"))
+    manager.content_cache.set("B", ("", b"intacto"))
+
+    changed = [{"id": "A", "parentReference": {"id": "carpeta"}}]
+    monkeypatch.setattr(manager, "delta", lambda link=None: (changed, "delta-2"))
+    subscriptions = SubscriptionManager(manager, "https://api.example/notifications", client_state="secreto")
+    monkeypatch.setattr(api_server, "subscriptions", subscriptions)
+
+    client = TestClient(api_server.app)
+    forged = client.post("/notifications", json={"value": [{"clientState": "otro"}]})
+    assert forged.status_code == 202
+    assert not subscriptions._pending.is_set()
+
+    client.post("/notifications", json={"value": [{"clientState": "secreto", "subscriptionId": "s1"}]})
+    assert subscriptions._pending.is_set()
+    subscriptions.process_changes()
+
+    assert "A" not in manager.content_cache and "A" not in manager.item_cache
+    assert "carpeta" not in manager.item_cache
+    assert manager.content_cache.get("B") == ("", b"intacto")
+    assert subscriptions.delta_link == "delta-2"
+
+
+def test_cached_content_is_refetched_when_listing_shows_a_new_ctag():
+    manager = make_manager()
+    manager.listing_cache.ttl = 0
+    remote = {"cTag": '"c:{A},1"', "content": b"viejo"}
+    downloads = []
+
+    def fake_request(method, url, operation="other", **kwargs):
+        item = {"id": "A", "name": "a.xlsx", "cTag": remote["cTag"], "parentReference": {"id": "carpeta"}}
+        if operation == "list_children":
+            return SimpleNamespace(status_code=200, json=lambda: {"value": [item]})
+        if operation == "get_item":
+            return SimpleNamespace(status_code=200, json=lambda: item)
+        downloads.append(remote["content"])
+        return SimpleNamespace(status_code=200, content=remote["content"])
+
+    manager._make_request = fake_request
+    assert manager.read("A") == b"viejo"
+    assert manager.read("A") == b"viejo"
+    assert len(downloads) == 1
+
+    # Edición externa: el listado trae el cTag nuevo antes de que caduque el contenido
+    remote.update(cTag='"c:{A},2"', content=b"nuevo")
+    manager.list("carpeta")
+
+    assert manager.read("A") == b"nuevo"
+    assert b"".join(manager.stream("A")) == b"nuevo"
+    assert len(downloads) == 2
+
+
+def test_shared_folder_without_delta_falls_back_to_ttl_once(monkeypatch, capsys):
+    graph = TestClient(create_app(GraphEmulator(EmulatorSettings(notifications=False, shared_folder=True))))
+
+    def send(method, url, data=None, **kwargs):
+        return graph.request(method, url, content=data, **kwargs)
+
+    monkeypatch.setattr(requests, "request", send)
+    manager = OneDriveManager({"access_token": "test"})
+    manager.graph_url = "http://testserver/v1.0"
+    manager.initialize_datacampus()
+    subscriptions = SubscriptionManager(manager, "https://api.example/notifications", client_state="secreto")
+
+    assert subscriptions.renew() is None
+    assert subscriptions.unsupported == "delta respondió 400"
+    # El hilo de renovación termina en vez de reintentar para siempre
+    subscriptions._renewal_loop()
+    assert capsys.readouterr().out.count("no disponibles") == 1
+    assert graph.get("/_emulator/stats").json()["subscriptions"] == 0
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+from app import api_server, config
+from app.cache.invalidation import CHANGES
+from app.one_drive.OD_manager import OneDriveManager
+from app.one_drive.prefetcher import Prefetcher
+from app.storage.base import DriveItem
+
+CHILDREN = {
+    "root": [
+        {"id": "sub", "name": "sub", "folder": {}},
+        {"id": "grande", "name": "grande.xlsx", "size": 5000, "lastModifiedDateTime": "2024-03-01"},
+        {"id": "viejo", "name": "viejo.xlsx", "size": 10, "lastModifiedDateTime": "2024-01-01"},
+        {"id": "nuevo", "name": "nuevo.xlsx", "size": 10, "lastModifiedDateTime": "2024-02-01"},
+        {"id": "notas", "name": "notas.txt", "size": 10},
+    ],
+    "sub": [{"id": "dentro", "name": "dentro.xlsx", "size": 10}],
+}
+
+
+def make_manager(calls):
+    manager = OneDriveManager({"access_token": "test"})
+    manager.datacampus_drive_id, manager.datacampus_root_id = "drive", "root"
+    manager.listing_cache.ttl = manager.item_cache.ttl = manager.content_cache.ttl = 3600
+
+    def fake_request(method, url, operation="other", **kwargs):
+        calls.append((operation, url.rsplit("/items/", 1)[-1]))
+        item_id = url.rsplit("/items/", 1)[-1].split("/")[0]
+        if operation == "list_children":
+            return SimpleNamespace(status_code=200, json=lambda: {"value": CHILDREN.get(item_id, [])})
+        return SimpleNamespace(status_code=200, content=item_id.encode())
+
+    manager._make_request = fake_request
+    return manager
+
+
+def test_listing_is_cached_and_primes_item_metadata():
+    calls = []
+    manager = make_manager(calls)
+
+    first = manager.list_folder_contents("root")
+    second = manager.list_folder_contents("root")
+
+    assert [item.id for item in first] == [item.id for item in second]
+    assert len(calls) == 1
+    assert manager.get_item_info("sub")["name"] == "sub"
+    assert len(calls) == 1
+
+
+def test_prefetch_warms_subfolders_and_small_recent_excel_within_budget():
+    calls = []
+    manager = make_manager(calls)
+    items = manager.list_folder_contents("root")
+    prefetcher = Prefetcher(manager, max_requests=3, max_bytes=1000, max_file_bytes=100)
+
+    assert [item.id for _, item in prefetcher.plan(items)] == ["sub", "nuevo", "viejo"]
+    assert prefetcher.warm(items) == {"requests": 3, "bytes": 20}
+    calls.clear()
+
+    manager.list_folder_contents("sub")
+    assert manager.read("nuevo") == b"nuevo"
+    assert calls == []
+
+
+def test_prefetch_yields_to_interactive_requests():
+    calls = []
+    manager = make_manager(calls)
+    items = [DriveItem(id="sub", name="sub", type="folder")]
+    manager.governor._waiting["interactive"] = 1
+
+    assert Prefetcher(manager).warm(items) == {"requests": 0, "bytes": 0}
+    assert calls == []
+
+
+def test_prefetch_runs_once_per_folder_in_background():
+    calls = []
+    manager = make_manager(calls)
+    prefetcher = Prefetcher(manager, max_file_bytes=100)
+    manager.prefetcher = prefetcher
+
+    items = manager.list_folder_contents("root")
+    manager.prefetch_children("root", items)
+    prefetcher.shutdown(wait=True)
+
+    assert ("list_children", "sub/children") in calls
+    assert "dentro" not in manager.content_cache  # solo un nivel
+
+
+def test_replaced_manager_stops_prefetching_and_leaves_the_change_bus(monkeypatch):
+    monkeypatch.setattr(config, "PREFETCH_ENABLED", True)
+    old, new = OneDriveManager({"access_token": "test"}), OneDriveManager({"access_token": "test"})
+    executor = old.prefetcher._executor
+    monkeypatch.setattr(api_server, "od_manager", old)
+
+    def subscribed(manager):
+        return any(ref() == manager.apply_changes for ref in CHANGES._subscribers)
+
+    assert subscribed(old)
+    api_server._replace_manager(new)
+
+    assert api_server.od_manager is new and old.prefetcher is None
+    assert executor._shutdown
+    assert not subscribed(old) and subscribed(new)
+    new.close()
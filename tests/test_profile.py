@@ -0,0 +1,59 @@
+import io
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app import api_server
+from app.storage.local_backend import LocalStorageBackend
+from utils.df_tools import approx_distinct, profile_dataframe
+
+
+def test_profile_dataframe_columns():
+    df = pd.DataFrame({"monto": [10.5, None, 3.0, 10.5], "cliente": ["Ana", "Luis", None, "Ana"],
+                       "fecha": pd.to_datetime(["2024-01-01", "2024-03-01", None, "2024-02-01"]),
+                       "mixta": [1, "x", 2, None]})
+    profile = profile_dataframe(df, sample_size=2)
+    columns = {column["name"]: column for column in profile["schema"]}
+
+    assert profile["rows"] == 4 and profile["columns"] == 4
+    assert columns["monto"] == {"name": "monto", "type": "float64", "nulls": 1, "min": 3.0, "max": 10.5,
+                                "distinct": 2, "samples": [10.5, 3.0]}
+    assert columns["cliente"]["min"] == "Ana" and columns["cliente"]["distinct"] == 2
+    assert columns["fecha"]["max"] == "2024-03-01T00:00:00"
+    assert columns["mixta"]["min"] is None and columns["mixta"]["nulls"] == 1
+
+
+def test_approx_distinct_on_large_column_is_close():
+    values = pd.Series(np.random.default_rng(7).integers(0, 200_000, 400_000))
+    exact = values.nunique()
+
+    assert abs(approx_distinct(values) - exact) / exact < 0.03
+
+
+def test_profile_endpoint_is_cached_per_ctag(tmp_path, monkeypatch):
+    backend = LocalStorageBackend(str(tmp_path))
+    backend.initialize_datacampus()
+    buffer = io.BytesIO()
+    pd.DataFrame({"x": [1, 2, 3]}).to_excel(buffer, index=False)
+    item = backend.write(backend.datacampus_root_id, "datos.xlsx", buffer.getvalue())
+
+    reads = []
+    read_excel_file = backend.read_excel_file
+    monkeypatch.setattr(backend, "read_excel_file", lambda file_id, *args: reads.append(file_id) or read_excel_file(file_id, *args))
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+    try:
+        client = TestClient(api_server.app)
+        first = client.get(f"/files/{item['id']}/profile")
+        second = client.get(f"/files/{item['id']}/profile")
+        revalidated = client.get(f"/files/{item['id']}/profile", headers={"If-None-Match": first.headers["etag"]})
+        backend.update_excel_file(item["id"], pd.DataFrame({"x": [1, 2, 3, 4]}))
+        changed = client.get(f"/files/{item['id']}/profile")
+    finally:
+        api_server.app.dependency_overrides.clear()
+
+    assert first.json()["rows"] == 3 and first.json()["schema"][0]["max"] == 3
+    assert second.json() == first.json()
+    assert revalidated.status_code == 304
+    assert changed.json()["rows"] == 4
+    assert len(reads) == 2
@@ -0,0 +1,73 @@
+import multiprocessing
+import time
+
+from app import config
+from app.cache.shared_state import SharedCache, SharedState
+from app.one_drive.OD_manager import OneDriveManager
+from app.storage.base import DriveItem
+
+
+def _writer(path, worker):
+    cache = SharedCache("graph_item", 60, SharedState(path))
+    for i in range(100):
+        cache.set(f"{worker}-{i}", {"id": i})
+
+
+def test_cache_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "state.db")
+    workers = [multiprocessing.Process(target=_writer, args=(path, w)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in workers)
+    cache = SharedCache("graph_item", 60, SharedState(path))
+    assert len(cache) == 400
+    assert cache.get("3-99") == {"id": 99}
+
+
+def test_shared_cache_expires_invalidates_and_respects_byte_budget(tmp_path):
+    state = SharedState(str(tmp_path / "state.db"))
+    other = SharedState(state.path)
+    cache = SharedCache("graph_content", 0.2, state, max_bytes=10, dumps=bytes, loads=bytes)
+    seen = SharedCache("graph_content", 0.2, other, dumps=bytes, loads=bytes)
+
+    cache.set("a", b"12345")
+    cache.set("b", b"123456")
+    assert seen.get("a") is None and seen.get("b") == b"123456"
+
+    seen.invalidate(["b"])
+    assert cache.get("b") is None
+    cache.set("c", b"1")
+    time.sleep(0.25)
+    assert "c" not in cache
+
+
+def test_lease_is_exclusive_until_it_expires(tmp_path):
+    state = SharedState(str(tmp_path / "state.db"))
+
+    assert state.acquire_lease("graph-delta", "worker-1", 0.2)
+    assert not state.acquire_lease("graph-delta", "worker-2", 0.2)
+    assert state.acquire_lease("graph-delta", "worker-1", 0.2)
+    time.sleep(0.25)
+    assert state.acquire_lease("graph-delta", "worker-2", 0.2)
+
+
+def test_managers_share_datacampus_ids_and_listings(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SHARED_STATE_PATH", str(tmp_path / "state.db"))
+    first, second = OneDriveManager({"access_token": "a"}), OneDriveManager({"access_token": "b"})
+    calls = []
+
+    def shared_with_me(method, url, operation="other", **kwargs):
+        calls.append(operation)
+        remote = {"id": "root", "parentReference": {"driveId": "drive"}}
+        return type("R", (), {"status_code": 200, "json": lambda self: {"value": [
+            {"name": "datacampus", "remoteItem": remote}]}})()
+
+    first._make_request = second._make_request = shared_with_me
+    assert first.initialize_datacampus() == second.initialize_datacampus() == ("drive", "root")
+    assert calls == ["shared_with_me"]
+
+    first.listing_cache.set("root", [DriveItem(id="x", name="x.xlsx", type="file", size=3)])
+    assert second.list("root") == [DriveItem(id="x", name="x.xlsx", type="file", size=3)]
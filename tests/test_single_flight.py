@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pandas as pd
+import pytest
+
+from app import api_server
+from app.cache.single_flight import AsyncSingleFlight, SingleFlight
+from app.storage.local_backend import LocalStorageBackend
+
+
+class SlowBackend(LocalStorageBackend):
+    """Backend local que cuenta descargas y tarda lo suficiente para solaparlas"""
+
+    def __init__(self, root_path):
+        super().__init__(root_path)
+        self.reads = 0
+
+    def read(self, item_id):
+        self.reads += 1
+        time.sleep(0.2)
+        return super().read(item_id)
+
+
+def test_threads_share_one_call_and_its_error():
+    flights = SingleFlight()
+    calls = []
+    results, errors = [], []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        raise ValueError("Graph caído")
+
+    def worker():
+        try:
+            results.append(flights.do(("read_excel", "A"), fetch))
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(errors) == 8 and not results
+    assert flights.do(("read_excel", "A"), lambda: "ok") == "ok"
+
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    async def run():
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "datos"
+
+        first = asyncio.ensure_future(flights.do("k", fetch))
+        second = asyncio.ensure_future(flights.do("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, calls
+
+    result, calls = asyncio.run(run())
+    assert result == "datos"
+    assert len(calls) == 1
+
+
+def test_concurrent_content_requests_download_once(tmp_path):
+    backend = SlowBackend(str(tmp_path / "datacampus"))
+    backend.initialize_datacampus()
+    created = backend.create_excel_file(backend.datacampus_root_id, "hot", pd.DataFrame({"a": [1, 2, 3]}))
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+
+    async def run():
+        transport = httpx.ASGITransport(app=api_server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[client.get(f"/files/{created['id']}/content") for _ in range(10)])
+
+    try:
+        responses = asyncio.run(run())
+    finally:
+        api_server.app.dependency_overrides.clear()
+
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.content for r in responses}) == 1
+    assert backend.reads == 1
@@ -0,0 +1,68 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from app.monitoring.timing import ServerTimingMiddleware, span
+
+
+def timing_app(**middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware, **middleware)
+
+    def parse():
+        with span("parse"):
+            time.sleep(0.02)
+            with span("transform"):
+                time.sleep(0.01)
+
+    @app.get("/phases")
+    async def phases():
+        with span("graph_fetch"):
+            time.sleep(0.01)
+        # Fase en el threadpool y repetida: las duraciones se suman por nombre
+        await run_in_threadpool(parse)
+        with span("parse"):
+            time.sleep(0.01)
+        return {"ok": True}
+
+    @app.get("/fast")
+    def fast():
+        return {"ok": True}
+
+    @app.get("/slow")
+    def slow():
+        # El hilo del threadpool entra en el perfil al abrir una fase
+        with span("transform"):
+            time.sleep(0.1)
+        return {"ok": True}
+
+    return app
+
+
+def durations(header: str) -> dict:
+    return {name: float(dur[len("dur="):]) for name, dur in (part.split(";") for part in header.split(", "))}
+
+
+def test_server_timing_lists_phases_and_nested_spans_add_up():
+    response = TestClient(timing_app(slow_threshold_ms=0)).get("/phases")
+    phases = durations(response.headers["server-timing"])
+
+    assert list(phases) == ["graph_fetch", "transform", "parse", "total"]
+    assert phases["graph_fetch"] >= 10 and phases["transform"] >= 10
+    assert phases["parse"] >= 30 + phases["transform"] - 1  # 20 + 10 propios más los 10 de transform anidado
+    assert phases["total"] >= phases["graph_fetch"] + phases["parse"]
+
+
+def test_slow_request_writes_folded_profile(tmp_path):
+    client = TestClient(timing_app(slow_threshold_ms=50, sample_rate=1.0, interval_ms=1, profile_dir=str(tmp_path)))
+
+    client.get("/fast")
+    assert list(tmp_path.iterdir()) == []
+
+    client.get("/slow")
+    profiles = list(tmp_path.iterdir())
+    assert len(profiles) == 1 and profiles[0].name.endswith(".folded") and "_GET_slow_" in profiles[0].name
+    stacks = profiles[0].read_text(encoding="utf-8").splitlines()
+    assert stacks and any("slow (test_timing.py" in line for line in stacks)
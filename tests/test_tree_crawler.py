@@ -0,0 +1,79 @@
+from app.one_drive.OD_manager import DriveItem
+from app.one_drive.governor import BULK, current_lane, lane
+from app.one_drive.tree_crawler import FolderTreeCrawler
+
+
+class FakeManager:
+    """Manager mínimo con un árbol en memoria"""
+
+    def __init__(self, tree, failing=()):
+        self.tree = tree
+        self.failing = set(failing)
+
+    def list_folder_contents(self, folder_id):
+        if folder_id in self.failing:
+            raise Exception("Error al listar contenido: 500")
+        return self.tree.get(folder_id, [])
+
+
+def folder(item_id, size=0):
+    return DriveItem(id=item_id, name=item_id, type='folder', size=size)
+
+
+def file(item_id, size):
+    return DriveItem(id=item_id, name=item_id, type='file', size=size)
+
+
+TREE = {
+    "root": [folder("a"), folder("b"), file("r1.xlsx", 10)],
+    "a": [folder("a1", size=500), file("a.xlsx", 100), file("a.csv", 50)],
+    "a1": [file("deep.xlsx", 500)],
+    "b": [file("b.xlsx", 7)],
+}
+
+
+def test_crawl_aggregates_sizes_and_counts():
+    events = list(FolderTreeCrawler(FakeManager(TREE), max_workers=4).crawl("root", "datacampus", depth=5))
+
+    folder_events = [e for e in events if e["event"] == "folder"]
+    assert len(folder_events) == 4
+    assert events[-1]["event"] == "tree"
+
+    tree = events[-1]["tree"]
+    assert tree["file_count"] == 1
+    assert tree["total_file_count"] == 5
+    assert tree["total_size"] == 667
+    a = next(c for c in tree["children"] if c["id"] == "a")
+    assert a["path"] == ["datacampus", "a"]
+    assert a["total_size"] == 650
+
+
+def test_crawl_respects_depth_and_reports_errors():
+    manager = FakeManager(TREE, failing={"b"})
+    events = list(FolderTreeCrawler(manager, max_workers=2).crawl("root", "datacampus", depth=2))
+
+    assert [e["id"] for e in events if e["event"] == "error"] == ["b"]
+    tree = events[-1]["tree"]
+    a = next(c for c in tree["children"] if c["id"] == "a")
+    a1 = a["children"][0]
+    # a1 no se lista, pero conserva el tamaño que reporta Graph
+    assert a1["truncated"] is True
+    assert a1["total_size"] == 500
+    assert tree["total_size"] == 660
+
+
+def test_crawl_workers_keep_the_callers_lane():
+    lanes = []
+
+    class LaneManager(FakeManager):
+        def list_folder_contents(self, folder_id):
+            lanes.append(current_lane())
+            return super().list_folder_contents(folder_id)
+
+    with lane(BULK):
+        list(FolderTreeCrawler(LaneManager(TREE), max_workers=4).crawl("root", "datacampus", depth=5))
+    assert lanes == [BULK] * 4
+
+    lanes.clear()
+    list(FolderTreeCrawler(LaneManager(TREE), max_workers=4, lane_name=BULK).crawl("root", "datacampus", depth=5))
+    assert lanes == [BULK] * 4
@@ -0,0 +1,102 @@
+import io
+from types import SimpleNamespace
+
+import openpyxl
+import pandas as pd
+import requests
+from fastapi.testclient import TestClient
+
+from app import api_server
+from app.one_drive import OD_manager
+from app.one_drive.OD_manager import OneDriveManager
+from app.storage.local_backend import LocalStorageBackend
+from loadtest.graph_emulator import EmulatorSettings, GraphEmulator, create_app
+
+
+def workbook_with_formula() -> bytes:
+    book = openpyxl.Workbook()
+    book.active.append(["a", "b", "total"])
+    book.active.append([1, 2, "=A2+B2"])
+    book.create_sheet("Notas")["A1"] = "se conserva"
+    buffer = io.BytesIO()
+    book.save(buffer)
+    return buffer.getvalue()
+
+
+def test_upload_endpoint_passthrough_and_conversions(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path))
+    backend.initialize_datacampus()
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+    original = workbook_with_formula()
+    try:
+        client = TestClient(api_server.app)
+        xlsx = client.post("/files/upload", files={"file": ("informe.xlsx", original)})
+        csv = client.post("/files/upload", files={"file": ("ventas.csv", b"mes,total\nenero,10\nfebrero,\n")})
+        broken = client.post("/files/upload", files={"file": ("roto.xlsx", b"no es un zip")})
+        other = client.post("/files/upload", files={"file": ("notas.txt", b"hola")})
+    finally:
+        api_server.app.dependency_overrides.clear()
+
+    assert xlsx.status_code == 200
+    assert backend.read(xlsx.json()["file_id"]) == original  # fórmulas y hojas intactas
+    assert csv.json()["name"] == "ventas.xlsx"
+    converted = backend.read_excel_file(csv.json()["file_id"])
+    assert converted["mes"].tolist() == ["enero", "febrero"] and converted["total"].isna().tolist() == [False, True]
+    assert broken.status_code == 400 and "zip" in broken.json()["detail"]
+    assert other.status_code == 400
+
+
+def test_large_upload_uses_upload_session(monkeypatch):
+    emulator = GraphEmulator(EmulatorSettings(notifications=False))
+    graph = TestClient(create_app(emulator))
+    sent = []
+
+    def send(method, url, data=None, headers=None, **kwargs):
+        sent.append((method, url, headers or {}))
+        return graph.request(method, url, content=data, headers=headers, **kwargs)
+
+    monkeypatch.setattr(requests, "request", send)
+    monkeypatch.setattr(OD_manager, "SIMPLE_UPLOAD_MAX_BYTES", 1000)
+    monkeypatch.setattr(OD_manager, "UPLOAD_CHUNK_BYTES", 1024)
+    manager = OneDriveManager({"access_token": "test"})
+    manager.graph_url = "http://testserver/v1.0"
+    _, root = manager.initialize_datacampus()
+
+    payload = bytes(range(256)) * 10
+    item = manager.write_stream(root, "grande.bin", io.BytesIO(payload))
+
+    chunks = [headers for method, url, headers in sent if "/_upload/" in url]
+    assert emulator.items[item["id"]].content == payload
+    assert [headers["Content-Range"] for headers in chunks] == ["bytes 0-1023/2560", "bytes 1024-2047/2560",
+                                                                "bytes 2048-2559/2560"]
+    assert all("Authorization" not in headers for headers in chunks)
+
+
+def test_failed_chunk_resumes_from_next_expected_range_without_pausing_graph(monkeypatch):
+    emulator = GraphEmulator(EmulatorSettings(notifications=False))
+    graph = TestClient(create_app(emulator))
+    ranges = []
+
+    def send(method, url, data=None, headers=None, **kwargs):
+        if method == "PUT" and "/_upload/" in url:
+            ranges.append(headers["Content-Range"])
+            if len(ranges) == 2:
+                # El proxy corta a mitad del segundo fragmento: Graph guardó solo una parte
+                headers = {**headers, "Content-Range": "bytes 1024-1535/2560"}
+                graph.request(method, url, content=data[:512], headers=headers)
+                return SimpleNamespace(status_code=502, headers={"Retry-After": "0"}, text="Bad Gateway", content=b"")
+        return graph.request(method, url, content=data, headers=headers, **kwargs)
+
+    monkeypatch.setattr(requests, "request", send)
+    monkeypatch.setattr(OD_manager, "SIMPLE_UPLOAD_MAX_BYTES", 1000)
+    monkeypatch.setattr(OD_manager, "UPLOAD_CHUNK_BYTES", 1024)
+    manager = OneDriveManager({"access_token": "test"})
+    manager.graph_url = "http://testserver/v1.0"
+    _, root = manager.initialize_datacampus()
+
+    payload = bytes(range(256)) * 10
+    item = manager.write_stream(root, "grande.bin", io.BytesIO(payload))
+
+    assert emulator.items[item["id"]].content == payload
+    assert ranges == ["bytes 0-1023/2560", "bytes 1024-2047/2560", "bytes 1536-2047/2560", "bytes 2048-2559/2560"]
+    assert not manager.governor.busy() and not manager.governor.limited
@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+from app.warmup import preload
+
+
+def test_api_import_does_not_load_heavy_libraries():
+    code = ("import sys, app.api_server, app.main; "
+            "print(','.join(m for m in ('pandas', 'openpyxl', 'msal', 'requests') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=".", WARMUP_ENABLED="false"))
+
+    assert result.stdout.strip() == ""
+
+
+def test_preload_reports_each_module_and_skips_missing():
+    timings = preload(["json", "modulo_que_no_existe"])
+
+    assert list(timings) == ["json"]
+    assert timings["json"] >= 0
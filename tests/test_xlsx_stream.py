@@ -0,0 +1,77 @@
+import io
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app import api_server
+from app.storage.local_backend import LocalStorageBackend
+from utils.xlsx_stream import XlsxCsvStream
+
+
+def workbook(**sheets) -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return buffer.getvalue()
+
+
+def test_stream_matches_pandas_csv_in_small_chunks():
+    df = pd.DataFrame({"nombre": ["Ana", "Bruno, hijo", None], "total": [1, 2, 3],
+                       "fecha": [datetime(2024, 1, 5), datetime(2024, 2, 6), datetime(2024, 3, 7)]})
+    chunks = list(XlsxCsvStream(io.BytesIO(workbook(Datos=df)), chunk_size=16))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks).decode() == df.to_csv(index=False, date_format="%Y-%m-%d %H:%M:%S")
+
+
+def test_stream_options_sheet_delimiter_and_encoding():
+    data = workbook(Uno=pd.DataFrame({"a": [1]}), Dos=pd.DataFrame({"ciudad": ["Medellín"], "n": [2]}))
+
+    out = b"".join(XlsxCsvStream(io.BytesIO(data), sheet="Dos", delimiter="semicolon", encoding="utf-8-sig"))
+    assert out == "﻿ciudad;n\nMedellín;2\n".encode("utf-8")
+    assert b"".join(XlsxCsvStream(io.BytesIO(data), sheet="1", encoding="latin-1")) == "ciudad,n\nMedellín,2\n".encode("latin-1")
+
+    with pytest.raises(KeyError):
+        XlsxCsvStream(io.BytesIO(data), sheet="Tres")
+    with pytest.raises(ValueError):
+        XlsxCsvStream(io.BytesIO(data), delimiter=";;")
+
+
+def test_download_endpoint_streams_csv_with_options(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path))
+    backend.initialize_datacampus()
+    item = backend.write(backend.datacampus_root_id, "ventas.xlsx",
+                         workbook(Hoja1=pd.DataFrame({"x": [1, 2]}), Resumen=pd.DataFrame({"total": [3]})))
+    api_server.app.dependency_overrides[api_server.get_manager] = lambda: backend
+    try:
+        client = TestClient(api_server.app)
+        response = client.get(f"/files/{item['id']}/download", params={"sheet": "Resumen", "delimiter": "tab"})
+        missing = client.get(f"/files/{item['id']}/download", params={"sheet": "Nada"})
+        other = client.get(f"/files/{item['id']}/download")
+    finally:
+        api_server.app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.text == "total\n3\n"
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert "ventas.csv" in response.headers["content-disposition"]
+    assert missing.status_code == 400 and "Nada" in missing.json()["detail"]
+    assert other.text == "x\n1\n2\n" and other.headers["etag"] != response.headers["etag"]
+
+
+def test_rows_wider_than_the_header_widen_it_like_pandas():
+    from openpyxl import Workbook
+
+    book = Workbook()
+    sheet = book.active
+    for row in (["a", "b"], [1, 2, 3], [4], [5, None, None, 6]):
+        sheet.append(row)
+    buffer = io.BytesIO()
+    book.save(buffer)
+
+    out = b"".join(XlsxCsvStream(io.BytesIO(buffer.getvalue()))).decode()
+    assert out == "a,b,Unnamed: 2,Unnamed: 3\n1,2,3,\n4,,,\n5,,,6\n"
+    assert out == pd.read_excel(io.BytesIO(buffer.getvalue())).to_csv(index=False, float_format="%g")
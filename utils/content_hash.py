@@ -0,0 +1,68 @@
+import base64
+import hashlib
+from typing import Dict, Optional
+
+import numpy as np
+
+# quickXorHash: estado circular de 160 bits; el byte k se combina (XOR) desplazado 11·k bits
+QUICK_XOR_WIDTH = 160
+QUICK_XOR_SHIFT = 11
+_MASK = (1 << QUICK_XOR_WIDTH) - 1
+
+
+class QuickXorHash:
+    """``quickXorHash`` de OneDrive/SharePoint con la interfaz de ``hashlib``.
+
+    La posición de cada byte en el estado se repite cada 160 bytes, así que
+    basta con combinar con XOR, en numpy, todos los bytes que caen en la
+    misma posición (columnas de una matriz de 160) y rotar solo 160 valores.
+    """
+
+    def __init__(self, data: bytes = b""):
+        self._cells = np.zeros(QUICK_XOR_WIDTH, dtype=np.uint8)
+        self._length = 0
+        if data:
+            self.update(data)
+
+    def update(self, data: bytes) -> None:
+        view = np.frombuffer(data, dtype=np.uint8)
+        if not len(view):
+            return
+        # Alinear el fragmento con la posición global del primer byte
+        start = self._length % QUICK_XOR_WIDTH
+        padded = np.zeros(start + len(view) + (-(start + len(view)) % QUICK_XOR_WIDTH), dtype=np.uint8)
+        padded[start:start + len(view)] = view
+        self._cells ^= np.bitwise_xor.reduce(padded.reshape(-1, QUICK_XOR_WIDTH), axis=0)
+        self._length += len(view)
+
+    def digest(self) -> bytes:
+        state = 0
+        for position, value in enumerate(self._cells.tolist()):
+            if value:
+                shifted = value << (position * QUICK_XOR_SHIFT % QUICK_XOR_WIDTH)
+                state ^= (shifted | (shifted >> QUICK_XOR_WIDTH)) & _MASK
+        result = bytearray(state.to_bytes(QUICK_XOR_WIDTH // 8, "little"))
+        # La longitud total (64 bits) se combina con los últimos 8 bytes
+        for i, byte in enumerate(self._length.to_bytes(8, "little")):
+            result[-8 + i] ^= byte
+        return bytes(result)
+
+    def b64digest(self) -> str:
+        """Formato de ``file.hashes.quickXorHash`` en Graph"""
+        return base64.b64encode(self.digest()).decode("ascii")
+
+
+def quick_xor_hash(data: bytes) -> str:
+    return QuickXorHash(data).b64digest()
+
+
+def same_content(data: bytes, item: Dict) -> Optional[bool]:
+    """Comparar ``data`` con los hashes de un driveItem (None si no trae ninguno)"""
+    hashes = (item.get("file") or {}).get("hashes") or {}
+    if hashes.get("quickXorHash"):
+        return quick_xor_hash(data) == hashes["quickXorHash"]
+    if hashes.get("sha256Hash"):
+        return hashlib.sha256(data).hexdigest().upper() == hashes["sha256Hash"].upper()
+    if hashes.get("sha1Hash"):
+        return hashlib.sha1(data).hexdigest().upper() == hashes["sha1Hash"].upper()
+    return None
@@ -1,7 +1,257 @@
+import hashlib
 import io
+import json
+import math
+import numpy as np
+import orjson
 import pandas as pd
 
+# Orientaciones aceptadas por dataframe_to_json
+JSON_ORIENTS = ("split", "records", "columns")
+
 def excel_bytes_to_df(bytes_data: bytes) -> pd.DataFrame:
     with io.BytesIO(bytes_data) as buffer:
         df = pd.read_excel(buffer)
     return df
+
+def column_types(df: pd.DataFrame) -> dict:
+    return {str(name): str(dtype) for name, dtype in df.dtypes.items()}
+
+def _json_default(value):
+    # Lo que orjson no serializa por sí mismo (Timestamp, Timedelta, Decimal...)
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat(timespec="milliseconds")
+    return str(value)
+
+def _native_values(column: pd.Series):
+    """Columna numérica o booleana como ndarray que orjson escribe sin crear objetos por celda.
+
+    Devuelve None para lo demás (texto, fechas, tipos nullable con nulos...).
+    """
+    dtype = column.dtype
+    if not isinstance(dtype, np.dtype) or dtype.kind not in "biuf":
+        return None
+    if dtype.kind == "f":
+        # float32 se amplía antes: su repr corto no es el del valor en float64. NaN/inf salen como null
+        return np.ascontiguousarray(column.to_numpy(dtype=np.float64))
+    return np.ascontiguousarray(column.to_numpy())
+
+def _datetimes(column: pd.Series) -> np.ndarray:
+    """Fechas como texto ISO 8601 con milisegundos, en UTC si llevan zona ("NaT" si faltan)"""
+    if getattr(column.dtype, "tz", None) is not None:
+        column = column.dt.tz_convert("UTC").dt.tz_localize(None)
+    return np.datetime_as_string(column.to_numpy(), unit="ms")
+
+def _column_values(column: pd.Series) -> np.ndarray:
+    """Valores de una columna como objetos de Python listos para orjson (nulos -> None)"""
+    kind = column.dtype.kind
+    if kind == "M":
+        values = _datetimes(column).astype(object)
+    elif kind == "f":
+        values = column.to_numpy(dtype=np.float64).astype(object)
+    else:
+        values = column.to_numpy(dtype=object)
+    missing = column.isna().to_numpy()
+    if missing.any():
+        values = values.copy()
+        values[missing] = None
+    return values
+
+def _column_json(column: pd.Series) -> bytes:
+    """Arreglo JSON de una columna; solo el texto y lo mezclado pasa por objetos de Python"""
+    native = _native_values(column)
+    if native is not None:
+        return _dumps(native)
+    if column.dtype.kind == "M":
+        # Las cadenas ISO no llevan comillas ni escapes: se unen tal cual
+        text = _datetimes(column).tolist()
+        return ('["' + '","'.join(text) + '"]').replace('"NaT"', "null").encode("ascii") if text else b"[]"
+    return _dumps(_column_values(column).tolist())
+
+def _rows(df: pd.DataFrame) -> list:
+    table = np.empty(df.shape, dtype=object)
+    for i in range(df.shape[1]):
+        table[:, i] = _column_values(df.iloc[:, i])
+    return table.tolist()
+
+def _native_rows(df: pd.DataFrame):
+    """Tabla 2D para orjson si todas las columnas son nativas y del mismo tipo (None si no)"""
+    natives = [_native_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    if not natives or any(values is None for values in natives) or len({values.dtype for values in natives}) > 1:
+        return None
+    return np.ascontiguousarray(np.column_stack(natives))
+
+def _dumps(data) -> bytes:
+    return orjson.dumps(data, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def dataframe_to_json(df: pd.DataFrame, orient: str = "split") -> bytes:
+    """Serializar un DataFrame al JSON de ``/files/{id}/content`` directamente a bytes.
+
+    ``split`` devuelve ``data`` como lista de filas (formato histórico),
+    ``records`` como lista de objetos y ``columns`` como un arreglo por columna.
+    orjson escribe cada número con la representación más corta que vuelve a
+    dar el mismo float (sin perder dígitos); NaN/NaT pasan a null y las
+    fechas a ISO 8601. Las columnas numéricas y booleanas se le pasan como
+    ndarray (en ``split`` solo si todas comparten tipo); el texto y lo
+    mezclado, como objetos de Python.
+    """
+    if orient not in JSON_ORIENTS:
+        raise ValueError(f"Orientación no soportada: {orient}")
+
+    columns = [str(name) for name in df.columns]
+
+    if orient == "split":
+        native = _native_rows(df)
+        data = _dumps(native if native is not None else _rows(df))
+    elif orient == "records":
+        data = _dumps([dict(zip(columns, row)) for row in _rows(df)])
+    else:
+        parts = [_dumps(name) + b":" + _column_json(df.iloc[:, i]) for i, name in enumerate(columns)]
+        data = b"{" + b",".join(parts) + b"}"
+
+    info = {
+        "rows": len(df),
+        "columns": len(columns),
+        "column_types": column_types(df),
+        "orient": orient,
+    }
+
+    return b"".join([
+        b'{"columns":', json.dumps(columns).encode("utf-8"),
+        b',"data":', data,
+        b',"shape":', json.dumps(list(df.shape)).encode("utf-8"),
+        b',"info":', json.dumps(info).encode("utf-8"),
+        b"}",
+    ])
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Huella de columnas, tipos y valores (sin el índice, que no se escribe al Excel)"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(name), str(dtype)] for name, dtype in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+# Por debajo de este número de valores el conteo de distintos es exacto
+EXACT_DISTINCT_LIMIT = 50_000
+
+def approx_distinct(values: pd.Series, precision: int = 14) -> int:
+    """Número de valores distintos (sin nulos): exacto si son pocos, HyperLogLog si no.
+
+    Con ``precision=14`` (16384 registros) el error típico es ~0,8 %. Todo
+    se calcula sobre el hash de pandas de la columna, sin objetos por celda.
+    """
+    hashes = pd.util.hash_pandas_object(values.dropna(), index=False).to_numpy()
+    if len(hashes) <= EXACT_DISTINCT_LIMIT:
+        return int(len(np.unique(hashes)))
+
+    m = 1 << precision
+    bits = 64 - precision
+    buckets = (hashes >> np.uint64(bits)).astype(np.int64)
+    rest = hashes & np.uint64((1 << bits) - 1)
+    # Posición del primer 1 en los bits restantes (rest == 0 -> bits + 1)
+    highest = np.floor(np.log2(np.maximum(rest, 1).astype(np.float64))).astype(np.int64)
+    ranks = np.where(rest == 0, bits + 1, bits - highest).astype(np.uint8)
+    registers = np.zeros(m, dtype=np.uint8)
+    np.maximum.at(registers, buckets, ranks)
+
+    estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+def _json_scalar(value):
+    """Valor de numpy/pandas a algo que json.dumps acepta"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def _min_max(column: pd.Series):
+    try:
+        return _json_scalar(column.min(skipna=True)), _json_scalar(column.max(skipna=True))
+    except TypeError:
+        # Columna con tipos mezclados (números y texto): no hay orden total
+        return None, None
+
+def profile_dataframe(df: pd.DataFrame, sample_size: int = 5) -> dict:
+    """Esquema y estadísticas por columna para decidir qué consultar sin bajar el contenido.
+
+    Por columna: tipo, nulos, mínimo y máximo, distintos (estimados si la
+    columna es grande) y unos valores de ejemplo.
+    """
+    nulls = df.isna().sum()
+    columns = []
+    for i, name in enumerate(df.columns):
+        column = df.iloc[:, i]
+        minimum, maximum = _min_max(column)
+        samples = column.dropna().head(1000).drop_duplicates().head(sample_size)
+        columns.append({
+            "name": str(name),
+            "type": str(column.dtype),
+            "nulls": int(nulls.iloc[i]),
+            "min": minimum,
+            "max": maximum,
+            "distinct": approx_distinct(column),
+            "samples": [_json_scalar(value) for value in samples],
+        })
+
+    return {"rows": len(df), "columns": len(df.columns), "schema": columns}
+
+# Columnas de texto con menos distintos que esta fracción de sus valores pasan a categoría
+CATEGORY_MAX_RATIO = 0.5
+
+def _arrow_strings() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _compact_column(column: pd.Series, category_ratio: float, arrow: bool) -> pd.Series:
+    kind = column.dtype.kind
+    if kind in "iu":
+        return pd.to_numeric(column, downcast="integer" if kind == "i" else "unsigned")
+    if kind == "f":
+        # Solo si float32 conserva todos los valores: el JSON sale con 15 dígitos
+        narrow = column.astype(np.float32)
+        same = (narrow.astype(np.float64) == column) | column.isna()
+        return narrow if bool(same.all()) else column
+    if kind not in "OT" and not isinstance(column.dtype, pd.StringDtype):
+        return column
+    if pd.api.types.infer_dtype(column, skipna=True) != "string":
+        return column
+    values = column.count()
+    if values and column.nunique() <= category_ratio * values:
+        # Ordenada (alfabéticamente) para que mín/máx sigan funcionando como en el texto
+        categories = sorted(column.dropna().unique())
+        return column.astype(pd.CategoricalDtype(categories, ordered=True))
+    if arrow:
+        return column.astype(pd.StringDtype("pyarrow"))
+    return column
+
+def compact_dataframe(df: pd.DataFrame, category_ratio: float = CATEGORY_MAX_RATIO) -> tuple[pd.DataFrame, dict]:
+    """Reducir la memoria de un DataFrame leído; devuelve ``(df, informe)``.
+
+    Texto con pocos distintos -> categoría, enteros al tipo más pequeño,
+    float64 -> float32 si no se pierde precisión y el resto del texto en
+    cadenas de Arrow (si pyarrow está instalado). El informe trae
+    ``bytes_before``, ``bytes_after``, ``bytes_saved`` y ``arrow_strings``
+    (si se usaron cadenas de Arrow).
+    """
+    before = int(df.memory_usage(index=True, deep=True).sum())
+    arrow = _arrow_strings()
+    compacted = pd.DataFrame(
+        {i: _compact_column(df.iloc[:, i], category_ratio, arrow) for i in range(len(df.columns))},
+        index=df.index)
+    compacted.columns = df.columns
+    after = int(compacted.memory_usage(index=True, deep=True).sum())
+    return compacted, {"bytes_before": before, "bytes_after": after, "bytes_saved": before - after,
+                       "arrow_strings": arrow}
@@ -0,0 +1,78 @@
+import io
+import os
+import zipfile
+from typing import IO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Formatos que acepta /files/upload; CSV y Parquet se convierten a .xlsx
+UPLOAD_FORMATS = (".xlsx", ".csv", ".parquet")
+# Partes mínimas de un libro de Excel dentro del zip
+XLSX_REQUIRED_PARTS = ("[Content_Types].xml", "xl/workbook.xml")
+
+
+def upload_format(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in UPLOAD_FORMATS:
+        raise ValueError(f"Formato no soportado: '{filename}' (se aceptan {', '.join(UPLOAD_FORMATS)})")
+    return extension
+
+
+def xlsx_name(filename: str) -> str:
+    return os.path.splitext(filename)[0] + ".xlsx"
+
+
+def check_xlsx(source: IO[bytes]) -> None:
+    """Comprobar que ``source`` es un .xlsx bien formado sin leer las celdas.
+
+    Solo se lee el directorio central del zip (al final del archivo): es
+    un zip válido y contiene las partes de un libro. Deja ``source`` al principio.
+    """
+    try:
+        with zipfile.ZipFile(source) as archive:
+            names = set(archive.namelist())
+    except zipfile.BadZipFile:
+        raise ValueError("El archivo no es un .xlsx válido (no es un zip)")
+    finally:
+        source.seek(0)
+    missing = [part for part in XLSX_REQUIRED_PARTS if part not in names]
+    if missing:
+        raise ValueError(f"El archivo no es un .xlsx válido (falta {', '.join(missing)})")
+
+
+def read_table(source: IO[bytes], extension: str) -> "pd.DataFrame":
+    """Leer un CSV o Parquet subido (con pyarrow si está instalado)"""
+    import pandas as pd
+
+    if extension == ".parquet":
+        try:
+            return pd.read_parquet(source)
+        except ImportError:
+            raise ValueError("Para subir archivos Parquet hace falta instalar pyarrow")
+    try:
+        import pyarrow  # noqa: F401
+        return pd.read_csv(source, engine="pyarrow")
+    except ImportError:
+        return pd.read_csv(source)
+
+
+def frame_to_xlsx(df: "pd.DataFrame") -> bytes:
+    """Escribir un DataFrame a .xlsx con openpyxl en modo ``write_only``.
+
+    Las filas se escriben directamente al XML sin crear objetos por celda,
+    bastante más rápido que ``DataFrame.to_excel``. Las celdas vacías (NaN)
+    quedan vacías igual que con pandas.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append([str(name) for name in df.columns])
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        sheet.append(row)
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
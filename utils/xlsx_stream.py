@@ -0,0 +1,125 @@
+import codecs
+import csv
+import io
+from typing import IO, Iterator, Optional
+
+# Separadores con nombre para la query string (?delimiter=tab)
+DELIMITERS = {"comma": ",", "semicolon": ";", "tab": "\t", "pipe": "|"}
+CSV_CHUNK_SIZE = 64 * 1024
+
+
+def resolve_delimiter(delimiter: str) -> str:
+    """Aceptar un carácter o un nombre de DELIMITERS"""
+    delimiter = DELIMITERS.get(delimiter.lower(), delimiter)
+    if len(delimiter) != 1 or delimiter in ('"', "\r", "\n"):
+        raise ValueError(f"Separador no válido: {delimiter!r}")
+    return delimiter
+
+
+def resolve_encoding(encoding: str) -> str:
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        raise ValueError(f"Codificación desconocida: {encoding}")
+
+
+def _trimmed(row) -> list:
+    """Fila sin las celdas vacías del final"""
+    values = list(row)
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+
+class XlsxCsvStream:
+    """Convierte una hoja de un .xlsx a CSV por fragmentos, sin pasar por pandas.
+
+    openpyxl en modo ``read_only`` lee las filas del XML a medida que se
+    recorren, así que la memoria no crece con el tamaño de la hoja. La hoja
+    se abre al crear el objeto (una hoja inexistente falla antes de empezar
+    a responder) y las filas se codifican y entregan en bloques de
+    ``chunk_size`` bytes aproximadamente.
+
+    Como ``pd.read_excel``: la primera fila es la cabecera (las celdas vacías
+    pasan a ``Unnamed: i``), si alguna fila es más ancha la cabecera se
+    amplía también con ``Unnamed: i``, se saltan las filas vacías y se usa la
+    primera hoja si no se indica otra. A diferencia de ``DataFrame.to_csv``, las
+    fechas llevan siempre la hora: no se conoce la columna entera de antemano.
+    """
+
+    def __init__(self, source: IO[bytes], sheet: Optional[str] = None, delimiter: str = ",",
+                 encoding: str = "utf-8", chunk_size: int = CSV_CHUNK_SIZE):
+        from openpyxl import load_workbook
+
+        self.delimiter = resolve_delimiter(delimiter)
+        self.encoding = resolve_encoding(encoding)
+        self.chunk_size = chunk_size
+        self._source = source
+        self._workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            self.sheet = self._select_sheet(sheet)
+        except Exception:
+            self.close()
+            raise
+
+    def _select_sheet(self, sheet: Optional[str]):
+        if sheet is None or sheet == "":
+            return self._workbook.worksheets[0]
+        if sheet in self._workbook.sheetnames:
+            return self._workbook[sheet]
+        if sheet.isdigit() and int(sheet) < len(self._workbook.worksheets):
+            return self._workbook.worksheets[int(sheet)]
+        raise KeyError(f"La hoja '{sheet}' no existe (hojas: {', '.join(self._workbook.sheetnames)})")
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            yield from self._chunks()
+        finally:
+            self.close()
+
+    def _chunks(self) -> Iterator[bytes]:
+        # El encoder incremental escribe el BOM (utf-8-sig, utf-16) solo al principio
+        encoder = codecs.getincrementalencoder(self.encoding)(errors="replace")
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=self.delimiter, lineterminator="\n")
+
+        width = None
+        for row in self.sheet.iter_rows(values_only=True):
+            if all(value is None or value == "" for value in row):
+                continue
+            if width is None:
+                header = _trimmed(row)
+                width = self._width(len(header))
+                header += [None] * (width - len(header))
+                row = [f"Unnamed: {i}" if value is None else value for i, value in enumerate(header)]
+            else:
+                row = (list(row) + [None] * width)[:width]
+            writer.writerow(["" if value is None else value for value in row])
+
+            if buffer.tell() >= self.chunk_size:
+                yield encoder.encode(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+
+        tail = encoder.encode(buffer.getvalue(), final=True)
+        if tail:
+            yield tail
+
+    def _width(self, header_width: int) -> int:
+        """Columnas del CSV: las de la fila más larga, no solo las de la cabecera.
+
+        Si la hoja declara sus dimensiones (Excel, openpyxl y pandas lo hacen)
+        y la cabecera ya las ocupa, no hay nada más que mirar; si no, se
+        recorre la hoja una vez antes de escribir.
+        """
+        declared = self.sheet.max_column
+        if declared is not None and declared <= header_width:
+            return header_width
+        width = header_width
+        for row in self.sheet.iter_rows(values_only=True):
+            width = max(width, len(_trimmed(row)))
+        return width
+
+    def close(self) -> None:
+        self._workbook.close()
+        self._source.close()